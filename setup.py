@@ -21,13 +21,18 @@ setup(
     url="https://github.com/teapow/django-simple-authentication",
     author="Thomas Power",
     author_email="thomaspwr@gmail.com",
-    install_requires=[],
+    install_requires=[
+        "Django>=3.2",
+    ],
     classifiers=[
         "Framework :: Django",
-        "Framework :: Django :: 2.0",
-        "Framework :: Django :: 2.1",
+        "Framework :: Django :: 3.2",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
+        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
         "Topic :: Utilities",
     ],
     test_suite="simple_authentication.run_tests.run",
@@ -0,0 +1,74 @@
+"""Changelist classes used by the simple_authentication admin classes."""
+
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+
+from ..counts import get_threshold, with_estimated_counts
+from ..pagination import ANCHOR_VAR
+
+EXACT_COUNT_VAR = "exact_count"
+
+
+class EstimatedCountChangeList(ChangeList):
+    """Changelist estimating (and caching) its counts on large tables.
+
+    See simple_authentication.counts. Adding ``exact_count=1`` to the query
+    string opts in to exact counts.
+    """
+
+    def get_filters_params(self, params=None):
+        """Return the filter parameters, ignoring EXACT_COUNT_VAR."""
+        lookup_params = super(
+            EstimatedCountChangeList, self).get_filters_params(params)
+        lookup_params.pop(EXACT_COUNT_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        """Count the results, with estimated counts unless opted out."""
+        self.counts_estimated = False
+        self.exact_count_url = self.get_query_string({EXACT_COUNT_VAR: 1})
+        if get_threshold() is None or EXACT_COUNT_VAR in self.params:
+            return super(EstimatedCountChangeList, self).get_results(request)
+
+        # Only swapped in while counting, so that the querysets later used
+        # by admin actions (e.g. to delete users) are counted exactly.
+        queryset, root_queryset = self.queryset, self.root_queryset
+        self.queryset = with_estimated_counts(queryset)
+        self.root_queryset = with_estimated_counts(root_queryset)
+        try:
+            super(EstimatedCountChangeList, self).get_results(request)
+        finally:
+            self.counts_estimated = (
+                self.queryset.count_estimated or
+                self.root_queryset.count_estimated
+            )
+            self.queryset, self.root_queryset = queryset, root_queryset
+
+
+class KeysetChangeList(EstimatedCountChangeList):
+    """Changelist whose page links carry the anchor of the current page.
+
+    Used with a KeysetPaginator (see simple_authentication.pagination), so
+    that following a link to another page seeks from the current one.
+    """
+
+    def get_filters_params(self, params=None):
+        """Return the filter parameters, ignoring ANCHOR_VAR."""
+        lookup_params = super(KeysetChangeList, self).get_filters_params(
+            params)
+        lookup_params.pop(ANCHOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        """Remember the anchor of the page of results."""
+        super(KeysetChangeList, self).get_results(request)
+        self.page_anchor = getattr(self.paginator, "last_anchor", None)
+
+    def get_query_string(self, new_params=None, remove=None):
+        """Add the current page's anchor to links to other pages only."""
+        new_params = dict(new_params or {})
+        if PAGE_VAR in new_params and getattr(self, "page_anchor", None):
+            new_params[ANCHOR_VAR] = self.page_anchor
+        else:
+            new_params[ANCHOR_VAR] = None
+        return super(KeysetChangeList, self).get_query_string(
+            new_params, remove)
@@ -1,12 +1,28 @@
 """Admin classes for the simple_authentication.User model."""
 
+from django.contrib import messages
+from django.contrib.admin import helpers
+from django.contrib.admin.options import IS_POPUP_VAR, TO_FIELD_VAR
 from django.contrib.auth import login
 from django.contrib.auth.admin import UserAdmin as _UserAdmin
-from django.contrib import messages
+from django.db import IntegrityError
 from django.http import HttpResponseRedirect
-from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import ngettext, ugettext_lazy as _
 
+from .. import metrics
+from ..admin.changelist import KeysetChangeList
 from ..forms.admin import UserChangeForm, UserCreationForm
+from ..pagination import ANCHOR_VAR, KeysetPaginator
+from ..search import get_user_search
+
+
+class _DuplicateEmail(Exception):
+    """Raised by UserAdmin.save_model() when the user's email was taken."""
+
+    def __init__(self, form):
+        """Keep the form, to which the error was added."""
+        super(_DuplicateEmail, self).__init__(form.errors["email"])
+        self.form = form
 
 
 class UserAdmin(_UserAdmin):
@@ -15,6 +31,7 @@ class UserAdmin(_UserAdmin):
     form = UserChangeForm
     add_form = UserCreationForm
     add_form_template = "admin/authentication/user/add_form.html"
+    change_list_template = "admin/authentication/user/change_list.html"
     add_fieldsets = (
         (_("Primary fields"), {
             "fields": (
@@ -58,8 +75,7 @@ class UserAdmin(_UserAdmin):
     list_display = (
         "pk",
         "email",
-        "first_name",
-        "last_name",
+        "display_name",
         "is_active",
         "is_staff",
         "is_superuser",
@@ -85,6 +101,101 @@ class UserAdmin(_UserAdmin):
         "user_permissions",
     )
 
+    def _changeform_view(self, request, object_id, form_url, extra_context):
+        """Redisplay the form if its email was taken while saving.
+
+        The forms don't check for duplicate emails before saving (see
+        UniqueEmailFormMixin), so another request may take the email in the
+        meantime; the bound form is then redisplayed with the error.
+        """
+        try:
+            return super(UserAdmin, self)._changeform_view(
+                request, object_id, form_url, extra_context)
+        except _DuplicateEmail as error:
+            return self.render_invalid_form(
+                request, error.form, object_id, form_url, extra_context)
+
+    def render_invalid_form(self, request, form, object_id, form_url,
+                            extra_context):
+        """Render the add or change page of a bound, invalid form.
+
+        As the end of ModelAdmin.changeform_view() does, for forms found to
+        be invalid as they were saved.
+        """
+        if "_saveasnew" in request.POST:
+            object_id = None
+        add = object_id is None
+        obj = None if add else form.instance
+
+        formsets, inline_instances = self._create_formsets(
+            request, form.instance, change=not add)
+        admin_form = helpers.AdminForm(
+            form,
+            list(self.get_fieldsets(request, obj)),
+            self.get_prepopulated_fields(request, obj),
+            self.get_readonly_fields(request, obj),
+            model_admin=self,
+        )
+        media = self.media + admin_form.media
+        inline_formsets = self.get_inline_formsets(
+            request, formsets, inline_instances, obj)
+        for inline_formset in inline_formsets:
+            media = media + inline_formset.media
+
+        title = _("Add %s") if add else _("Change %s")
+        context = dict(
+            self.admin_site.each_context(request),
+            title=title % self.model._meta.verbose_name,
+            subtitle=str(obj) if obj else None,
+            adminform=admin_form,
+            object_id=object_id,
+            original=obj,
+            is_popup=IS_POPUP_VAR in request.POST or
+            IS_POPUP_VAR in request.GET,
+            to_field=request.POST.get(
+                TO_FIELD_VAR, request.GET.get(TO_FIELD_VAR)),
+            media=media,
+            inline_admin_formsets=inline_formsets,
+            errors=helpers.AdminErrorList(form, formsets),
+            preserved_filters=self.get_preserved_filters(request),
+        )
+        context.update(extra_context or {})
+        return self.render_change_form(
+            request, context, add=add, change=not add, obj=obj,
+            form_url=form_url)
+
+    def save_model(self, request, obj, form, change):
+        """Save the user with a single query (see UniqueEmailFormMixin)."""
+        try:
+            form.save_instance(obj)
+        except IntegrityError as error:
+            if not form.add_duplicate_email_error(error):
+                raise
+            raise _DuplicateEmail(form)
+
+    def get_changelist(self, request, **kwargs):
+        """Return the changelist class, estimating counts on large tables."""
+        return KeysetChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        """Return a paginator seeking to pages, rather than offsetting."""
+        return KeysetPaginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            anchor=request.GET.get(ANCHOR_VAR),
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search with the engine selected by the settings, if any.
+
+        See simple_authentication.search.
+        """
+        search = get_user_search()
+        if search is None or not search_term:
+            return super(UserAdmin, self).get_search_results(
+                request, queryset, search_term)
+        return search.filter(queryset, search_term), False
+
     def hijack(self, request, queryset):
         """Hijack a user's session and log-in as them.
 
@@ -98,9 +209,77 @@ class UserAdmin(_UserAdmin):
         user = queryset[0]
         user.backend = "django.contrib.auth.backends.ModelBackend"
         login(request, user)
+        metrics.increment("admin.hijack")
         return HttpResponseRedirect("/")
     hijack.short_description = _("Log in as selected user")
 
+    def force_password_change(self, request, queryset):
+        """Flag the selected users to change their password.
+
+        Like the other bulk actions below, updates the users with an UPDATE
+        per chunk of users, however many are selected (see
+        UserQuerySet.update_in_chunks()).
+        """
+        count = queryset.force_password_change()
+        self.message_user(request, ngettext(
+            "%(count)d user was flagged to change their password.",
+            "%(count)d users were flagged to change their password.",
+            count) % {"count": count})
+    force_password_change.short_description = _(
+        "Force selected users to change their password")
+
+    def deactivate(self, request, queryset):
+        """Deactivate the selected users, other than the current user."""
+        count = queryset.exclude(pk=request.user.pk).deactivate()
+        self.message_user(request, ngettext(
+            "%(count)d user was deactivated.",
+            "%(count)d users were deactivated.",
+            count) % {"count": count})
+    deactivate.short_description = _("Deactivate selected users")
+
+    def reactivate(self, request, queryset):
+        """Reactivate the selected users."""
+        count = queryset.reactivate()
+        self.message_user(request, ngettext(
+            "%(count)d user was reactivated.",
+            "%(count)d users were reactivated.",
+            count) % {"count": count})
+    reactivate.short_description = _("Reactivate selected users")
+
+    def grant_staff(self, request, queryset):
+        """Give the selected users access to the admin site."""
+        count = queryset.grant_staff()
+        self.message_user(request, ngettext(
+            "%(count)d user was granted staff status.",
+            "%(count)d users were granted staff status.",
+            count) % {"count": count})
+    grant_staff.short_description = _("Grant staff status to selected users")
+
+    def revoke_staff(self, request, queryset):
+        """Revoke the staff status of the selected users, other than yours."""
+        count = queryset.exclude(pk=request.user.pk).revoke_staff()
+        self.message_user(request, ngettext(
+            "%(count)d user's staff status was revoked.",
+            "%(count)d users' staff status was revoked.",
+            count) % {"count": count})
+    revoke_staff.short_description = _(
+        "Revoke staff status of selected users")
+
+    def logout(self, request, queryset):
+        """Log the selected users (other than yourself) out of all sessions."""
+        count = queryset.exclude(pk=request.user.pk).logout()
+        self.message_user(request, ngettext(
+            "%(count)d session was logged out.",
+            "%(count)d sessions were logged out.",
+            count) % {"count": count})
+    logout.short_description = _("Log selected users out of all sessions")
+
     actions = [
-        "hijack"
+        "hijack",
+        "logout",
+        "force_password_change",
+        "deactivate",
+        "reactivate",
+        "grant_staff",
+        "revoke_staff",
     ]
@@ -8,3 +8,15 @@ class SimpleAuthenticationConfig(AppConfig):
 
     name = "simple_authentication"
     verbose_name = "Authentication"
+
+    def ready(self):
+        """Connect the app's signal receivers."""
+        from django.contrib.auth.signals import user_logged_in
+
+        from . import signals
+
+        # Replace django.contrib.auth's receiver, whichever app is ready
+        # first: a receiver is only connected once per dispatch_uid.
+        user_logged_in.disconnect(dispatch_uid="update_last_login")
+        user_logged_in.connect(
+            signals.update_last_login, dispatch_uid="update_last_login")
@@ -0,0 +1,316 @@
+"""Authentication backends for the simple_authentication app."""
+
+import inspect
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import (
+    _clean_credentials, _get_backends, get_user_model,
+)
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+
+from . import cache
+from .emails import canonicalize_email
+from .hashing import amake_password
+from .tokens import load_token
+
+
+class EmailBackend(ModelBackend):
+    """Authenticate users by email address and password.
+
+    The given email is canonicalized once, so the user is found with a
+    single equality lookup on the (unique, indexed) email column, whatever
+    the case of the input.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """Return the user with the given email and password, if any."""
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get(
+                email=canonicalize_email(username))
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            UserModel().set_password(password)
+        else:
+            if user.check_password(password) and \
+                    self.user_can_authenticate(user):
+                return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None,
+                            **kwargs):
+        """Async version of authenticate().
+
+        The user is loaded through the async ORM, and the password hashed on
+        a thread pool (see simple_authentication.hashing), so neither the
+        event loop nor the thread shared by sync_to_async() is blocked.
+        """
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        manager = UserModel._default_manager
+        # Before Django 4.1 there's no QuerySet.aget().
+        get = getattr(manager, "aget", None) or sync_to_async(manager.get)
+        try:
+            user = await get(email=canonicalize_email(username))
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            await amake_password(password)
+        else:
+            if await user.acheck_password(password) and \
+                    self.user_can_authenticate(user):
+                return user
+        return None
+
+
+class PermissionCacheMixin:
+    """Serve a ModelBackend's permission checks from a cached set.
+
+    Each user's permissions (all of them, and those of their groups alone)
+    are stored as sets in the cache, stamped with the user's version and
+    the permissions generation. Both are read along with the sets in a
+    single get_many(), so a permission check costs at most one cache
+    lookup, whether it goes through has_perm() or get_group_permissions()
+    (as the admin's do).
+
+    Changes to a user (or to their groups or permissions) bump the user's
+    version, while changes that may affect any number of users, such as a
+    group's permissions, bump the generation; see
+    simple_authentication.signals.
+
+    Only checks of a single user are cached: listing the users of a group
+    (e.g. filtering the admin's user list by group) still queries the
+    database.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        """Return the user's permissions, from the cache if possible."""
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            self._load_permissions(user_obj)
+        return user_obj._perm_cache
+
+    def get_group_permissions(self, user_obj, obj=None):
+        """Return the permissions of the user's groups, from the cache."""
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_group_perm_cache"):
+            self._load_permissions(user_obj)
+        return user_obj._group_perm_cache
+
+    def _load_permissions(self, user_obj):
+        """Set the user's permission caches, from the cache if possible.
+
+        Like ModelBackend, the permissions are kept on the user, as
+        _perm_cache and _group_perm_cache.
+        """
+        perm_cache = cache.get_cache()
+        if perm_cache is None:
+            self._load_permissions_from_db(user_obj)
+            return
+
+        permissions_key = cache.PERMISSIONS_KEY.format(user_obj.pk)
+        version_key = cache.USER_VERSION_KEY.format(user_obj.pk)
+        values = perm_cache.get_many([
+            permissions_key, version_key, cache.PERMISSIONS_GENERATION_KEY,
+        ])
+        stamp = (
+            values.get(version_key, 0),
+            values.get(cache.PERMISSIONS_GENERATION_KEY, 0),
+        )
+        entry = values.get(permissions_key)
+        if entry is not None and entry[0] == stamp and len(entry) == 3:
+            user_obj._perm_cache = set(entry[1])
+            user_obj._group_perm_cache = set(entry[2])
+            return
+
+        # Stamped with the version and generation read *before* loading, so
+        # that sets built while either changes are ignored once written.
+        self._load_permissions_from_db(user_obj)
+        perm_cache.set(
+            permissions_key,
+            (
+                stamp,
+                frozenset(user_obj._perm_cache),
+                frozenset(user_obj._group_perm_cache),
+            ),
+            timeout=cache.get_timeout(perm_cache),
+        )
+
+    def _load_permissions_from_db(self, user_obj):
+        """Set the user's permission caches from the database."""
+        backend = super(PermissionCacheMixin, self)
+        # Loads the group permissions first, so that get_all_permissions()
+        # finds them in _group_perm_cache rather than calling back into
+        # get_group_permissions() above.
+        user_obj._group_perm_cache = backend.get_group_permissions(user_obj)
+        user_obj._perm_cache = backend.get_all_permissions(user_obj)
+
+
+class CachedPermissionBackend(PermissionCacheMixin, EmailBackend):
+    """EmailBackend serving permission checks from the cache.
+
+    See PermissionCacheMixin, which may also be combined with
+    CachedUserBackend.
+    """
+
+
+class CachedUserBackend(EmailBackend):
+    """EmailBackend serving get_user() from Django's cache framework.
+
+    AuthenticationMiddleware calls get_user() on every request; with this
+    backend, the user is only loaded from the database when their cached
+    copy (see simple_authentication.cache) is missing or stale. Copies are
+    invalidated whenever the user is saved or deleted.
+
+    To protect the database from stampedes, a single request refreshes a
+    copy shortly before it expires, while the others keep using it; and on
+    a miss, requests briefly wait for the request already loading the user.
+    """
+
+    #: Fraction of the timeout after which a copy is refreshed early.
+    refresh_after = 0.9
+    #: Seconds for which a request may hold the lock to load a user.
+    lock_timeout = 5
+    #: Seconds to wait for another request to load a user, on a miss.
+    wait_timeout = 0.05
+    wait_interval = 0.005
+
+    def get_user(self, user_id):
+        """Return the user with the given ID, from the cache if possible."""
+        user_cache = cache.get_cache()
+        if user_cache is None:
+            return super(CachedUserBackend, self).get_user(user_id)
+
+        user_key = cache.USER_KEY.format(user_id)
+        version_key = cache.USER_VERSION_KEY.format(user_id)
+        lock_key = cache.USER_LOCK_KEY.format(user_id)
+
+        entry, version = self._get_entry(user_cache, user_key, version_key)
+        if entry is not None:
+            refresh_at, user = entry
+            if refresh_at is None or time.time() < refresh_at or \
+                    not user_cache.add(lock_key, True, self.lock_timeout):
+                return self._authenticatable(user)
+        elif not user_cache.add(lock_key, True, self.lock_timeout):
+            deadline = time.time() + self.wait_timeout
+            while time.time() < deadline:
+                time.sleep(self.wait_interval)
+                entry, version = self._get_entry(
+                    user_cache, user_key, version_key)
+                if entry is not None:
+                    return self._authenticatable(entry[1])
+            # The other request is taking too long: load the user anyway,
+            # but leave caching it to the request holding the lock.
+            return self._authenticatable(self._load_user(user_id))
+
+        try:
+            user = self._load_user(user_id)
+            if user is not None:
+                timeout = cache.get_timeout(user_cache)
+                refresh_at = None
+                if timeout is not None:
+                    refresh_at = time.time() + timeout * self.refresh_after
+                user_cache.set(
+                    user_key, (version, refresh_at, user), timeout=timeout)
+        finally:
+            user_cache.delete(lock_key)
+
+        return self._authenticatable(user)
+
+    @staticmethod
+    def _get_entry(user_cache, user_key, version_key):
+        """Return the current (refresh_at, user) entry and user version.
+
+        The entry is None on a miss, or if it was written for an earlier
+        version of the user.
+        """
+        values = user_cache.get_many([user_key, version_key])
+        version = values.get(version_key, 0)
+        entry = values.get(user_key)
+        if entry is None or entry[0] != version:
+            return None, version
+        return entry[1:], version
+
+    @staticmethod
+    def _load_user(user_id):
+        """Load the user from the database, or return None."""
+        UserModel = get_user_model()
+        try:
+            return UserModel._default_manager.get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+
+    def _authenticatable(self, user):
+        """Return the user, or None if they may not authenticate."""
+        if user is not None and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+class TokenBackend(ModelBackend):
+    """Authenticate requests by a signed token (see tokens.py).
+
+    authenticate() returns a TokenUser, read from the token itself rather
+    than loaded from the database. Used by TokenAuthenticationMiddleware,
+    so it needn't be listed in AUTHENTICATION_BACKENDS.
+    """
+
+    def authenticate(self, request, token=None, **kwargs):
+        """Return the user of the token, if valid."""
+        if token is None:
+            return None
+        return load_token(token)
+
+
+async def aauthenticate(request=None, **credentials):
+    """Async version of django.contrib.auth.authenticate().
+
+    Backends with an aauthenticate() method (such as EmailBackend, which
+    hashes on a thread pool rather than the event loop) are awaited; the
+    others are run on a thread, with sync_to_async().
+    """
+    for backend, backend_path in _get_backends(return_tuples=True):
+        try:
+            inspect.signature(backend.authenticate).bind(
+                request, **credentials)
+        except TypeError:
+            # This backend doesn't accept these credentials as arguments.
+            continue
+
+        authenticate = getattr(backend, "aauthenticate", None)
+        if authenticate is None:
+            authenticate = sync_to_async(backend.authenticate)
+        try:
+            user = await authenticate(request, **credentials)
+        except PermissionDenied:
+            # This backend says to stop in our tracks - this user should
+            # not be allowed in at all.
+            break
+        if user is None:
+            continue
+        # Annotate the user object with the path of the backend.
+        user.backend = backend_path
+        return user
+
+    # The credentials supplied are invalid to all backends, fire signal (as
+    # sent by authenticate(), for receivers filtering on the sender).
+    await sync_to_async(user_login_failed.send)(
+        sender="django.contrib.auth",
+        credentials=_clean_credentials(credentials),
+        request=request,
+    )
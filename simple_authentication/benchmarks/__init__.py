@@ -0,0 +1,53 @@
+"""Micro-benchmarks for the simple_authentication app.
+
+Each module exposes a ``run()`` function returning a mapping of benchmark
+names to either the mean time (in seconds) taken per operation, or a
+Measurement in some other unit. Run them all with
+``python -m simple_authentication.run_benchmarks``.
+"""
+
+from collections import namedtuple
+
+Measurement = namedtuple("Measurement", ["value", "unit"])
+
+FIRST_NAMES = (
+    "Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi",
+    "Ivan", "Judy", "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil",
+)
+LAST_NAMES = (
+    "Smith", "Jones", "Taylor", "Brown", "Williams", "Wilson", "Johnson",
+    "Davies", "Robinson", "Wright", "Thompson", "Evans", "Walker", "White",
+)
+
+
+def create_users(count, batch_size=5000, start=0):
+    """Create a synthetic table of users, without hashing any passwords.
+
+    Returns the number of users created; their emails all end in
+    "@benchmark.example.com". Tables are grown by passing the number of
+    users already created as the start.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    User = get_user_model()
+    password = make_password(None)
+    for first in range(start, count, batch_size):
+        User.objects.bulk_create([
+            User(
+                email="user-{}@benchmark.example.com".format(i),
+                first_name=FIRST_NAMES[i % len(FIRST_NAMES)],
+                last_name=LAST_NAMES[i % len(LAST_NAMES)],
+                password=password,
+            )
+            for i in range(first, min(first + batch_size, count))
+        ])
+    return max(count - start, 0)
+
+
+def delete_users():
+    """Delete the users created by create_users()."""
+    from django.contrib.auth import get_user_model
+
+    get_user_model().objects.filter(
+        email__endswith="@benchmark.example.com").delete()
@@ -0,0 +1,67 @@
+"""Benchmarks for simple_authentication.admin."""
+
+import time
+
+from django.contrib.admin import site as admin_site
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+from . import create_users, delete_users
+
+URL = "/admin/simple_authentication/user/"
+
+# The changelist pages requested at each table size. The tenth page is
+# clamped to the last one on tables too small to have ten (see _get_data()).
+REQUESTS = (
+    ("changelist", {}),
+    ("changelist_page_10", {"p": 9}),
+    ("search_email", {"q": "user-1234@benchmark.example.com"}),
+    ("search_name", {"q": "wright"}),
+)
+
+
+def _get_data(data):
+    """Return the request's data, with its page clamped to the last one."""
+    if "p" not in data:
+        return data
+    User = get_user_model()
+    per_page = admin_site._registry[User].list_per_page
+    last_page = max(User.objects.count() - 1, 0) // per_page
+    return dict(data, p=str(min(data["p"], last_page)))
+
+
+def _time_request(client, data, number):
+    """Return the mean time taken to render the changelist."""
+    client.get(URL, data)  # Warm up any caches.
+    start = time.perf_counter()
+    for _ in range(number):
+        response = client.get(URL, data)
+        assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - start) / number
+
+
+def run(user_counts=(10000, 100000, 1000000), number=5):
+    """Time rendering and searching the user changelist as the table grows.
+
+    The search is that of the configured search engine (see
+    simple_authentication.search), i.e. the admin's default one unless
+    SIMPLE_AUTHENTICATION_USER_SEARCH is set.
+    """
+    admin, _ = get_user_model().objects.get_or_create(
+        email="benchmark-admin@example.com",
+        defaults={"is_staff": True, "is_superuser": True},
+    )
+    client = Client()
+    client.force_login(admin)
+
+    results = {}
+    created = 0
+    for count in sorted(user_counts):
+        created += create_users(count, start=created)
+        for name, data in REQUESTS:
+            key = "admin.{}_{}_users".format(name, count)
+            results[key] = _time_request(client, _get_data(data), number)
+
+    delete_users()
+    admin.delete()
+    return results
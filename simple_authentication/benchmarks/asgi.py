@@ -0,0 +1,114 @@
+"""Benchmarks for serving requests under ASGI."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from django.conf.urls import url
+from django.contrib import admin
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import override_settings
+
+
+async def ping(request):
+    """Return an empty response, without touching the database."""
+    return HttpResponse()
+
+
+# URLconf used by the benchmark: an async view and the admin site.
+urlpatterns = [
+    url(regex=r"^admin/", view=admin.site.urls),
+    url(regex=r"^ping/$", view=ping),
+]
+
+
+class FlaggedUserMiddleware:
+    """Attach a (fake) user flagged to change their password."""
+
+    sync_capable = False
+    async_capable = True
+
+    user = SimpleNamespace(
+        pk=1, is_authenticated=True, force_password_change=True)
+
+    def __init__(self, get_response):
+        """Store the next handler in the chain."""
+        self.get_response = get_response
+
+    async def __call__(self, request):
+        """Attach the user and continue down the chain."""
+        async def auser():
+            return self.user
+
+        request.user = self.user
+        request.auser = auser
+        return await self.get_response(request)
+
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/ping/",
+    "raw_path": b"/ping/",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [(b"host", b"testserver")],
+    "client": ("127.0.0.1", 0),
+    "server": ("testserver", 80),
+}
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+async def _serve(handler, number, concurrency):
+    """Serve the given number of requests, concurrency at a time."""
+    async def worker(count):
+        for _ in range(count):
+            await handler(dict(SCOPE), _receive, _send)
+
+    await asyncio.gather(*(
+        worker(number // concurrency) for _ in range(concurrency)))
+
+
+def run(number=2000, concurrency=20):
+    """Compare sync-only and async-capable middleware under ASGI."""
+    middlewares = (
+        ("before", "simple_authentication.benchmarks.middleware."
+                   "LegacyForcePasswordChangeMiddleware"),
+        ("after", "simple_authentication.middleware."
+                  "ForcePasswordChangeMiddleware"),
+    )
+    results = {}
+
+    for name, middleware in middlewares:
+        with override_settings(
+            ROOT_URLCONF=__name__,
+            MIDDLEWARE=[
+                "simple_authentication.benchmarks.asgi.FlaggedUserMiddleware",
+                middleware,
+            ],
+        ):
+            handler = ASGIHandler()
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(_serve(handler, 100, concurrency))
+
+                start = time.perf_counter()
+                loop.run_until_complete(_serve(handler, number, concurrency))
+                elapsed = time.perf_counter() - start
+            finally:
+                loop.close()
+
+        results["asgi.request.{}".format(name)] = elapsed / number
+
+    return results
@@ -0,0 +1,116 @@
+"""Benchmarks for simple_authentication.backends."""
+
+import copy
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+
+from . import Measurement
+from ..backends import CachedPermissionBackend
+
+
+def _queries_per_request(client, path, number):
+    """Return the mean number of queries run per request to the path."""
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    client.get(path)  # Warm up any caches.
+    with connection.execute_wrapper(count):
+        for _ in range(number):
+            client.get(path)
+    return len(queries) / number
+
+
+def _time_permission_checks(backend, user, perms, number):
+    """Return the mean time and queries taken per request's checks.
+
+    Each "request" checks the permissions against a fresh copy of the user,
+    as a ModelBackend's per-instance cache doesn't outlive a request.
+    """
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    backend.has_perm(copy.copy(user), perms[0])  # Warm up any caches.
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for _ in range(number):
+            request_user = copy.copy(user)
+            for perm in perms:
+                backend.has_perm(request_user, perm)
+        elapsed = time.perf_counter() - start
+    return elapsed / number, len(queries) / number
+
+
+def _permission_results(number):
+    """Compare the permission checks of each backend."""
+    user = get_user_model().objects.create(
+        email="benchmark-permissions@example.com", is_staff=True)
+    group = Group.objects.create(name="benchmark-permissions")
+    permissions = Permission.objects.filter(
+        content_type__app_label="simple_authentication")
+    group.permissions.set(permissions)
+    user.groups.add(group)
+    perms = [
+        "simple_authentication.{}".format(permission.codename)
+        for permission in permissions
+    ]
+    user = get_user_model().objects.get(pk=user.pk)
+
+    results = {}
+    with override_settings(SIMPLE_AUTHENTICATION_CACHE="default"):
+        cache.clear()
+        for name, backend in (("model", ModelBackend()),
+                              ("cached", CachedPermissionBackend())):
+            elapsed, queries = _time_permission_checks(
+                backend, user, perms, number)
+            results["backends.{}.permission_checks".format(name)] = elapsed
+            results["backends.{}.permission_queries".format(name)] = \
+                Measurement(queries, "queries")
+
+    user.delete()
+    group.delete()
+    return results
+
+
+def run(number=100):
+    """Compare the queries run per admin request, and permission checks.
+
+    Each backend's permission checks are those of a request checking every
+    permission of the app, granted through a group.
+    """
+    user, _ = get_user_model().objects.get_or_create(
+        email="benchmark-staff@example.com",
+        defaults={"is_staff": True},
+    )
+    backends = (
+        ("model", "django.contrib.auth.backends.ModelBackend", None),
+        ("cached", "simple_authentication.backends.CachedUserBackend",
+         "default"),
+    )
+    results = {}
+
+    for name, backend, cache_alias in backends:
+        with override_settings(AUTHENTICATION_BACKENDS=[backend],
+                               SIMPLE_AUTHENTICATION_CACHE=cache_alias):
+            cache.clear()
+            client = Client()
+            client.force_login(user)
+
+            results["backends.{}.queries_per_request".format(name)] = \
+                Measurement(_queries_per_request(
+                    client, "/admin/password_change/", number), "queries")
+
+    user.delete()
+    results.update(_permission_results(number))
+    return results
@@ -0,0 +1,46 @@
+"""Benchmarks for logging in through simple_authentication.forms."""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory
+
+from ..forms import AuthenticationForm
+
+EMAIL = "login@benchmark.example.com"
+PASSWORD = "benchmark-password"
+
+
+def _time_login(data, number):
+    """Return the mean time taken to validate the login form's data."""
+    factory = RequestFactory()
+    start = time.perf_counter()
+    for _ in range(number):
+        request = factory.post("/admin/login/")
+        request.session = SessionStore()
+        AuthenticationForm(request, data=data).is_valid()
+    return (time.perf_counter() - start) / number
+
+
+def run(number=10):
+    """Time successful and failed logins through the AuthenticationForm.
+
+    Both are dominated by the password hasher: unknown emails are hashed
+    too, so as not to reveal which emails have an account.
+    """
+    user = get_user_model().objects.create_user(
+        email=EMAIL, password=PASSWORD)
+    results = {}
+    for name, data in (
+        ("valid", {"username": EMAIL, "password": PASSWORD}),
+        ("wrong_password", {"username": EMAIL, "password": "wrong"}),
+        ("unknown_email", {
+            "username": "unknown@benchmark.example.com",
+            "password": PASSWORD,
+        }),
+    ):
+        results["forms.login.{}".format(name)] = _time_login(data, number)
+
+    user.delete()
+    return results
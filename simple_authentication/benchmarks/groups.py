@@ -0,0 +1,83 @@
+"""Benchmarks for the Group model and cached group memberships."""
+
+import copy
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+
+from . import Measurement
+from ..models import Group
+
+GROUPS = 20
+
+
+def _time_group_writes(number):
+    """Return the mean time taken to create, then fetch, a group."""
+    start = time.perf_counter()
+    for i in range(number):
+        Group.objects.create(name="benchmark-group-{}".format(i))
+    created = (time.perf_counter() - start) / number
+
+    start = time.perf_counter()
+    for i in range(number):
+        Group.objects.get(name="benchmark-group-{}".format(i))
+    fetched = (time.perf_counter() - start) / number
+
+    Group.objects.filter(name__startswith="benchmark-group-").delete()
+    return created, fetched
+
+
+def _time_membership_checks(check, user, number):
+    """Return the mean time and queries taken per request's group check.
+
+    Each "request" checks a fresh copy of the user, as the instance keeps
+    the groups it has loaded.
+    """
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    check(copy.copy(user))  # Warm up any caches.
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for _ in range(number):
+            assert check(copy.copy(user))
+        elapsed = time.perf_counter() - start
+    return elapsed / number, len(queries) / number
+
+
+def run(number=500):
+    """Time writing groups, and checking a member of many groups."""
+    results = {}
+    results["groups.create"], results["groups.get"] = \
+        _time_group_writes(number)
+
+    user = get_user_model().objects.create(
+        email="benchmark-groups@example.com")
+    groups = [
+        Group.objects.create(name="benchmark-member-{}".format(i))
+        for i in range(GROUPS)
+    ]
+    user.groups.set(groups)
+    name = groups[-1].name
+
+    checks = (
+        ("query", lambda user: user.groups.filter(name=name).exists()),
+        ("cached", lambda user: user.in_group(name)),
+    )
+    with override_settings(SIMPLE_AUTHENTICATION_CACHE="default"):
+        cache.clear()
+        for check_name, check in checks:
+            elapsed, queries = _time_membership_checks(check, user, number)
+            results["groups.{}.in_group".format(check_name)] = elapsed
+            results["groups.{}.in_group_queries".format(check_name)] = \
+                Measurement(queries, "queries")
+
+    user.delete()
+    Group.objects.filter(name__startswith="benchmark-member-").delete()
+    return results
@@ -0,0 +1,36 @@
+"""Benchmarks for simple_authentication.hashing."""
+
+import os
+import time
+
+from ..hashing import PasswordHashingEngine
+
+
+def _worker_counts():
+    """Return the worker counts to benchmark: powers of two up to all CPUs."""
+    cpus = os.cpu_count() or 1
+    counts = []
+    workers = 1
+    while workers < cpus:
+        counts.append(workers)
+        workers *= 2
+    counts.append(cpus)
+    return counts
+
+
+def run(number=64, chunk_size=4):
+    """Time hashing a batch of passwords with an increasing worker count."""
+    passwords = ["password-{}".format(i) for i in range(number)]
+    results = {}
+
+    for workers in _worker_counts():
+        with PasswordHashingEngine(workers, chunk_size) as engine:
+            engine.hash_passwords(passwords[:chunk_size * workers + 1])
+
+            start = time.perf_counter()
+            engine.hash_passwords(passwords)
+            elapsed = time.perf_counter() - start
+
+        results["hashing.workers_{}".format(workers)] = elapsed / number
+
+    return results
@@ -0,0 +1,60 @@
+"""Benchmarks for simple_authentication.last_login, under a login storm."""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+
+from . import Measurement
+from .. import last_login
+from ..signals import update_last_login
+
+
+def _time_logins(users, logins):
+    """Return the mean time and queries taken per login's update.
+
+    Any buffered times are flushed before the clock stops.
+    """
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    User = get_user_model()
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for i in range(logins):
+            update_last_login(User, users[i % len(users)])
+        buffer = last_login.get_buffer()
+        if buffer is not None:
+            buffer.flush()
+        elapsed = time.perf_counter() - start
+    return elapsed / logins, len(queries) / logins
+
+
+def run(users=1000, logins=5000):
+    """Compare saving last_login per login with buffering the updates."""
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(email="last-login-{}@benchmark.example.com".format(i))
+        for i in range(users)
+    ])
+    users = list(User.objects.filter(email__startswith="last-login-"))
+    modes = (
+        ("immediate", None),
+        ("buffered", 3600),
+    )
+    results = {}
+
+    for name, interval in modes:
+        with override_settings(
+                SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_INTERVAL=interval):
+            elapsed, queries = _time_logins(users, logins)
+        results["last_login.{}.login".format(name)] = elapsed
+        results["last_login.{}.queries_per_login".format(name)] = \
+            Measurement(queries, "queries")
+
+    User.objects.filter(email__startswith="last-login-").delete()
+    return results
@@ -0,0 +1,89 @@
+"""Benchmarks for concurrent logins on an event loop."""
+
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import authenticate, get_user_model
+from django.test import override_settings
+
+from . import Measurement
+from ..backends import aauthenticate
+
+EMAIL = "logins@benchmark.example.com"
+PASSWORD = "benchmark-password"
+
+# How often the probe runs a query through sync_to_async() (in seconds).
+PROBE_INTERVAL = 0.01
+
+
+async def _serve(login, logins, concurrency):
+    """Run the logins, concurrency at a time, alongside a probe.
+
+    The probe stands in for the other (sync) views served meanwhile: it
+    runs a query on the thread shared by sync_to_async() every
+    PROBE_INTERVAL, until the logins are done.
+
+    :return: the time taken per login, and the probe's mean latency
+    """
+    User = get_user_model()
+    exists = sync_to_async(User.objects.filter(email=EMAIL).exists)
+    latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await exists()
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    async def worker(count):
+        for _ in range(count):
+            user = await login(username=EMAIL, password=PASSWORD)
+            assert user is not None
+
+    probe_task = asyncio.ensure_future(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(logins // concurrency) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    return elapsed / logins, sum(latencies) / len(latencies)
+
+
+def run(logins=32, concurrency=16):
+    """Compare sync authenticate() on a thread with aauthenticate().
+
+    With sync_to_async(), every login hashes on the single thread shared by
+    all sync_to_async() calls, so other views queue behind the hashing;
+    aauthenticate() hashes on its own bounded thread pool instead. The time
+    per login gives the logins per second the event loop sustains.
+    """
+    user = get_user_model().objects.create_user(
+        email=EMAIL, password=PASSWORD)
+    modes = (
+        ("sync_to_async", sync_to_async(authenticate)),
+        ("aauthenticate", aauthenticate),
+    )
+    results = {}
+
+    with override_settings(AUTHENTICATION_BACKENDS=[
+        "simple_authentication.backends.EmailBackend",
+    ]):
+        for name, login in modes:
+            loop = asyncio.new_event_loop()
+            try:
+                per_login, latency = loop.run_until_complete(
+                    _serve(login, logins, concurrency))
+            finally:
+                loop.close()
+
+            results["logins.concurrent.{}".format(name)] = per_login
+            results["logins.concurrent.{}.query_latency".format(name)] = \
+                Measurement(latency * 1e3, "ms")
+
+    user.delete()
+    return results
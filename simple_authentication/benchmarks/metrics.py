@@ -0,0 +1,25 @@
+"""Benchmarks for simple_authentication.metrics."""
+
+import timeit
+
+from django.test import override_settings
+
+from .. import metrics
+
+
+def _time_per_call(func, number):
+    """Return the mean time taken by a call to the function."""
+    return timeit.timeit(func, number=number) / number
+
+
+def run(number=100000):
+    """Time recording metrics with no sink, and with the in-memory sink."""
+    def record():
+        metrics.increment("benchmark.counter")
+        with metrics.Timer("benchmark.timer"):
+            pass
+
+    results = {"metrics.disabled": _time_per_call(record, number)}
+    with override_settings(SIMPLE_AUTHENTICATION_METRICS="memory"):
+        results["metrics.memory"] = _time_per_call(record, number)
+    return results
@@ -0,0 +1,61 @@
+"""Benchmarks for simple_authentication.middleware."""
+
+import re
+import timeit
+from types import SimpleNamespace
+
+from django.http import HttpResponse, HttpResponseRedirect
+from django.test import RequestFactory
+from django.urls import resolve, reverse_lazy
+
+from ..middleware import ForcePasswordChangeMiddleware
+
+
+class LegacyForcePasswordChangeMiddleware(ForcePasswordChangeMiddleware):
+    """The original middleware, resolving routes on every request."""
+
+    async_capable = False
+
+    def __call__(self, request):
+        """Resolve the path and change URL from scratch."""
+        user = request.user
+        if user.is_authenticated and user.force_password_change:
+            path = request.path
+            change_url = reverse_lazy(viewname="admin:password_change")
+
+            is_admin_url = getattr(resolve(path), "app_name") == "admin"
+            is_change_url = re.match(r"^{}?".format(change_url), path)
+
+            if is_admin_url and not is_change_url:
+                return HttpResponseRedirect(redirect_to=change_url)
+
+        response = self.get_response(request)
+        return response
+
+
+def _time_per_request(middleware, request, number):
+    """Return the mean time taken for the middleware to handle a request."""
+    return timeit.timeit(lambda: middleware(request), number=number) / number
+
+
+def run(number=10000):
+    """Compare the legacy and current middleware for a flagged user."""
+    user = SimpleNamespace(
+        pk=1, is_authenticated=True, force_password_change=True)
+    factory = RequestFactory()
+    results = {}
+
+    for label, path in (("redirect", "/admin/auth/group/"),
+                        ("change_url", "/admin/password_change/")):
+        request = factory.get(path)
+        request.user = user
+
+        for name, cls in (("before", LegacyForcePasswordChangeMiddleware),
+                          ("after", ForcePasswordChangeMiddleware)):
+            middleware = cls(lambda r: HttpResponse())
+            middleware(request)  # Warm up any caches.
+
+            key = "middleware.{}.{}".format(label, name)
+            results[key] = _time_per_request(middleware, request, number)
+
+    return results
@@ -0,0 +1,47 @@
+"""Benchmarks for simple_authentication.pagination."""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+
+from . import create_users, delete_users
+from ..pagination import KeysetPaginator
+
+
+def _time_page(paginator_class, queryset, count, number, repeat, **kwargs):
+    """Return the mean time taken to read the given page."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        paginator = paginator_class(queryset, 10, **kwargs)
+        # Counting is left out, to time reading the page alone.
+        paginator.count = count
+        list(paginator.page(number))
+    return (time.perf_counter() - start) / repeat
+
+
+def run(users=200000, repeat=20):
+    """Time reading page 1 and page 10,000 with OFFSET and keyset paging.
+
+    With 10 users per page, page 10,000 is half-way through the table; the
+    keyset paginator reaches it from the anchor of page 9,999, as when
+    following the changelist's "next page" link.
+    """
+    create_users(users)
+    queryset = get_user_model().objects.order_by("email")
+    count = queryset.count()
+
+    paginator = KeysetPaginator(queryset, 10)
+    paginator.count = count
+    paginator.page(9999)
+    anchor = paginator.last_anchor
+
+    results = {}
+    for number in (1, 10000):
+        results["pagination.offset.page_{}".format(number)] = _time_page(
+            Paginator, queryset, count, number, repeat)
+        results["pagination.keyset.page_{}".format(number)] = _time_page(
+            KeysetPaginator, queryset, count, number, repeat, anchor=anchor)
+
+    delete_users()
+    return results
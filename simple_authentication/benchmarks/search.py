@@ -0,0 +1,46 @@
+"""Benchmarks for simple_authentication.search."""
+
+import time
+
+from django.contrib.auth import get_user_model
+
+from . import create_users, delete_users
+from ..models import UserSearchToken
+from ..search import ContainsSearch, PrefixSearch, TokenSearch
+
+TERMS = (
+    "user-12345@benchmark.example.com",
+    "wright",
+    "mallo",
+    "12345",
+)
+
+
+def run(users=20000, number=20):
+    """Time searching a large table of users with each search engine."""
+    create_users(users)
+    User = get_user_model()
+    token_search = TokenSearch()
+    token_search.rebuild_index(User.objects.all(), chunk_size=2000)
+
+    results = {}
+    for name, search in (
+        ("contains", ContainsSearch()),
+        ("prefix", PrefixSearch()),
+        ("tokens", token_search),
+    ):
+        start = time.perf_counter()
+        for _ in range(number):
+            for term in TERMS:
+                # The changelist counts the results, and fetches a page.
+                queryset = search.filter(User.objects.all(), term)
+                queryset.count()
+                list(queryset.order_by("email")[:100])
+        elapsed = time.perf_counter() - start
+
+        results["search.{}_{}_users".format(name, users)] = \
+            elapsed / (number * len(TERMS))
+
+    UserSearchToken.objects.all().delete()
+    delete_users()
+    return results
@@ -0,0 +1,67 @@
+"""Benchmarks for simple_authentication.sessions."""
+
+import time
+
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+from django.utils.timezone import timedelta
+
+from . import create_users, delete_users
+from ..models import UserSession
+
+
+def _create_sessions(users, number, batch_size=5000):
+    """Create the given number of sessions, spread over the users."""
+    store = SessionStore()
+    expire_date = timezone.now() + timedelta(days=1)
+    for start in range(0, number, batch_size):
+        sessions = []
+        index = []
+        for i in range(start, min(start + batch_size, number)):
+            user_id = users[i % len(users)]
+            session_key = "benchmark{:031d}".format(i)
+            sessions.append(Session(
+                session_key=session_key,
+                session_data=store.encode({SESSION_KEY: str(user_id)}),
+                expire_date=expire_date,
+            ))
+            index.append(UserSession(user_id=user_id, session_key=session_key))
+        Session.objects.bulk_create(sessions)
+        UserSession.objects.bulk_create(index)
+
+
+def _logout_by_decoding(user_ids):
+    """Delete the users' sessions by decoding every session, as before."""
+    user_ids = {str(user_id) for user_id in user_ids}
+    session_keys = [
+        session.session_key
+        for session in Session.objects.iterator()
+        if session.get_decoded().get(SESSION_KEY) in user_ids
+    ]
+    Session.objects.filter(session_key__in=session_keys).delete()
+
+
+def run(users=10000, sessions=100000, number=10):
+    """Time logging a few users out, among many users and sessions."""
+    create_users(users)
+    User = get_user_model()
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+    _create_sessions(user_ids, sessions)
+
+    start = time.perf_counter()
+    _logout_by_decoding(user_ids[:number])
+    decoding = time.perf_counter() - start
+
+    start = time.perf_counter()
+    User.objects.filter(pk__in=user_ids[number:number * 2]).logout()
+    indexed = time.perf_counter() - start
+
+    Session.objects.all().delete()
+    UserSession.objects.all().delete()
+    delete_users()
+    return {
+        "sessions.logout_{}_sessions.decoding".format(sessions): decoding,
+        "sessions.logout_{}_sessions.indexed".format(sessions): indexed,
+    }
@@ -0,0 +1,68 @@
+"""Load test of simple_authentication.throttling under credential stuffing."""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+
+from ..forms import AuthenticationForm
+
+EMAIL = "throttling@benchmark.example.com"
+PASSWORD = "benchmark-password"
+
+RATES = {
+    "email": (5, 300),
+    "ip": (10, 60),
+}
+
+
+def _run_pattern(logins, attacks_per_login):
+    """Return the mean time taken per genuine login, amid the attack.
+
+    Before each genuine login (each from its own IP address), an attacker
+    tries attacks_per_login credentials of other emails, all from a single
+    IP address.
+    """
+    factory = RequestFactory()
+    attempt = 0
+    start = time.perf_counter()
+    for login in range(logins):
+        for _ in range(attacks_per_login):
+            attempt += 1
+            AuthenticationForm(
+                factory.post("/", REMOTE_ADDR="203.0.113.1"),
+                data={
+                    "username": "victim-{}@example.com".format(attempt),
+                    "password": "guess-{}".format(attempt),
+                },
+            ).is_valid()
+
+        form = AuthenticationForm(
+            factory.post("/", REMOTE_ADDR="198.51.100.{}".format(login)),
+            data={"username": EMAIL, "password": PASSWORD},
+        )
+        assert form.is_valid(), form.errors
+    return (time.perf_counter() - start) / logins
+
+
+def run(logins=20, attacks_per_login=10):
+    """Time genuine logins with no attack, and under attack.
+
+    Without throttling, every attempt of the attack costs a password hash,
+    so genuine logins slow down in proportion to the attack; with it, only
+    the first attempts do, until the attacker's IP address is throttled.
+    """
+    user = get_user_model().objects.create_user(
+        email=EMAIL, password=PASSWORD)
+    results = {"throttling.login.no_attack": _run_pattern(logins, 0)}
+
+    for name, rates in (("unthrottled", None), ("throttled", RATES)):
+        with override_settings(
+                SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_RATES=rates):
+            cache.clear()
+            results["throttling.login.attack_{}".format(name)] = \
+                _run_pattern(logins, attacks_per_login)
+
+    user.delete()
+    return results
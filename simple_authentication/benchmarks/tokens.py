@@ -0,0 +1,78 @@
+"""Benchmarks for authenticating requests by session or signed token."""
+
+import time
+
+from django.conf.urls import url
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, override_settings
+
+from . import Measurement
+from ..tokens import create_token
+
+
+def whoami(request):
+    """Return the ID (and staff status) of the request's user."""
+    user = request.user
+    return HttpResponse("{} {}".format(user.pk, user.is_staff))
+
+
+# URLconf used by the benchmark: a view only reading the user.
+urlpatterns = [
+    url(regex=r"^whoami/$", view=whoami),
+]
+
+MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "simple_authentication.middleware.TokenAuthenticationMiddleware",
+]
+
+
+def _time_requests(client, number, **headers):
+    """Return the mean time and queries taken per request to the view."""
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    client.get("/whoami/", **headers)  # Warm up any caches.
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        for _ in range(number):
+            client.get("/whoami/", **headers)
+        elapsed = time.perf_counter() - start
+    return elapsed / number, len(queries) / number
+
+
+def run(number=1000):
+    """Compare requests authenticated by a session, and by a token."""
+    user = get_user_model().objects.create(
+        email="benchmark-tokens@example.com", is_staff=True)
+    results = {}
+
+    with override_settings(ROOT_URLCONF=__name__, MIDDLEWARE=MIDDLEWARE,
+                           SIMPLE_AUTHENTICATION_CACHE="default"):
+        cache.clear()
+        user.save()  # Cache the user's token version.
+
+        session_client = Client()
+        session_client.force_login(user)
+        token = create_token(user)
+        requests = (
+            ("session", session_client, {}),
+            ("token", Client(), {
+                "HTTP_AUTHORIZATION": "Bearer {}".format(token),
+            }),
+        )
+        for name, client, headers in requests:
+            elapsed, queries = _time_requests(client, number, **headers)
+            results["tokens.{}.request".format(name)] = elapsed
+            results["tokens.{}.queries_per_request".format(name)] = \
+                Measurement(queries, "queries")
+
+    user.delete()
+    return results
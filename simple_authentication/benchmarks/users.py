@@ -0,0 +1,88 @@
+"""Benchmarks for creating and updating users with UserManager."""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from . import create_users, delete_users
+
+
+def _time_create_user(number, password):
+    """Return the mean time taken by create_user(), with the password."""
+    User = get_user_model()
+    start = time.perf_counter()
+    for i in range(number):
+        User.objects.create_user(
+            email="create-{}@benchmark.example.com".format(i),
+            password=password,
+        )
+    elapsed = time.perf_counter() - start
+    delete_users()
+    return elapsed / number
+
+
+def _time_bulk_create_users(number, batch_size):
+    """Return the mean time taken per user by bulk_create_users().
+
+    The rows carry already-hashed passwords, so that the time is that of
+    validating and inserting the users (see the hashing benchmarks for the
+    time taken to hash their passwords).
+    """
+    password_hash = make_password("password")
+    rows = [
+        {
+            "email": "bulk-{}@benchmark.example.com".format(i),
+            "password_hash": password_hash,
+        }
+        for i in range(number)
+    ]
+    start = time.perf_counter()
+    get_user_model().objects.bulk_create_users(rows, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    delete_users()
+    return elapsed / number
+
+
+def _time_force_password_change(number, save_number):
+    """Return the mean time taken per user to flag users, in bulk and not.
+
+    Flagging users by saving each of them is only timed for the first
+    save_number users.
+    """
+    create_users(number)
+    users = get_user_model().objects.filter(
+        email__endswith="@benchmark.example.com")
+
+    start = time.perf_counter()
+    for user in users.order_by("pk")[:save_number]:
+        user.force_password_change = True
+        user.save(update_fields=["force_password_change"])
+    per_save = (time.perf_counter() - start) / save_number
+    users.update(force_password_change=False)
+
+    start = time.perf_counter()
+    users.force_password_change()
+    per_update = (time.perf_counter() - start) / number
+
+    delete_users()
+    return per_save, per_update
+
+
+def run(number=10, bulk_number=10000, batch_size=1000):
+    """Time creating users one at a time, and in bulk, and flagging them.
+
+    create_user() is timed with a password (hashed with the configured
+    hasher, which dominates) and without one.
+    """
+    per_save, per_update = _time_force_password_change(
+        bulk_number * 5, bulk_number // 10)
+    return {
+        "users.create_user": _time_create_user(number, "password"),
+        "users.create_user_without_password": _time_create_user(
+            number * 100, None),
+        "users.bulk_create_users": _time_bulk_create_users(
+            bulk_number, batch_size),
+        "users.force_password_change.save": per_save,
+        "users.force_password_change.bulk": per_update,
+    }
@@ -0,0 +1,175 @@
+"""Caching of per-user state, to avoid loading users on every request.
+
+Caching is opt-in: set ``SIMPLE_AUTHENTICATION_CACHE`` to the alias of the
+cache (in ``CACHES``) to use. It must be shared between all processes
+serving the site, so the default local-memory cache is not suitable.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+FORCE_PASSWORD_CHANGE_KEY = "simple_authentication:force_password_change:{}"
+USER_KEY = "simple_authentication:user:{}"
+USER_VERSION_KEY = "simple_authentication:user_version:{}"
+USER_LOCK_KEY = "simple_authentication:user_lock:{}"
+PERMISSIONS_KEY = "simple_authentication:permissions:{}"
+GROUPS_KEY = "simple_authentication:groups:{}"
+TOKEN_VERSION_KEY = "simple_authentication:token_version:{}"
+PERMISSIONS_GENERATION_KEY = "simple_authentication:permissions_generation"
+
+
+def get_cache():
+    """Return the cache used by the app, or None if caching is disabled."""
+    alias = getattr(settings, "SIMPLE_AUTHENTICATION_CACHE", None)
+    if alias is None:
+        return None
+    return caches[alias]
+
+
+def get_timeout(cache=None):
+    """Return the timeout (in seconds) of entries written by the app.
+
+    If a cache is given, its own default replaces DEFAULT_TIMEOUT.
+    """
+    timeout = getattr(settings, "SIMPLE_AUTHENTICATION_CACHE_TIMEOUT",
+                      DEFAULT_TIMEOUT)
+    if cache is not None and timeout is DEFAULT_TIMEOUT:
+        timeout = cache.default_timeout
+    return timeout
+
+
+def get_force_password_change(user_id):
+    """Return the cached force_password_change flag, or None on a miss."""
+    cache = get_cache()
+    if cache is None:
+        return None
+    return cache.get(FORCE_PASSWORD_CHANGE_KEY.format(user_id))
+
+
+async def aget_force_password_change(user_id):
+    """Async version of get_force_password_change()."""
+    cache = get_cache()
+    if cache is None:
+        return None
+    return await cache.aget(FORCE_PASSWORD_CHANGE_KEY.format(user_id))
+
+
+def set_force_password_change(user_id, value):
+    """Cache the force_password_change flag for the given user."""
+    cache = get_cache()
+    if cache is not None:
+        cache.set(FORCE_PASSWORD_CHANGE_KEY.format(user_id), bool(value),
+                  timeout=get_timeout())
+
+
+async def aset_force_password_change(user_id, value):
+    """Async version of set_force_password_change()."""
+    cache = get_cache()
+    if cache is not None:
+        await cache.aset(FORCE_PASSWORD_CHANGE_KEY.format(user_id),
+                         bool(value), timeout=get_timeout())
+
+
+def set_many_force_password_change(flags):
+    """Cache the force_password_change flags of many users at once.
+
+    :param flags: mapping of user IDs to their force_password_change flag
+    :type flags: dict
+    """
+    cache = get_cache()
+    if cache is not None:
+        cache.set_many({
+            FORCE_PASSWORD_CHANGE_KEY.format(user_id): bool(value)
+            for user_id, value in flags.items()
+        }, timeout=get_timeout())
+
+
+def delete_force_password_change(user_id):
+    """Remove the cached force_password_change flag for the given user."""
+    cache = get_cache()
+    if cache is not None:
+        cache.delete(FORCE_PASSWORD_CHANGE_KEY.format(user_id))
+
+
+def get_token_version(user_id):
+    """Return the cached token version of the user, or None on a miss."""
+    cache = get_cache()
+    if cache is None:
+        return None
+    return cache.get(TOKEN_VERSION_KEY.format(user_id))
+
+
+def add_token_version(user_id, version):
+    """Cache the token version of the user, unless already cached.
+
+    Used to cache a version just loaded from the database: if the version
+    changed (and was cached by set_many_token_versions) in the meantime,
+    the newer version is kept.
+    """
+    cache = get_cache()
+    if cache is not None:
+        cache.add(TOKEN_VERSION_KEY.format(user_id), version,
+                  timeout=get_timeout())
+
+
+def set_many_token_versions(versions):
+    """Cache the (changed) token versions of many users at once.
+
+    :param versions: mapping of user IDs to their token_version
+    :type versions: dict
+    """
+    cache = get_cache()
+    if cache is not None:
+        cache.set_many({
+            TOKEN_VERSION_KEY.format(user_id): version
+            for user_id, version in versions.items()
+        }, timeout=get_timeout())
+
+
+def delete_token_version(user_id):
+    """Remove the cached token version of the given (deleted) user."""
+    cache = get_cache()
+    if cache is not None:
+        cache.delete(TOKEN_VERSION_KEY.format(user_id))
+
+
+def invalidate_users(user_ids):
+    """Invalidate the cached copies (permissions and groups) of the users.
+
+    Bumps each user's version, so that a copy written concurrently by a
+    request which loaded the user before the change is ignored, too.
+    """
+    cache = get_cache()
+    if cache is None:
+        return
+
+    for user_id in user_ids:
+        version_key = USER_VERSION_KEY.format(user_id)
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, 1, timeout=None)
+    cache.delete_many([
+        key.format(user_id)
+        for user_id in user_ids
+        for key in (USER_KEY, PERMISSIONS_KEY, GROUPS_KEY)
+    ])
+
+
+def invalidate_permissions():
+    """Invalidate the cached permissions (and groups) of every user.
+
+    Used when a change (to a group's permissions, say) may affect any number
+    of users: rather than finding and invalidating each of them, the
+    generation stamped on every cached permission set (and group membership)
+    is bumped, so they're rebuilt lazily as they're next used.
+    """
+    cache = get_cache()
+    if cache is None:
+        return
+
+    try:
+        cache.incr(PERMISSIONS_GENERATION_KEY)
+    except ValueError:
+        cache.set(PERMISSIONS_GENERATION_KEY, 1, timeout=None)
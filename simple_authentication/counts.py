@@ -0,0 +1,145 @@
+"""Estimated (and cached) row counts, for changelists of large tables.
+
+An exact ``COUNT(*)`` has to visit every (matching) row, which on a table of
+millions of users is the slowest query of an admin changelist. Past the
+``SIMPLE_AUTHENTICATION_ADMIN_COUNT_THRESHOLD`` number of rows, the size of
+a whole table is taken from the database's statistics instead, and filtered
+counts are cached (see simple_authentication.cache) for a short while.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+
+from . import cache
+
+COUNT_KEY = "simple_authentication:count:{}"
+
+
+def get_threshold():
+    """Return the number of rows past which counts are estimated, if any."""
+    return getattr(settings, "SIMPLE_AUTHENTICATION_ADMIN_COUNT_THRESHOLD",
+                   None)
+
+
+def estimate_count(model, using):
+    """Return the number of rows of the model's table, as per statistics.
+
+    Returns None if the database keeps no (usable) statistics: estimates
+    are read from pg_class on PostgreSQL, information_schema on MySQL and
+    sqlite_stat1 (once ANALYZE has been run) on SQLite.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        "postgresql": (
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass"
+        ),
+        "mysql": (
+            "SELECT table_rows FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s"
+        ),
+        "sqlite": (
+            "SELECT stat FROM sqlite_stat1 WHERE tbl = %s"
+        ),
+    }
+    if connection.vendor not in queries:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(queries[connection.vendor], [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # e.g. sqlite_stat1 doesn't exist until ANALYZE is first run.
+        return None
+    if row is None or row[0] is None:
+        return None
+
+    # SQLite's stat column starts with the number of rows of the table.
+    estimate = int(float(str(row[0]).split()[0]))
+    # PostgreSQL reports -1 for tables which were never analyzed.
+    return estimate if estimate >= 0 else None
+
+
+def cached_count(queryset, count=None):
+    """Return the queryset's count, cached by its SQL if caching is enabled.
+
+    The timeout of these entries is the (short) value of the
+    ``SIMPLE_AUTHENTICATION_ADMIN_COUNT_TIMEOUT`` setting, as counts aren't
+    invalidated as rows are written.
+
+    :param count: function returning the exact count, defaulting to the
+        queryset's count()
+    :type count: callable
+    """
+    if count is None:
+        count = queryset.count
+    count_cache = cache.get_cache()
+    if count_cache is None:
+        return count()
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    digest = hashlib.md5("{}:{}:{!r}".format(
+        queryset.db, sql, params).encode("utf-8")).hexdigest()
+    key = COUNT_KEY.format(digest)
+
+    result = count_cache.get(key)
+    if result is None:
+        result = count()
+        count_cache.set(key, result, timeout=getattr(
+            settings, "SIMPLE_AUTHENTICATION_ADMIN_COUNT_TIMEOUT", 60))
+    return result
+
+
+class EstimatedCountQuerySetMixin:
+    """Mixin for querysets whose count() may be estimated, or cached.
+
+    Only the count of a whole (unfiltered) table is estimated, once past the
+    threshold; that of a filtered queryset is exact, but cached.
+    """
+
+    #: Whether the last count() returned an estimate.
+    count_estimated = False
+
+    def count(self):
+        """Return the estimated, cached or exact number of rows."""
+        if self._result_cache is not None:
+            return len(self._result_cache)
+
+        threshold = get_threshold()
+        if threshold is not None and not self.query.where:
+            estimate = estimate_count(self.model, self.db)
+            if estimate is not None and estimate >= threshold:
+                self.count_estimated = True
+                return estimate
+        return cached_count(
+            self, super(EstimatedCountQuerySetMixin, self).count)
+
+
+_estimated_count_classes = {}
+
+
+def with_estimated_counts(queryset):
+    """Return a copy of the queryset using EstimatedCountQuerySetMixin."""
+    if isinstance(queryset, EstimatedCountQuerySetMixin):
+        return queryset
+
+    queryset_class = type(queryset)
+    try:
+        estimated_class = _estimated_count_classes[queryset_class]
+    except KeyError:
+        estimated_class = _estimated_count_classes[queryset_class] = type(
+            "EstimatedCount" + queryset_class.__name__,
+            (EstimatedCountQuerySetMixin, queryset_class),
+            {},
+        )
+
+    clone = queryset._chain()
+    clone.__class__ = estimated_class
+    return clone
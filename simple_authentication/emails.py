@@ -0,0 +1,104 @@
+"""Canonical email addresses, as stored in User.email.
+
+Emails are stored (and looked up) in a single canonical form, so that logins
+can find users with an indexed equality lookup on the unique email column,
+rather than a case-insensitive scan.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import migrations, transaction
+from django.db.models import Value
+
+
+def canonicalize_email(email):
+    """Return the canonical form of an email address."""
+    return (email or "").strip().lower()
+
+
+def backfill_canonical_emails(model, chunk_size=1000, using=None):
+    """Rewrite any non-canonical emails of the model's rows, in chunks.
+
+    Rows are walked in primary key order, one chunk (and transaction) at a
+    time, so the table is never locked as a whole. Rows whose canonical
+    email is already taken by another row are left unchanged. If the model
+    stores a display_name, it is recomputed in the same UPDATE.
+
+    :param model: the user model (or its historical version, in migrations)
+    :param chunk_size: number of rows read (and updated) at a time
+    :type chunk_size: int
+    :param using: alias of the database to update
+    :type using: str
+    :return: tuple of (number of rows updated, list of conflicting pks)
+    """
+    from .managers.user import display_name_expression
+
+    manager = model._base_manager.db_manager(using)
+    try:
+        model._meta.get_field("display_name")
+    except FieldDoesNotExist:
+        fields = ["email"]
+    else:
+        fields = ["email", "display_name"]
+    updated = 0
+    conflicts = []
+    last_pk = None
+
+    while True:
+        chunk = manager.order_by("pk")
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk.values_list("pk", "email")[:chunk_size])
+        if not chunk:
+            return updated, conflicts
+        last_pk = chunk[-1][0]
+
+        changes = {
+            pk: canonicalize_email(email)
+            for pk, email in chunk
+            if email != canonicalize_email(email)
+        }
+        if not changes:
+            continue
+
+        with transaction.atomic(using=manager.db):
+            taken = set(manager.filter(
+                email__in=set(changes.values()),
+            ).values_list("email", flat=True))
+
+            to_update = []
+            for pk, email in changes.items():
+                if email in taken:
+                    conflicts.append(pk)
+                else:
+                    taken.add(email)
+                    user = model(pk=pk, email=email)
+                    if "display_name" in fields:
+                        user.display_name = display_name_expression(
+                            email=Value(email))
+                    to_update.append(user)
+
+            manager.bulk_update(to_update, fields)
+            updated += len(to_update)
+
+
+def backfill_canonical_emails_operation(app_label, model_name,
+                                        chunk_size=1000):
+    """Return a RunPython operation backfilling canonical emails.
+
+    For use in a data migration, which should be non-atomic so that each
+    chunk is committed as it goes, e.g.::
+
+        class Migration(migrations.Migration):
+            atomic = False
+            operations = [
+                backfill_canonical_emails_operation(
+                    "simple_authentication", "User"),
+            ]
+    """
+    def forwards(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        backfill_canonical_emails(
+            model, chunk_size, using=schema_editor.connection.alias)
+
+    return migrations.RunPython(
+        forwards, migrations.RunPython.noop, elidable=True)
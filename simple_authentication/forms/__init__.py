@@ -1,8 +1,12 @@
 """Forms for the simple_authentication app."""
 
-from ..forms.auth import AuthenticationForm
+from ..forms.auth import (
+    AdminAuthenticationForm, AuthenticationForm, LoginThrottleMixin,
+)
 
 
 __all__ = [
+    "AdminAuthenticationForm",
     "AuthenticationForm",
+    "LoginThrottleMixin",
 ]
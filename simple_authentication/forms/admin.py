@@ -2,12 +2,69 @@
 
 from django import forms
 from django.contrib.auth.forms import ReadOnlyPasswordHashField
+from django.db import router, transaction
 from django.utils.translation import ugettext_lazy as _
 
+from ..emails import canonicalize_email
 from ..models import User
 
 
-class UserChangeForm(forms.ModelForm):
+class UniqueEmailFormMixin:
+    """Leave the uniqueness of the email to the database's constraint.
+
+    Rather than querying for a duplicate before saving (which another
+    request may still create before the save), the user is written with a
+    single query, in a savepoint. Saving a user whose email turns out to be
+    taken raises the IntegrityError, as the transaction remains usable;
+    add_duplicate_email_error() then turns it into the form's error (see
+    UserAdmin.save_model).
+    """
+
+    def clean_email(self):
+        """Return the canonical form of the email."""
+        return canonicalize_email(self.cleaned_data["email"])
+
+    def validate_unique(self):
+        """Validate unique fields, apart from the email (see save())."""
+        exclude = set(self._get_validation_exclusions())
+        exclude.add("email")
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except forms.ValidationError as error:
+            self._update_errors(error)
+
+    def save(self, commit=True):
+        """Save the user (see save_instance()) and their relations."""
+        instance = super(UniqueEmailFormMixin, self).save(commit=False)
+        if commit:
+            self.save_instance(instance)
+            self.save_m2m()
+        return instance
+
+    def save_instance(self, instance):
+        """Write the user with a single query, in a savepoint."""
+        using = router.db_for_write(type(instance), instance=instance)
+        with transaction.atomic(using=using):
+            instance.save(using=using)
+
+    def add_duplicate_email_error(self, error):
+        """Add the "duplicate_email" error, if caused by the IntegrityError.
+
+        The databases name the violated constraint (or column) in their
+        messages, so this doesn't query for the duplicate.
+
+        :return: bool -- whether the error was added
+        """
+        if "email" not in str(error).lower():
+            return False
+        self.add_error("email", forms.ValidationError(
+            self.error_messages["duplicate_email"],
+            code="duplicate_email",
+        ))
+        return True
+
+
+class UserChangeForm(UniqueEmailFormMixin, forms.ModelForm):
     """Change form for the User model in the admin."""
 
     error_messages = {
@@ -30,21 +87,8 @@ class UserChangeForm(forms.ModelForm):
         """Clean the password value passed in form submission."""
         return self.initial["password"]
 
-    def clean_email(self):
-        """Ensure the email address for the user is unique."""
-        email = self.cleaned_data["email"]
-        email_exists = User.objects.filter(
-            email=email
-        ).exclude(
-            id=self.instance.id
-        ).exists()
-
-        if email_exists:
-            raise forms.ValidationError(self.error_messages["duplicate_email"])
-        return email
 
-
-class UserCreationForm(forms.ModelForm):
+class UserCreationForm(UniqueEmailFormMixin, forms.ModelForm):
     """A form that creates a user from the given username and password."""
 
     error_messages = {
@@ -74,16 +118,6 @@ class UserCreationForm(forms.ModelForm):
             "password2",
         )
 
-    def clean_email(self):
-        """Clean the email field passed in form-submission."""
-        email = self.cleaned_data["email"]
-        try:
-            User.objects.get(email=email)
-        except User.DoesNotExist:
-            return email
-
-        raise forms.ValidationError(self.error_messages["duplicate_email"])
-
     def clean_password2(self):
         """Clean the password confirmation field passed in submission."""
         password1 = self.cleaned_data.get("password1")
@@ -100,5 +134,6 @@ class UserCreationForm(forms.ModelForm):
         user = super(UserCreationForm, self).save(commit=False)
         user.set_password(self.cleaned_data["password1"])
         if commit:
-            user.save(update_fields=["password", ])
+            self.save_instance(user)
+            self.save_m2m()
         return user
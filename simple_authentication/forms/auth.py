@@ -1,9 +1,52 @@
 """Authentication-based form classes."""
 
+from django.contrib.admin.forms import (
+    AdminAuthenticationForm as _AdminAuthenticationForm,
+)
 from django.contrib.auth.forms import AuthenticationForm as _AuthenticationForm
+from django.core.exceptions import ValidationError
+from django.utils.translation import ugettext_lazy as _
 
+from .. import metrics
+from ..throttling import get_login_throttle
 
-class AuthenticationForm(_AuthenticationForm):
+
+class LoginThrottleMixin:
+    """Mixin throttling the failed logins of an authentication form.
+
+    When throttling is enabled (see simple_authentication.throttling),
+    attempts past the limits are rejected before the password is checked,
+    i.e. without hashing it.
+    """
+
+    throttled_message = _(
+        "Too many failed login attempts. Please try again later.")
+
+    def clean(self):
+        """Authenticate the user, unless their attempts are throttled."""
+        throttle = get_login_throttle()
+        if throttle is None:
+            return super(LoginThrottleMixin, self).clean()
+
+        username = self.cleaned_data.get("username")
+        throttled = throttle.get_throttled_scopes(self.request, username)
+        if throttled:
+            for scope in throttled:
+                metrics.increment("login.throttled", tags={"scope": scope})
+            raise ValidationError(self.throttled_message, code="throttled")
+
+        try:
+            cleaned_data = super(LoginThrottleMixin, self).clean()
+        except ValidationError as error:
+            if getattr(error, "code", None) == "invalid_login":
+                throttle.record_failure(self.request, username)
+            raise
+        if self.user_cache is not None:
+            throttle.reset(self.request, username)
+        return cleaned_data
+
+
+class AuthenticationForm(LoginThrottleMixin, _AuthenticationForm):
     """Custom authentication form."""
 
     def __init__(self, request=None, *a, **kw):
@@ -13,3 +56,10 @@ class AuthenticationForm(_AuthenticationForm):
         for field in self.fields:
             _field = self.fields[field]
             _field.widget.attrs.update({"placeholder": _field.label})
+
+
+class AdminAuthenticationForm(LoginThrottleMixin, _AdminAuthenticationForm):
+    """The admin site's login form, with failed logins throttled.
+
+    Used by setting the login_form of the admin site to this class.
+    """
@@ -0,0 +1,75 @@
+"""Cached group memberships, so checking a user's groups runs no queries.
+
+Each user's groups are cached (in the cache named by
+``SIMPLE_AUTHENTICATION_CACHE``, see simple_authentication.cache) as a dict
+of group IDs to names, stamped with the user's version and the permissions
+generation, as their permissions are (see backends.PermissionCacheMixin).
+Adding the user to (or removing them from) a group bumps their version,
+while clearing, renaming or deleting a group bumps the generation; see
+simple_authentication.signals.
+"""
+
+from django.contrib.auth import get_user_model
+
+from . import cache
+
+
+def load_memberships(user_ids):
+    """Return the groups of the given users, with a single query.
+
+    :return: dict mapping each user ID to a dict of group IDs to names
+    """
+    memberships = {user_id: {} for user_id in user_ids}
+    through = get_user_model().groups.through
+    rows = through.objects.filter(user_id__in=user_ids).values_list(
+        "user_id", "group_id", "group__name")
+    for user_id, group_id, name in rows:
+        memberships[user_id][group_id] = name
+    return memberships
+
+
+def get_memberships(user_ids):
+    """Return the groups of the given users, from the cache if possible.
+
+    The cached entries (and the stamps to check them against) are read with
+    a single get_many(), and the users whose entries are missing or stale
+    are loaded with a single query, then cached.
+
+    :return: dict mapping each user ID to a dict of group IDs to names
+    """
+    group_cache = cache.get_cache()
+    if group_cache is None:
+        return load_memberships(user_ids)
+
+    keys = {
+        user_id: (
+            cache.GROUPS_KEY.format(user_id),
+            cache.USER_VERSION_KEY.format(user_id),
+        )
+        for user_id in user_ids
+    }
+    values = group_cache.get_many([
+        key for user_keys in keys.values() for key in user_keys
+    ] + [cache.PERMISSIONS_GENERATION_KEY])
+    generation = values.get(cache.PERMISSIONS_GENERATION_KEY, 0)
+
+    memberships = {}
+    stamps = {}
+    for user_id, (groups_key, version_key) in keys.items():
+        stamp = (values.get(version_key, 0), generation)
+        entry = values.get(groups_key)
+        if entry is not None and entry[0] == stamp:
+            memberships[user_id] = dict(entry[1])
+        else:
+            stamps[user_id] = stamp
+
+    if stamps:
+        # Stamped with the versions and generation read *before* loading,
+        # so that entries built while either changes are ignored.
+        loaded = load_memberships(list(stamps))
+        group_cache.set_many({
+            cache.GROUPS_KEY.format(user_id): (stamps[user_id], groups)
+            for user_id, groups in loaded.items()
+        }, timeout=cache.get_timeout(group_cache))
+        memberships.update(loaded)
+    return memberships
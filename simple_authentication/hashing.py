@@ -0,0 +1,209 @@
+"""Password hashing spread over a pool of worker processes.
+
+Hashing a password at production cost takes tens (or hundreds) of
+milliseconds of CPU, so operations that set many passwords at once (such as
+UserManager.bulk_create_users) are limited to a single core unless the work
+is spread over several processes.
+
+Async code (such as UserManager.acreate_user) can't hash on the event loop
+without blocking it, nor through sync_to_async() without blocking the thread
+every other sync_to_async() call is queued on, so it hashes on a dedicated
+thread pool instead (see get_async_executor). The hashers included with
+Django release the GIL while hashing, so the pool's threads use every core.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX, check_password, get_hasher, identify_hasher,
+    make_password,
+)
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+ASYNC_WORKERS_SETTING = "SIMPLE_AUTHENTICATION_ASYNC_HASHING_WORKERS"
+
+
+class HashedPassword(str):
+    """An already-hashed password, which is stored as-is."""
+
+
+def _encode_chunk(hasher, passwords):
+    """Hash a chunk of raw passwords; run inside the worker processes.
+
+    Only uses the (pickled) hasher, so the workers need no Django settings.
+    """
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+
+class PasswordHashingEngine:
+    """Hash batches of passwords, in parallel where worthwhile.
+
+    :param workers: number of worker processes, defaulting to the
+        ``SIMPLE_AUTHENTICATION_HASHING_WORKERS`` setting (or the number of
+        CPUs). With a single worker, passwords are hashed in-process.
+    :type workers: int
+    :param chunk_size: number of passwords sent to a worker at a time,
+        defaulting to ``SIMPLE_AUTHENTICATION_HASHING_CHUNK_SIZE`` (or 16).
+        Batches no larger than this are hashed in-process.
+    :type chunk_size: int
+    :param algorithm: the hasher to use, as for make_password()
+    :type algorithm: str
+
+    The worker processes are started on first use; call close() (or use the
+    engine as a context manager) to stop them.
+    """
+
+    def __init__(self, workers=None, chunk_size=None, algorithm="default"):
+        """Read the configuration, without starting any processes."""
+        if workers is None:
+            workers = getattr(
+                settings, "SIMPLE_AUTHENTICATION_HASHING_WORKERS", None)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = getattr(
+                settings, "SIMPLE_AUTHENTICATION_HASHING_CHUNK_SIZE", 16)
+
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.hasher = get_hasher(algorithm)
+        self._executor = None
+
+    def __enter__(self):
+        """Use the engine as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop the worker processes."""
+        self.close()
+
+    def close(self):
+        """Stop the worker processes, if they were started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def hash_passwords(self, passwords):
+        """Return the hashes of the given passwords, in order.
+
+        Each password may be a raw password, None (giving an unusable
+        password, as make_password() would) or a HashedPassword, which is
+        returned unchanged. A ValueError is raised if a HashedPassword is not
+        recognised by any of the configured hashers.
+        """
+        hashes = []
+        raw = []
+        for password in passwords:
+            if isinstance(password, HashedPassword):
+                if not password.startswith(UNUSABLE_PASSWORD_PREFIX):
+                    identify_hasher(password)
+                hashes.append(str(password))
+            elif password is None:
+                hashes.append(make_password(None))
+            else:
+                raw.append((len(hashes), password))
+                hashes.append(None)
+
+        encoded = self._encode([password for _, password in raw])
+        for (index, _), password_hash in zip(raw, encoded):
+            hashes[index] = password_hash
+        return hashes
+
+    def _encode(self, passwords):
+        """Hash raw passwords, spreading them over the workers if needed."""
+        if self.workers <= 1 or len(passwords) <= self.chunk_size:
+            return _encode_chunk(self.hasher, passwords)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        chunks = [
+            passwords[i:i + self.chunk_size]
+            for i in range(0, len(passwords), self.chunk_size)
+        ]
+        futures = [
+            self._executor.submit(_encode_chunk, self.hasher, chunk)
+            for chunk in chunks
+        ]
+        return [
+            password_hash
+            for future in futures
+            for password_hash in future.result()
+        ]
+
+
+def hash_passwords(passwords, **kwargs):
+    """Hash the given passwords with a temporary PasswordHashingEngine."""
+    with PasswordHashingEngine(**kwargs) as engine:
+        return engine.hash_passwords(passwords)
+
+
+# The thread pool async code hashes on: started on first use (and again
+# after the setting changes).
+_async_executor = None
+_async_executor_lock = threading.Lock()
+
+
+def get_async_executor():
+    """Return the thread pool async code hashes passwords on.
+
+    It is bounded to ``SIMPLE_AUTHENTICATION_ASYNC_HASHING_WORKERS`` threads
+    (defaulting to the number of CPUs), so concurrent logins queue for a
+    thread rather than all hashing at once.
+    """
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            workers = getattr(settings, ASYNC_WORKERS_SETTING, None)
+            _async_executor = ThreadPoolExecutor(
+                max_workers=workers or os.cpu_count() or 1,
+                thread_name_prefix="simple_authentication-hashing",
+            )
+        return _async_executor
+
+
+@receiver(setting_changed)
+def _reset_async_executor(setting, **kwargs):
+    """Start a new thread pool, of the new size, when the setting changes."""
+    global _async_executor
+    if setting == ASYNC_WORKERS_SETTING:
+        with _async_executor_lock:
+            if _async_executor is not None:
+                _async_executor.shutdown(wait=False)
+                _async_executor = None
+
+
+async def _run_in_executor(func, *args):
+    """Run the function on the async executor, and return its result."""
+    # Within a coroutine, the running loop (get_running_loop() needs Python
+    # 3.7).
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        get_async_executor(), functools.partial(func, *args))
+
+
+async def amake_password(password, salt=None, hasher="default"):
+    """Async version of make_password(), hashing on the async executor."""
+    return await _run_in_executor(make_password, password, salt, hasher)
+
+
+async def acheck_password(password, encoded, setter=None,
+                          preferred="default"):
+    """Async version of check_password(), hashing on the async executor.
+
+    :param setter: coroutine function awaited with the raw password when it
+        is correct but its hash needs upgrading (e.g. to save a new hash),
+        run on the event loop rather than the executor
+    """
+    must_update = []
+    is_correct = await _run_in_executor(
+        check_password, password, encoded, must_update.append, preferred)
+    if must_update and setter is not None:
+        await setter(password)
+    return is_correct
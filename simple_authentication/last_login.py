@@ -0,0 +1,178 @@
+"""Coalesced updates of the users' last_login, for storms of logins.
+
+By default, Django saves the user's last_login as they log in, running an
+UPDATE (and locking the user's row) per login. Setting
+``SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_INTERVAL`` (in seconds) instead
+buffers the times in memory, and writes them with a batched UPDATE every
+interval, or as soon as ``SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_SIZE``
+users (by default, 1,000) are buffered. Buffered times are also written as
+the process exits cleanly (see the atexit module), so none are lost.
+
+A user's last_login may then lag behind (by up to the interval) in the
+database, and bulk updates don't send post_save, so cached copies of the
+user (see backends.CachedUserBackend) keep their previous last_login.
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.db import DatabaseError, connections
+from django.dispatch import receiver
+
+INTERVAL_SETTING = "SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_INTERVAL"
+SIZE_SETTING = "SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_SIZE"
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """Buffer of the users' last login times, flushed in batches.
+
+    :param interval: number of seconds between flushes by the background
+        thread, which is started on first use
+    :type interval: float
+    :param size: number of buffered users which triggers a flush (by the
+        thread adding the last of them, logging any database error), and
+        the number of users updated by each UPDATE
+    :type size: int
+    """
+
+    def __init__(self, interval, size=1000):
+        """Keep the configuration, without starting the thread."""
+        self.interval = interval
+        self.size = size
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Held while flushing, so concurrent flushes can't write a user's
+        # times out of order.
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def __len__(self):
+        """Return the number of users whose last login is buffered."""
+        return len(self._pending)
+
+    def add(self, user_id, last_login):
+        """Buffer the last login time of the user.
+
+        Only the latest time of each user is kept.
+        """
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or last_login > previous:
+                self._pending[user_id] = last_login
+            full = len(self._pending) >= self.size
+            if self._thread is None or not self._thread.is_alive():
+                # Not started yet (or lost in a fork).
+                self._start()
+
+        if full:
+            try:
+                self.flush()
+            except DatabaseError:
+                # Kept for the next flush (see flush()): the user logging in
+                # shouldn't fail for the others' last login times.
+                logger.exception("Failed to flush the last login times.")
+
+    def flush(self):
+        """Write the buffered times to the database, and forget them.
+
+        :return: int -- the number of users updated
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            User = get_user_model()
+            users = [
+                User(pk=user_id, last_login=last_login)
+                for user_id, last_login in pending.items()
+            ]
+            try:
+                User._default_manager.bulk_update(
+                    users, ["last_login"], batch_size=self.size)
+            except Exception:
+                # Keep the times for the next flush (unless newer ones were
+                # buffered in the meantime).
+                with self._lock:
+                    for user_id, last_login in pending.items():
+                        if self._pending.get(user_id, last_login) <= \
+                                last_login:
+                            self._pending[user_id] = last_login
+                raise
+            return len(users)
+
+    def close(self):
+        """Stop the background thread, and flush the buffered times."""
+        self._stopped = True
+        self._wakeup.set()
+        return self.flush()
+
+    def _start(self):
+        """Start the thread flushing the buffer every interval."""
+        self._thread = threading.Thread(
+            target=self._run,
+            name="simple_authentication-last_login",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self):
+        """Flush the buffer every interval, until closed."""
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            if self._stopped:
+                return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush the last login times.")
+            finally:
+                # The thread's connections would otherwise be left open.
+                connections.close_all()
+
+
+# The buffer configured by the settings: _UNSET until first looked up (and
+# again whenever the settings change), then a LastLoginBuffer or None.
+_UNSET = object()
+_buffer = _UNSET
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Return the buffer selected by the settings, or None if disabled."""
+    global _buffer
+    if _buffer is _UNSET:
+        with _buffer_lock:
+            if _buffer is _UNSET:
+                interval = getattr(settings, INTERVAL_SETTING, None)
+                _buffer = None if interval is None else LastLoginBuffer(
+                    interval, getattr(settings, SIZE_SETTING, 1000))
+    return _buffer
+
+
+@receiver(setting_changed)
+def _reset_buffer(setting, **kwargs):
+    """Flush the buffer, and look it up again, when the settings change."""
+    global _buffer
+    if setting in (INTERVAL_SETTING, SIZE_SETTING):
+        with _buffer_lock:
+            buffer, _buffer = _buffer, _UNSET
+        if isinstance(buffer, LastLoginBuffer):
+            buffer.close()
+
+
+@atexit.register
+def flush_at_exit():
+    """Flush the buffered times as the process exits."""
+    buffer = _buffer
+    if isinstance(buffer, LastLoginBuffer):
+        buffer.close()
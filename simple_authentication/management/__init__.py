@@ -0,0 +1 @@
+"""Management utilities for the simple_authentication app."""
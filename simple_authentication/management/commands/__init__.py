@@ -0,0 +1 @@
+"""Management commands for the simple_authentication app."""
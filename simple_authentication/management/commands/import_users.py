@@ -0,0 +1,210 @@
+"""Management command importing users from CSV or JSON Lines."""
+
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from ...hashing import PasswordHashingEngine
+from ...managers.user import (
+    CREATED, REJECTED, SKIPPED, UPDATED, BulkCreateResult,
+)
+
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+class Command(BaseCommand):
+    """Import (or update) users, streamed from a file or stdin."""
+
+    help = (
+        "Import users from a CSV or JSON Lines file (or stdin), creating new "
+        "users and updating existing ones, matched by email. Each row holds "
+        "an email, an optional password (or password_hash) and any other "
+        "user fields."
+    )
+
+    def add_arguments(self, parser):
+        """Add the command's arguments to the parser."""
+        parser.add_argument(
+            "path", nargs="?", default="-",
+            help="File to import from, or - (the default) for stdin.")
+        parser.add_argument(
+            "--format", choices=sorted(set(FORMATS.values())),
+            help="Input format; by default, guessed from the file extension.")
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Number of rows written per transaction (default: 1000).")
+        parser.add_argument(
+            "--checkpoint",
+            help="File recording the number of rows committed so far. An "
+                 "interrupted import re-run with the same checkpoint resumes "
+                 "where it left off.")
+        parser.add_argument(
+            "--workers", type=int,
+            help="Number of processes used to hash passwords.")
+        parser.add_argument(
+            "--database", default=DEFAULT_DB_ALIAS,
+            help="Database to import into (default: %(default)s).")
+
+    def handle(self, *args, **options):
+        """Stream the rows into the database, one batch at a time."""
+        path = options["path"]
+        input_format = options["format"]
+        if input_format is None:
+            extension = os.path.splitext(path)[1].lower()
+            try:
+                input_format = FORMATS[extension]
+            except KeyError:
+                raise CommandError(
+                    "Unable to guess the input format, use --format.")
+
+        checkpoint = options["checkpoint"]
+        done = read_checkpoint(checkpoint)
+        counts = dict.fromkeys((CREATED, UPDATED, SKIPPED, REJECTED), 0)
+
+        if path == "-":
+            stream = sys.stdin
+        else:
+            stream = open(path, newline="", encoding="utf-8")
+
+        try:
+            rows = islice(read_rows(stream, input_format), done, None)
+            with PasswordHashingEngine(workers=options["workers"]) as engine:
+                while True:
+                    batch = list(islice(rows, options["batch_size"]))
+                    if not batch:
+                        break
+
+                    for line, result in self.import_batch(
+                            batch, engine, options["database"]):
+                        counts[result.status] += 1
+                        if result.status == REJECTED:
+                            self.stderr.write("Line {}: {}".format(
+                                line, _format_error(result.error)))
+
+                    done += len(batch)
+                    write_checkpoint(checkpoint, done)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(
+            "Processed {} rows: {created} created, {updated} updated, "
+            "{skipped} skipped, {rejected} rejected.".format(done, **counts))
+
+    def import_batch(self, batch, engine, database):
+        """Write a batch of (line, row) pairs in a single transaction.
+
+        Yields the line number and BulkCreateResult of each row.
+        """
+        User = get_user_model()
+        cleaned = [(line, clean_row(User, row)) for line, row in batch]
+        valid = [
+            row for _, row in cleaned if not isinstance(row, Exception)
+        ]
+
+        with transaction.atomic(using=database):
+            results = iter(User.objects.db_manager(database).bulk_create_users(
+                valid,
+                batch_size=len(valid),
+                hashing_engine=engine,
+                update_existing=True,
+            ))
+
+        for line, row in cleaned:
+            if isinstance(row, Exception):
+                yield line, BulkCreateResult(None, REJECTED, None, row)
+            else:
+                yield line, next(results)
+
+
+def _format_error(error):
+    """Return a one-line description of a row's error."""
+    if isinstance(error, ValidationError):
+        return "; ".join(error.messages)
+    return str(error)
+
+
+def read_rows(stream, input_format):
+    """Yield (line number, row) pairs from a CSV or JSON Lines stream.
+
+    Rows that can't be parsed are yielded as the exception raised.
+    """
+    if input_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as error:
+            row = error
+        else:
+            if not isinstance(row, dict):
+                row = ValueError("Expected a JSON object.")
+        yield line, row
+
+
+def clean_row(model, row):
+    """Convert and validate a row's values, as the model's fields would.
+
+    Each value is checked by its field's validators (e.g. max_length), so
+    that a value the database would refuse rejects its row alone, rather
+    than the whole batch. Empty values (as found in CSV files) are dropped.
+    Returns the cleaned row, or the exception raised if the row is invalid.
+    """
+    if isinstance(row, Exception):
+        return row
+
+    cleaned = {}
+    for name, value in row.items():
+        if value is None or value == "":
+            continue
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or name == "password":
+            # Left to bulk_create_users, which rejects unknown fields (and
+            # hashes the raw passwords).
+            cleaned[name] = value
+            continue
+
+        try:
+            cleaned[name] = field.clean(value, None)
+        except ValidationError as error:
+            return ValidationError("{}: {}".format(
+                name, "; ".join(error.messages)))
+    return cleaned
+
+
+def read_checkpoint(path):
+    """Return the number of rows committed by a previous run, if any."""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as checkpoint:
+        return json.load(checkpoint)["rows"]
+
+
+def write_checkpoint(path, rows):
+    """Atomically record the number of rows committed so far."""
+    if not path:
+        return
+    temp_path = "{}.tmp".format(path)
+    with open(temp_path, "w") as checkpoint:
+        json.dump({"rows": rows}, checkpoint)
+    os.replace(temp_path, path)
@@ -0,0 +1,195 @@
+"""Management command recommending costs for the password hashers."""
+
+import copy
+import math
+import os
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+# The cost attributes of Django's hashers, and the factors (or, for bcrypt's
+# logarithmic rounds, the offsets) applied to their defaults.
+COST_FACTORS = (0.25, 0.5, 1, 2, 4)
+ROUNDS_OFFSETS = (-2, -1, 0, 1, 2)
+ARGON2_TIME_OFFSETS = (-1, 0, 1)
+ARGON2_MEMORY_FACTORS = (0.5, 1, 2)
+
+
+def cost_parameters(hasher):
+    """Return the cost settings to benchmark for the hasher.
+
+    Each setting is a dict of the hasher's attributes to override, ordered
+    from the cheapest to the most expensive; hashers without a tunable cost
+    (such as MD5) have no settings.
+    """
+    if hasattr(hasher, "iterations"):
+        return [
+            {"iterations": max(1, int(hasher.iterations * factor))}
+            for factor in COST_FACTORS
+        ]
+    if hasattr(hasher, "rounds"):
+        return [
+            {"rounds": hasher.rounds + offset}
+            for offset in ROUNDS_OFFSETS
+            # bcrypt accepts between 4 and 31 rounds.
+            if 4 <= hasher.rounds + offset <= 31
+        ]
+    if hasattr(hasher, "time_cost") and hasattr(hasher, "memory_cost"):
+        return [
+            {
+                "time_cost": hasher.time_cost + offset,
+                "memory_cost": int(hasher.memory_cost * factor),
+            }
+            for factor in ARGON2_MEMORY_FACTORS
+            for offset in ARGON2_TIME_OFFSETS
+            if hasher.time_cost + offset >= 1
+        ]
+    if hasattr(hasher, "work_factor"):
+        return [
+            {"work_factor": int(hasher.work_factor * factor)}
+            for factor in COST_FACTORS
+            # scrypt's work factor must be a power of two.
+            if factor >= 1 or hasher.work_factor * factor >= 2
+        ]
+    return []
+
+
+def time_hasher(hasher, parameters, samples):
+    """Return the time taken (in seconds) by each of the sample hashes."""
+    hasher = copy.copy(hasher)
+    for name, value in parameters.items():
+        setattr(hasher, name, value)
+
+    timings = []
+    for sample in range(samples):
+        password = "tune-password-hashers-{}".format(sample)
+        salt = hasher.salt()
+        start = time.perf_counter()
+        hasher.encode(password, salt)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(values, percent):
+    """Return the given percentile of the values (nearest-rank method)."""
+    values = sorted(values)
+    rank = max(1, int(math.ceil(percent / 100.0 * len(values))))
+    return values[rank - 1]
+
+
+def per_core(duration, hasher):
+    """Return the number of hashes per second a core does, at a duration.
+
+    Hashers spreading each hash over several threads (such as Argon2, with
+    a parallelism above 1) use more than one core while doing so: up to
+    their parallelism, or the number of cores of the host if fewer.
+    """
+    if not duration:
+        return float("inf")
+    cores = min(getattr(hasher, "parallelism", 1), os.cpu_count() or 1)
+    return 1 / (duration * max(1, cores))
+
+
+def format_parameters(parameters):
+    """Return a description of the parameters, e.g. "iterations=1000"."""
+    return ", ".join(
+        "{}={}".format(name, value)
+        for name, value in sorted(parameters.items())
+    )
+
+
+class Command(BaseCommand):
+    """Benchmark the password hashers, and recommend their costs."""
+
+    help = (
+        "Benchmark each configured password hasher (see PASSWORD_HASHERS) "
+        "on this host, across a range of costs, and recommend the costliest "
+        "settings whose 99th percentile hashing time fits the latency budget."
+    )
+
+    def add_arguments(self, parser):
+        """Add the command's arguments to the parser."""
+        parser.add_argument(
+            "--target-ms", type=float, default=100,
+            help="Latency budget per hash, in milliseconds "
+                 "(default: %(default)s).")
+        parser.add_argument(
+            "--samples", type=int, default=20,
+            help="Number of hashes timed per setting (default: %(default)s).")
+        parser.add_argument(
+            "--algorithm", action="append", dest="algorithms",
+            help="Only benchmark the hasher with this algorithm; may be "
+                 "repeated. By default, every configured hasher is.")
+
+    def handle(self, *args, **options):
+        """Time each hasher's settings, and report the recommendations."""
+        if options["samples"] < 1:
+            raise CommandError("--samples must be at least 1.")
+        target = options["target_ms"] / 1000.0
+
+        hashers = [
+            hasher for hasher in get_hashers()
+            if not options["algorithms"] or
+            hasher.algorithm in options["algorithms"]
+        ]
+        if not hashers:
+            raise CommandError("No matching password hashers are configured.")
+
+        recommendations = []
+        for hasher in hashers:
+            recommendation = self.tune(hasher, target, options["samples"])
+            if recommendation is not None:
+                recommendations.append(recommendation)
+
+        self.stdout.write("")
+        self.stdout.write("Recommendations (p99 within {:g} ms):".format(
+            options["target_ms"]))
+        if not recommendations:
+            self.stdout.write("  None.")
+        for hasher, parameters, p50, p99 in recommendations:
+            self.stdout.write(
+                "  {}: {} (p50 {:.1f} ms, p99 {:.1f} ms, {:.1f} hashes/s "
+                "per core)".format(
+                    type(hasher).__name__, format_parameters(parameters),
+                    p50 * 1000, p99 * 1000, per_core(p50, hasher)))
+
+    def tune(self, hasher, target, samples):
+        """Benchmark a hasher, returning its recommended setting, if any.
+
+        The recommendation is a (hasher, parameters, p50, p99) tuple.
+        """
+        name = type(hasher).__name__
+        self.stdout.write("{} ({}):".format(name, hasher.algorithm))
+
+        if hasher.library:
+            try:
+                hasher._load_library()
+            except ValueError as error:
+                # e.g. the bcrypt or argon2-cffi library isn't installed.
+                self.stdout.write("  Unavailable: {}".format(error))
+                return None
+
+        settings = cost_parameters(hasher)
+        if not settings:
+            self.stdout.write("  No tunable cost; not recommended.")
+            return None
+
+        best = None
+        for parameters in settings:
+            timings = time_hasher(hasher, parameters, samples)
+            p50 = percentile(timings, 50)
+            p99 = percentile(timings, 99)
+            within = p99 <= target
+            self.stdout.write(
+                "  {:<40} p50 {:>9.2f} ms  p99 {:>9.2f} ms  {:>9.1f} "
+                "hashes/s per core{}".format(
+                    format_parameters(parameters), p50 * 1000, p99 * 1000,
+                    per_core(p50, hasher),
+                    "" if within else "  (over budget)"))
+            if within and (best is None or p50 > best[2]):
+                best = (hasher, parameters, p50, p99)
+
+        if best is None:
+            self.stdout.write("  None of the settings fits the budget.")
+        return best
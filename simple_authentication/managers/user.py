@@ -1,10 +1,325 @@
 """Model managers used with simple_authentication.models.user."""
 
+from collections import namedtuple
+from functools import partial
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import identify_hasher
 from django.contrib.auth.models import BaseUserManager
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, F, QuerySet, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
 from django.utils import timezone
 
+from .. import cache, metrics
+from ..emails import canonicalize_email
+from ..hashing import HashedPassword, PasswordHashingEngine
+from ..search import SEARCH_FIELDS, get_user_search
+
+CREATED = "created"
+SKIPPED = "skipped"
+UPDATED = "updated"
+REJECTED = "rejected"
+
+# Fields set by the manager itself, which rows may not override.
+PROTECTED_FIELDS = frozenset((
+    "date_joined",
+    "last_login",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+))
+
+
+# The fields a user's display name is made of (see User.display_name).
+DISPLAY_NAME_FIELDS = frozenset((
+    "email",
+    "first_name",
+    "last_name",
+))
+
+
+# The fields whose change may revoke a user's signed tokens: a new password
+# or deactivation increments their token_version (see tokens.py).
+TOKEN_REVOKING_FIELDS = frozenset((
+    "is_active",
+    "password",
+))
+
+
+# The fields whose change leaves the users' cached copies and permissions
+# (see cache.invalidate_users) valid: last_login is updated in bulk by
+# last_login.py, and may lag behind anyway.
+CACHE_PRESERVING_FIELDS = frozenset((
+    "last_login",
+))
+
+
+# The fields whose values are cached per user, by cache.py.
+CACHED_FIELDS = (
+    "force_password_change",
+    "token_version",
+)
+
+
+def revokes_tokens(values):
+    """Return True if setting the fields to the values revokes tokens."""
+    return "password" in values or values.get("is_active") is False
+
+
+def get_display_name(first_name, last_name, email):
+    """Return the display name of a user with the given names and email.
+
+    That is, their full name or, if they have neither a first nor a last
+    name, their email. Computed exactly as display_name_expression() does.
+    """
+    return "{} {}".format(
+        first_name or "", last_name or "").strip(" ") or email
+
+
+def display_name_expression(**values):
+    """Return an expression computing the users' display name in SQL.
+
+    :param values: expressions (or values) to use in place of the fields of
+        DISPLAY_NAME_FIELDS, e.g. the new values of an UPDATE
+    """
+    first_name, last_name, email = (
+        values[field] if field in values else F(field)
+        for field in ("first_name", "last_name", "email")
+    )
+    return Coalesce(
+        NullIf(
+            Trim(Concat(first_name, Value(" "), last_name,
+                        output_field=CharField())),
+            Value(""),
+        ),
+        email,
+        output_field=CharField(),
+    )
+
+
+async def asave(obj, **kwargs):
+    """Save the model instance through the async ORM.
+
+    Before Django 4.2 there's no Model.asave(), so the instance is saved on
+    a thread instead, as asave() itself does.
+    """
+    save = getattr(obj, "asave", None) or sync_to_async(obj.save)
+    await save(**kwargs)
+
+
+class UserQuerySet(QuerySet):
+    """QuerySet keeping the users' display_name in sync in bulk writes."""
+
+    def with_display_name(self, alias="computed_display_name"):
+        """Annotate each user with their display name, computed in SQL."""
+        return self.annotate(**{alias: display_name_expression()})
+
+    def update_display_names(self):
+        """Recompute the stored display_name of each user, in one UPDATE.
+
+        Returns the number of users updated.
+        """
+        return self.update(display_name=display_name_expression())
+
+    def update(self, **kwargs):
+        """Update the users, including their display names if affected.
+
+        Setting their password (or deactivating them) also increments their
+        token version, revoking their signed tokens. With caching enabled,
+        the users' cached state is updated once committed, as by save().
+        """
+        if DISPLAY_NAME_FIELDS.intersection(kwargs) and \
+                "display_name" not in kwargs:
+            kwargs["display_name"] = display_name_expression(**{
+                field: value if hasattr(value, "resolve_expression")
+                else Value(value)
+                for field, value in kwargs.items()
+                if field in DISPLAY_NAME_FIELDS
+            })
+        if revokes_tokens(kwargs):
+            kwargs.setdefault("token_version", F("token_version") + 1)
+        if cache.get_cache() is None or \
+                CACHE_PRESERVING_FIELDS.issuperset(kwargs):
+            return super(UserQuerySet, self).update(**kwargs)
+
+        # The new values may be computed in SQL (e.g. the token versions),
+        # so read the cached ones back, within the same transaction.
+        fields = [field for field in CACHED_FIELDS if field in kwargs]
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list("pk", flat=True))
+            updated = super(UserQuerySet, self).update(**kwargs)
+            users = self.model._default_manager.using(self.db)
+            rows = []
+            for start in range(0, len(pks), 1000) if fields else ():
+                rows.extend(users.filter(
+                    pk__in=pks[start:start + 1000],
+                ).values("pk", *fields))
+            self._update_caches(pks, kwargs, rows)
+        return updated
+    update.alters_data = True
+
+    def update_in_chunks(self, values, chunk_size=1000):
+        """Set the fields of the users to the values, a chunk at a time.
+
+        Each chunk of (at most chunk_size) users is updated with a single
+        UPDATE, in its own transaction, and signalled with users_updated
+        (see simple_authentication.signals) rather than a post_save per
+        user. Users whose fields already have the values are left alone.
+
+        :param values: mapping of field names to their new values
+        :type values: dict
+        :return: int -- the number of users updated
+        """
+        from ..signals import users_updated
+
+        using = self.db
+        users = self.exclude(**values).order_by("pk")
+        updated = 0
+        last_pk = None
+        while True:
+            chunk = users if last_pk is None else users.filter(pk__gt=last_pk)
+            pks = list(chunk.values_list("pk", flat=True)[:chunk_size])
+            if not pks:
+                return updated
+
+            with transaction.atomic(using=using):
+                updated += self.model._default_manager.using(using).filter(
+                    pk__in=pks,
+                ).update(**values)
+                users_updated.send(
+                    sender=self.model, pks=pks, values=values, using=using)
+            last_pk = pks[-1]
+    update_in_chunks.alters_data = True
+
+    def force_password_change(self, chunk_size=1000):
+        """Flag the users to change their password on their next request."""
+        return self.update_in_chunks(
+            {"force_password_change": True}, chunk_size)
+    force_password_change.alters_data = True
+
+    def deactivate(self, chunk_size=1000):
+        """Deactivate the users."""
+        return self.update_in_chunks({"is_active": False}, chunk_size)
+    deactivate.alters_data = True
+
+    def reactivate(self, chunk_size=1000):
+        """Reactivate the users."""
+        return self.update_in_chunks({"is_active": True}, chunk_size)
+    reactivate.alters_data = True
+
+    def grant_staff(self, chunk_size=1000):
+        """Give the users access to the admin site."""
+        return self.update_in_chunks({"is_staff": True}, chunk_size)
+    grant_staff.alters_data = True
+
+    def revoke_staff(self, chunk_size=1000):
+        """Remove the users' access to the admin site."""
+        return self.update_in_chunks({"is_staff": False}, chunk_size)
+    revoke_staff.alters_data = True
+
+    def logout(self):
+        """Log the users out of every session they're logged in to.
+
+        See simple_authentication.sessions.delete_user_sessions(); returns
+        the number of sessions deleted.
+        """
+        from ..sessions import delete_user_sessions
+
+        return delete_user_sessions(self.values("pk"))
+    logout.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert the users, with their display names."""
+        objs = list(objs)
+        for obj in objs:
+            obj.display_name = obj.get_display_name()
+        return super(UserQuerySet, self).bulk_create(objs, *args, **kwargs)
 
-class UserManager(BaseUserManager):
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Update the users, including their display names if affected.
+
+        Updating their password (or deactivating them) also increments
+        their token version, revoking their signed tokens. With caching
+        enabled, the users' cached state is updated once committed, as by
+        save().
+        """
+        objs = list(objs)
+        if DISPLAY_NAME_FIELDS.intersection(fields) and \
+                "display_name" not in fields:
+            for obj in objs:
+                obj.display_name = obj.get_display_name()
+            fields = list(fields) + ["display_name"]
+        if TOKEN_REVOKING_FIELDS.intersection(fields) and \
+                "token_version" not in fields:
+            for obj in objs:
+                if "password" in fields or not obj.is_active:
+                    obj.token_version += 1
+            fields = list(fields) + ["token_version"]
+        updated = super(UserQuerySet, self).bulk_update(
+            objs, fields, *args, **kwargs)
+        if cache.get_cache() is not None and \
+                not CACHE_PRESERVING_FIELDS.issuperset(fields):
+            self._update_caches([obj.pk for obj in objs], fields, [
+                {
+                    field: getattr(obj, field)
+                    for field in ("pk", ) + CACHED_FIELDS
+                }
+                for obj in objs
+            ])
+        return updated
+    bulk_update.alters_data = True
+
+    def _update_caches(self, pks, fields, rows):
+        """Update the cached state of the updated users once committed.
+
+        Bulk updates don't send post_save, so this does what its receivers
+        (see simple_authentication.signals) would.
+
+        :param pks: the primary keys of the updated users
+        :param fields: the names of the fields updated
+        :param rows: dicts of the users' pk and new values of CACHED_FIELDS
+            (at least of those updated)
+        """
+        transaction.on_commit(partial(
+            cache.invalidate_users,
+            pks,
+        ), using=self.db)
+
+        if "force_password_change" in fields:
+            transaction.on_commit(partial(
+                cache.set_many_force_password_change,
+                {row["pk"]: row["force_password_change"] for row in rows},
+            ), using=self.db)
+
+        if "token_version" in fields:
+            transaction.on_commit(partial(
+                cache.set_many_token_versions,
+                {row["pk"]: row["token_version"] for row in rows},
+            ), using=self.db)
+
+
+class BulkCreateResult(namedtuple("BulkCreateResult", [
+    "email",
+    "status",
+    "user",
+    "error",
+])):
+    """Outcome of a single row passed to UserManager.bulk_create_users.
+
+    ``status`` is one of CREATED, UPDATED (an existing user was updated),
+    SKIPPED (the email is already taken, by an existing user or an earlier
+    row) or REJECTED (the row is invalid, see ``error``). ``user`` is the
+    created, updated (or conflicting) User, if any.
+    """
+
+    __slots__ = ()
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """Model-manager for the custom User-model in the authentication app.
 
     Note: needs to be overridden in order that the createsuperuser command
@@ -12,6 +327,17 @@ class UserManager(BaseUserManager):
     there is no username field).
     """
 
+    @classmethod
+    def normalize_email(cls, email):
+        """Return the canonical form of the email (see User.save)."""
+        return canonicalize_email(email)
+
+    def get_by_natural_key(self, username):
+        """Return the user with the given (canonicalized) email."""
+        return self.get(**{
+            self.model.USERNAME_FIELD: canonicalize_email(username),
+        })
+
     def _create_user(self, email, password, is_staff, is_superuser,
                      **extra_fields):
         """Create a user object with the specified attributes and write to DB.
@@ -34,6 +360,33 @@ class UserManager(BaseUserManager):
         )
         user.set_password(password)
         user.save(using=self._db)
+        metrics.increment("user.created", tags={"method": "create_user"})
+        return user
+
+    async def _acreate_user(self, email, password, is_staff, is_superuser,
+                            **extra_fields):
+        """Async version of _create_user().
+
+        The password is hashed on a thread pool (see User.aset_password),
+        rather than on the event loop.
+        """
+        now = timezone.now()
+        if not email:
+            raise ValueError("The given email must be set.")
+
+        email = self.normalize_email(email)
+        user = self.model(
+            email=email,
+            is_active=True,
+            is_staff=is_staff,
+            is_superuser=is_superuser,
+            last_login=now,
+            date_joined=now,
+            **extra_fields
+        )
+        await user.aset_password(password)
+        await asave(user, using=self._db)
+        metrics.increment("user.created", tags={"method": "acreate_user"})
         return user
 
     def create_user(self, email=None, password=None, **extra_fields):
@@ -71,3 +424,200 @@ class UserManager(BaseUserManager):
             is_superuser=True,
             **extra_fields
         )
+
+    async def acreate_user(self, email=None, password=None, **extra_fields):
+        """Async version of create_user()."""
+        return await self._acreate_user(
+            email=email,
+            password=password,
+            is_staff=False,
+            is_superuser=False,
+            **extra_fields
+        )
+
+    async def acreate_superuser(self, email, password, **extra_fields):
+        """Async version of create_superuser()."""
+        return await self._acreate_user(
+            email=email,
+            password=password,
+            is_staff=True,
+            is_superuser=True,
+            **extra_fields
+        )
+
+    def bulk_create_users(self, rows, batch_size=1000, hashing_engine=None,
+                          update_existing=False):
+        """Create many normal users, using one INSERT per batch.
+
+        Emails are normalized exactly as create_user() (and User.save())
+        would. Rows whose email is already taken by an earlier row are
+        skipped, as are rows for existing users unless update_existing is
+        set; invalid rows are rejected.
+
+        :param rows: iterable of dicts, each holding an "email", an optional
+            raw "password" (or an already-hashed "password_hash") and any
+            extra fields to set into the user
+        :type rows: iterable
+        :param batch_size: number of rows to check and insert at a time
+        :type batch_size: int
+        :param hashing_engine: engine used to hash each batch's passwords,
+            defaulting to a PasswordHashingEngine closed once done
+        :type hashing_engine: simple_authentication.hashing.
+            PasswordHashingEngine
+        :param update_existing: update the fields (and password, if given)
+            of existing users, using one UPDATE per batch, rather than
+            skipping them
+        :type update_existing: bool
+        :return: list of BulkCreateResult -- one per row, in order
+        """
+        if hashing_engine is None:
+            with PasswordHashingEngine() as engine:
+                return self.bulk_create_users(
+                    rows, batch_size, engine, update_existing)
+
+        rows = iter(rows)
+        seen = set()
+        results = []
+
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return results
+            batch_results = self._bulk_create_batch(
+                batch, seen, hashing_engine, update_existing)
+            metrics.increment("user.created", sum(
+                result.status == CREATED for result in batch_results
+            ), tags={"method": "bulk_create_users"})
+            results.extend(batch_results)
+
+    def _bulk_create_batch(self, batch, seen, hashing_engine,
+                           update_existing):
+        """Create the users of a single batch passed to bulk_create_users.
+
+        Returns the results for the batch, adding the emails it handled to
+        the set of emails seen so far.
+        """
+        now = timezone.now()
+        results = []
+        pending = []
+
+        for row in batch:
+            row = dict(row)
+            email = row.pop("email", None)
+            password = row.pop("password", None)
+            password_hash = row.pop("password_hash", None)
+            try:
+                if password_hash is not None:
+                    identify_hasher(password_hash)
+                    password = HashedPassword(password_hash)
+                user = self._build_user(email, now, **row)
+            except (TypeError, ValueError, ValidationError) as error:
+                results.append(BulkCreateResult(
+                    email, REJECTED, None, error))
+            else:
+                results.append(None)
+                pending.append((len(results) - 1, user, password, row))
+
+        # Check for duplicates in the batch, and against the database, in a
+        # single pass (and query).
+        emails = {user.email for _, user, _, _ in pending}
+        existing = self.using(self._db).filter(email__in=emails)
+        if update_existing:
+            existing = {user.email: user for user in existing}
+        else:
+            existing = set(existing.values_list("email", flat=True))
+
+        to_create = []
+        to_update = []
+        to_hash = []
+        update_fields = set()
+        for index, user, password, row in pending:
+            if user.email in seen:
+                status = SKIPPED
+            elif user.email not in existing:
+                status = CREATED
+                to_create.append(user)
+                to_hash.append((user, password))
+            elif update_existing:
+                status = UPDATED
+                user = existing[user.email]
+                for field, value in row.items():
+                    setattr(user, field, value)
+                to_update.append(user)
+                update_fields.update(row)
+                if password is not None:
+                    to_hash.append((user, password))
+                    update_fields.add("password")
+            else:
+                status = SKIPPED
+
+            seen.add(user.email)
+            results[index] = BulkCreateResult(user.email, status, user, None)
+
+        hashes = hashing_engine.hash_passwords(
+            [password for _, password in to_hash])
+        for (user, _), password_hash in zip(to_hash, hashes):
+            user.password = password_hash
+
+        if update_fields:
+            # Also updates the users' cached state (see bulk_update()).
+            self.using(self._db).bulk_update(to_update, sorted(update_fields))
+
+        self._bulk_insert(to_create, results)
+
+        # bulk_create() and bulk_update() don't send post_save either, so
+        # index the users for searching here, too.
+        search = get_user_search()
+        if search is not None:
+            to_index = [
+                result.user for result in results
+                if result.status == CREATED
+            ]
+            if SEARCH_FIELDS.intersection(update_fields):
+                to_index.extend(to_update)
+            search.update_index(to_index, using=self._db)
+        return results
+
+    def _bulk_insert(self, users, results):
+        """Insert the given users, with a single INSERT where possible.
+
+        If another process created some of the users in the meantime, the
+        rest are inserted one at a time, with their results marked SKIPPED.
+        """
+        try:
+            with transaction.atomic(using=self._db):
+                self.bulk_create(users)
+        except IntegrityError:
+            created = {id(user) for user in users}
+            for index, result in enumerate(results):
+                if id(result.user) not in created:
+                    continue
+                try:
+                    with transaction.atomic(using=self._db):
+                        result.user.save(using=self._db, force_insert=True)
+                except IntegrityError as error:
+                    results[index] = result._replace(
+                        status=SKIPPED, error=error)
+
+    def _build_user(self, email, now, **extra_fields):
+        """Return a new (unsaved) user, normalized and validated."""
+        if not email:
+            raise ValueError("The given email must be set.")
+
+        protected = PROTECTED_FIELDS.intersection(extra_fields)
+        if protected:
+            raise TypeError("Protected fields may not be set: {}.".format(
+                ", ".join(sorted(protected))))
+
+        email = self.normalize_email(email)
+        validate_email(email)
+
+        return self.model(
+            email=email,
+            is_active=True,
+            is_staff=False,
+            is_superuser=False,
+            last_login=now,
+            date_joined=now,
+            **extra_fields
+        )
@@ -0,0 +1,191 @@
+"""Pluggable metrics, counting and timing the app's main operations.
+
+Metrics are opt-in: set ``SIMPLE_AUTHENTICATION_METRICS`` to the sink to
+send them to, either by name (see SINKS) or by the dotted path of a
+MetricsSink subclass. With no sink configured, recording a metric costs a
+single check of a module-level variable.
+
+The metrics recorded are:
+
+- ``middleware.password_change_redirect`` (count): requests redirected by
+  ForcePasswordChangeMiddleware;
+- ``user.set_password`` (seconds): time taken to hash a password in
+  User.set_password();
+- ``user.created`` (count, tagged with the manager ``method`` used): users
+  created through UserManager;
+- ``admin.hijack`` (count): logins as another user through the user admin;
+- ``request.queries`` (queries): the number of queries run by each
+  authenticated request, when QueryMetricsMiddleware is installed.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+METRICS_SETTING = "SIMPLE_AUTHENTICATION_METRICS"
+
+
+class MetricsSink:
+    """Base class of the metrics sinks.
+
+    A sink receives counts (increment()) and sampled values, such as
+    durations in seconds (observe()). Tags are a dict of string values,
+    or None.
+    """
+
+    def increment(self, name, value=1, tags=None):
+        """Add the value to the named counter."""
+        raise NotImplementedError(
+            "Subclasses of MetricsSink must implement increment().")
+
+    def observe(self, name, value, tags=None):
+        """Record a sample of the named value (e.g. a duration)."""
+        raise NotImplementedError(
+            "Subclasses of MetricsSink must implement observe().")
+
+
+class InMemorySink(MetricsSink):
+    """Sink keeping the metrics in memory, e.g. for tests or a debug view.
+
+    Counters and samples are keyed by (name, tags), where the tags are a
+    sorted tuple of (key, value) pairs.
+    """
+
+    def __init__(self):
+        """Start with no metrics."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def increment(self, name, value=1, tags=None):
+        """Add the value to the named counter."""
+        with self._lock:
+            self.counters[name, _freeze(tags)] += value
+
+    def observe(self, name, value, tags=None):
+        """Record a sample of the named value."""
+        with self._lock:
+            self.samples[name, _freeze(tags)].append(value)
+
+    def reset(self):
+        """Discard every metric recorded so far."""
+        self.counters = defaultdict(int)
+        self.samples = defaultdict(list)
+
+    def get_count(self, name, **tags):
+        """Return the value of the named counter, with the given tags."""
+        return self.counters.get((name, _freeze(tags)), 0)
+
+    def get_samples(self, name, **tags):
+        """Return the list of samples of the named value, with the tags."""
+        return list(self.samples.get((name, _freeze(tags)), ()))
+
+
+class LoggingSink(MetricsSink):
+    """Sink writing each metric to the "simple_authentication.metrics" log.
+
+    Messages are logged at the INFO level, with the metric's name, value
+    and tags also set as the record's ``metric``, ``value`` and ``tags``
+    attributes, for structured log handlers.
+    """
+
+    logger = logging.getLogger("simple_authentication.metrics")
+
+    def increment(self, name, value=1, tags=None):
+        """Log the increment of the named counter."""
+        self._log("count", name, value, tags)
+
+    def observe(self, name, value, tags=None):
+        """Log the sample of the named value."""
+        self._log("value", name, value, tags)
+
+    def _log(self, kind, name, value, tags):
+        """Log the metric, if the logger is enabled for INFO messages."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info(
+            "%s %s=%s%s", kind, name, value,
+            "".join(" {}={}".format(*tag) for tag in _freeze(tags)),
+            extra={"metric": name, "value": value, "tags": tags or {}},
+        )
+
+
+SINKS = {
+    "memory": InMemorySink,
+    "logging": LoggingSink,
+}
+
+# The sink configured by the settings: _UNSET until first looked up (and
+# again whenever the setting changes), then a MetricsSink or None.
+_UNSET = object()
+_sink = _UNSET
+
+
+def get_sink():
+    """Return the sink selected by the settings, or None if disabled."""
+    global _sink
+    if _sink is _UNSET:
+        sink = getattr(settings, METRICS_SETTING, None)
+        if sink is not None:
+            sink = (SINKS[sink] if sink in SINKS else import_string(sink))()
+        _sink = sink
+    return _sink
+
+
+@receiver(setting_changed)
+def _reset_sink(setting, **kwargs):
+    """Look the sink up again when the setting changes."""
+    global _sink
+    if setting == METRICS_SETTING:
+        _sink = _UNSET
+
+
+def increment(name, value=1, tags=None):
+    """Add the value to the named counter of the configured sink, if any."""
+    sink = get_sink()
+    if sink is not None:
+        sink.increment(name, value, tags)
+
+
+def observe(name, value, tags=None):
+    """Record a sample of the named value into the configured sink, if any."""
+    sink = get_sink()
+    if sink is not None:
+        sink.observe(name, value, tags)
+
+
+class Timer:
+    """Context manager recording the time (in seconds) taken by its body.
+
+    Nothing is timed if no sink is configured.
+    """
+
+    __slots__ = ("name", "tags", "sink", "start")
+
+    def __init__(self, name, tags=None):
+        """Keep the name and tags of the metric to record."""
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        """Start timing, if a sink is configured."""
+        self.sink = get_sink()
+        if self.sink is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Record the time taken into the sink."""
+        if self.sink is not None:
+            self.sink.observe(
+                self.name, time.perf_counter() - self.start, self.tags)
+
+
+def _freeze(tags):
+    """Return the tags as a sorted tuple of (key, value) pairs."""
+    return tuple(sorted(tags.items())) if tags else ()
@@ -1,30 +1,389 @@
 """Middleware classes for the simple_authentication app."""
 
+import asyncio
 import re
+import weakref
+from contextlib import ExitStack
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
 from django.http import HttpResponseRedirect
-from django.urls import reverse_lazy, resolve
+from django.urls import (
+    LocalePrefixPattern, NoReverseMatch, URLResolver, get_resolver,
+    get_urlconf, reverse,
+)
+
+from . import cache, metrics, sessions
+from .backends import TokenBackend
+
+try:
+    from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+except ImportError:  # pragma: no cover (asgiref < 3.6)
+    iscoroutinefunction = asyncio.iscoroutinefunction
+
+    def markcoroutinefunction(func):
+        """Mark the callable as a coroutine function, for asyncio."""
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
+
+EXEMPT_PATHS_SETTING = "SIMPLE_AUTHENTICATION_PASSWORD_CHANGE_EXEMPT_PATHS"
+
+# Compiled route matchers, keyed by URL resolver. Django hands out a new
+# resolver whenever the URLconf changes (or clear_url_caches() is called),
+# so stale matchers are dropped along with the resolver they belong to.
+_route_matchers = weakref.WeakKeyDictionary()
+
+
+@receiver(setting_changed)
+def _clear_route_matchers(setting, **kwargs):
+    """Discard compiled route matchers when a relevant setting changes."""
+    if setting in ("ROOT_URLCONF", EXEMPT_PATHS_SETTING):
+        _route_matchers.clear()
+
+
+def _compile_alternatives(patterns):
+    """Compile a sequence of regular expressions into a single matcher."""
+    if not patterns:
+        return None
+    return re.compile("|".join("(?:{})".format(p) for p in patterns))
+
+
+def _admin_prefixes(resolver, prefix="^/", app_names=()):
+    """Yield the regex prefix of every admin site included in the resolver.
+
+    Mirrors the behaviour of ``resolve(path).app_name == "admin"``: only
+    includes whose (joined) application namespace is exactly "admin" count.
+    """
+    for pattern in resolver.url_patterns:
+        if not isinstance(pattern, URLResolver):
+            continue
+
+        if isinstance(pattern.pattern, LocalePrefixPattern):
+            # The language prefix depends on the active language, so match
+            # any (optional) prefix rather than caching the current one.
+            regex = prefix + r"(?:[\w@-]+/)?"
+        else:
+            regex = prefix + pattern.pattern.regex.pattern.lstrip("^")
+        names = app_names + ((pattern.app_name, ) if pattern.app_name else ())
+
+        if ":".join(names) == "admin":
+            yield regex
+        else:
+            yield from _admin_prefixes(pattern, regex, names)
+
+
+class RouteMatcher:
+    """Pre-compiled routing information used by the middleware.
+
+    Built once per URLconf so that deciding whether to redirect a request
+    costs a couple of regex matches, rather than a full URL resolution.
+    """
+
+    def __init__(self, resolver):
+        """Resolve the password change URL and admin prefixes up-front."""
+        try:
+            self.change_url = reverse(
+                viewname="admin:password_change",
+                urlconf=resolver.urlconf_name,
+            )
+        except NoReverseMatch:
+            self.change_url = None
+
+        self.admin_regex = _compile_alternatives(
+            list(_admin_prefixes(resolver)))
+        self.exempt_regex = _compile_alternatives(
+            getattr(settings, EXEMPT_PATHS_SETTING, ()))
+
+    def should_redirect(self, path):
+        """Return True if the path must redirect to the change URL."""
+        if self.change_url is None or self.admin_regex is None:
+            return False
+        if path.startswith(self.change_url.rstrip("/")):
+            return False
+        if self.exempt_regex and self.exempt_regex.match(path):
+            return False
+        return bool(self.admin_regex.match(path))
+
+    @classmethod
+    def for_urlconf(cls, urlconf=None):
+        """Return the (cached) matcher for the given URLconf."""
+        resolver = get_resolver(urlconf)
+        try:
+            return _route_matchers[resolver]
+        except KeyError:
+            matcher = _route_matchers[resolver] = cls(resolver)
+            return matcher
 
 
 class ForcePasswordChangeMiddleware:
-    """Force the user to change their password on the next request."""
+    """Force the user to change their password on the next request.
+
+    Additional paths which should remain reachable (e.g. the admin logout
+    view) may be listed as regular expressions in the
+    ``SIMPLE_AUTHENTICATION_PASSWORD_CHANGE_EXEMPT_PATHS`` setting.
+
+    Supports both sync (WSGI) and async (ASGI) request handling: when the
+    rest of the middleware chain is async, requests are handled natively on
+    the event loop rather than via a thread for every request.
+    """
+
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         """1.11-style constructor."""
         self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
         """1.11-style implementation."""
+        if self.is_async:
+            return self.__acall__(request)
+
+        if self.force_password_change(request):
+            redirect_url = self.get_redirect_url(request)
+            if redirect_url:
+                metrics.increment("middleware.password_change_redirect")
+                return HttpResponseRedirect(redirect_to=redirect_url)
+
+        response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        """Async implementation, used when running under ASGI."""
+        session = getattr(request, "session", None)
+        if hasattr(request, "auser") and hasattr(session, "aget"):
+            force_password_change = await self.aforce_password_change(request)
+        else:
+            # Before Django 5.1 there's no async way to load the session (or
+            # the user), so make the decision on a thread instead.
+            force_password_change = await sync_to_async(
+                self.force_password_change)(request)
+
+        if force_password_change:
+            redirect_url = self.get_redirect_url(request)
+            if redirect_url:
+                metrics.increment("middleware.password_change_redirect")
+                return HttpResponseRedirect(redirect_to=redirect_url)
+
+        response = await self.get_response(request)
+        return response
+
+    def force_password_change(self, request):
+        """Return True if the request's user must change their password.
+
+        When caching is enabled (see simple_authentication.cache) the flag
+        is read from the cache, keyed by the user ID in the session, so the
+        user only has to be loaded from the database on a cache miss.
+        """
+        user_id = _get_session_user_id(request)
+        if user_id is not None:
+            cached = cache.get_force_password_change(user_id)
+            if cached is not None:
+                return cached
+
         user = request.user
-        if user.is_authenticated and user.force_password_change:
-            path = request.path
-            change_url = reverse_lazy(viewname="admin:password_change")
+        if not user.is_authenticated:
+            return False
+
+        cache.set_force_password_change(user.pk, user.force_password_change)
+        return user.force_password_change
+
+    async def aforce_password_change(self, request):
+        """Async version of force_password_change()."""
+        user_id = await request.session.aget(SESSION_KEY)
+        if user_id is not None:
+            cached = await cache.aget_force_password_change(user_id)
+            if cached is not None:
+                return cached
+
+        user = await request.auser()
+        if not user.is_authenticated:
+            return False
+
+        await cache.aset_force_password_change(
+            user.pk, user.force_password_change)
+        return user.force_password_change
+
+    def get_redirect_url(self, request):
+        """Return the URL to redirect the request to, if any."""
+        urlconf = getattr(request, "urlconf", None) or get_urlconf()
+        matcher = RouteMatcher.for_urlconf(urlconf)
 
-            is_admin_url = getattr(resolve(path), "app_name") == "admin"
-            is_change_url = re.match(r"^{}?".format(change_url), path)
+        if matcher.should_redirect(request.path):
+            return matcher.change_url
+        return None
 
-            if is_admin_url and not is_change_url:
-                return HttpResponseRedirect(redirect_to=change_url)
 
+class TokenAuthenticationMiddleware:
+    """Authenticate requests bearing a signed token (see tokens.py).
+
+    Requests with an ``Authorization: Bearer <token>`` header are
+    authenticated by the token alone, replacing the user of the session:
+    request.user is the token's TokenUser, or an AnonymousUser if the token
+    is invalid, expired or revoked. Must be listed after
+    AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    keyword = "Bearer"
+    backend_class = TokenBackend
+
+    def __init__(self, get_response):
+        """1.11-style constructor."""
+        self.get_response = get_response
+        self.backend = self.backend_class()
+        self.backend_path = "{}.{}".format(
+            self.backend_class.__module__, self.backend_class.__name__)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """1.11-style implementation."""
+        if self.is_async:
+            return self.__acall__(request)
+
+        token = self.get_token(request)
+        if token is not None:
+            request.user = self.authenticate(request, token)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        """Async implementation, used when running under ASGI."""
+        token = self.get_token(request)
+        if token is not None:
+            # Without a cache, the token version is read from the database,
+            # so check the token on a thread.
+            request.user = await sync_to_async(self.authenticate)(
+                request, token)
+
+            async def auser():
+                return request.user
+
+            request.auser = auser
+        return await self.get_response(request)
+
+    def get_token(self, request):
+        """Return the token of the request's Authorization header, if any."""
+        keyword, _, token = request.META.get(
+            "HTTP_AUTHORIZATION", "").partition(" ")
+        if keyword != self.keyword or not token:
+            return None
+        return token.strip()
+
+    def authenticate(self, request, token):
+        """Return the user of the token, or an AnonymousUser if invalid."""
+        user = self.backend.authenticate(request, token=token)
+        if user is None:
+            metrics.increment("token.rejected")
+            return AnonymousUser()
+        user.backend = self.backend_path
+        return user
+
+
+class SessionIndexMiddleware:
+    """Keep the index of sessions (see sessions.py) in step with their keys.
+
+    Users are indexed against the session they log in to, but a session's
+    key may be cycled later while the user stays logged in, e.g. by
+    update_session_auth_hash() after changing their password. Without this
+    middleware, logging the user out of all their sessions would then miss
+    that session. Must be listed after SessionMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """1.11-style constructor."""
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """1.11-style implementation."""
+        if self.is_async:
+            return self.__acall__(request)
+
+        session_key = _get_session_key(request)
         response = self.get_response(request)
+        if _get_session_key(request) != session_key:
+            sessions.reindex_session(session_key, request.session)
         return response
+
+    async def __acall__(self, request):
+        """Async implementation, used when running under ASGI."""
+        session_key = _get_session_key(request)
+        response = await self.get_response(request)
+        if _get_session_key(request) != session_key:
+            await sync_to_async(sessions.reindex_session)(
+                session_key, request.session)
+        return response
+
+
+class QueryMetricsMiddleware:
+    """Record the number of queries run by each authenticated request.
+
+    The count is sent to the metrics sink (see simple_authentication.metrics)
+    as ``request.queries``; without a sink, requests are passed through
+    untouched. Queries run by middleware placed above this one aren't
+    counted, so list it first to count them all.
+
+    Only supports sync request handling, as the queries of an async request
+    may run on any number of threads (and connections).
+    """
+
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        """1.11-style constructor."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Count the queries run (on any database) to get the response."""
+        if metrics.get_sink() is None:
+            return self.get_response(request)
+
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count))
+            response = self.get_response(request)
+
+        if _get_session_user_id(request) is not None:
+            metrics.observe("request.queries", len(queries))
+        return response
+
+
+def _get_session_user_id(request):
+    """Return the ID of the user logged-in to the session, if any."""
+    session = getattr(request, "session", None)
+    if session is None:
+        return None
+    return session.get(SESSION_KEY)
+
+
+def _get_session_key(request):
+    """Return the key of the request's session, without loading it."""
+    session = getattr(request, "session", None)
+    if session is None:
+        return None
+    return session.session_key
@@ -1,9 +1,13 @@
 """Model definitions for the simple_authentication package."""
 
 from ..models.group import Group
+from ..models.search import UserSearchToken
+from ..models.session import UserSession
 from ..models.user import User
 
 __all__ = [
     "Group",
     "User",
+    "UserSearchToken",
+    "UserSession",
 ]
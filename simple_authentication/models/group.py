@@ -1,7 +1,19 @@
 """Model definitions for collections (or groups) of Users."""
 
 from django.contrib.auth.models import Group as _Group
+from django.utils.translation import ugettext_lazy as _
 
 
 class Group(_Group):
-    """Wrapper around django.contrib.auth's Group model."""
+    """Proxy of django.contrib.auth's Group model.
+
+    A proxy, rather than a subclass with its own table, so that querying
+    groups doesn't join two tables and creating one doesn't write two rows.
+    """
+
+    class Meta:
+        """Meta class definition."""
+
+        proxy = True
+        verbose_name = _("group")
+        verbose_name_plural = _("groups")
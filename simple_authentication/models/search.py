@@ -0,0 +1,40 @@
+"""Model definitions for the token index used to search for users."""
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class UserSearchToken(models.Model):
+    """A searchable token (a suffix of a word) of a user's email or name.
+
+    Only maintained when the token search is enabled; see
+    simple_authentication.search.TokenSearch.
+    """
+
+    class Meta:
+        """Meta class definition."""
+
+        verbose_name = _("user search token")
+        verbose_name_plural = _("user search tokens")
+        unique_together = (
+            ("token", "user"),
+        )
+
+    MAX_LENGTH = 64
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="search_tokens",
+        verbose_name=_("user"),
+    )
+    token = models.CharField(
+        verbose_name=_("token"),
+        max_length=MAX_LENGTH,
+        db_index=True,
+    )
+
+    def __str__(self):
+        """Return a representation of the token as a string."""
+        return self.token
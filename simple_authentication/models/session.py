@@ -0,0 +1,36 @@
+"""Model definitions for the index of the sessions users are logged in to."""
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class UserSession(models.Model):
+    """The key of a session which a user logged in to.
+
+    Written as users log in (and deleted as they log out), so that all the
+    sessions of a set of users can be found, and deleted, without decoding
+    every session; see simple_authentication.sessions.
+    """
+
+    class Meta:
+        """Meta class definition."""
+
+        verbose_name = _("user session")
+        verbose_name_plural = _("user sessions")
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="session_index",
+        verbose_name=_("user"),
+    )
+    session_key = models.CharField(
+        verbose_name=_("session key"),
+        max_length=40,
+        unique=True,
+    )
+
+    def __str__(self):
+        """Return a representation of the session as a string."""
+        return self.session_key
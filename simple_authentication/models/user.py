@@ -5,7 +5,12 @@ from django.db import models
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
+from .. import groups, hashing, metrics
+from ..emails import canonicalize_email
 from ..managers import UserManager
+from ..managers.user import (
+    DISPLAY_NAME_FIELDS, TOKEN_REVOKING_FIELDS, asave, get_display_name,
+)
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -41,6 +46,15 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_index=True,
         help_text=_("The last name of the User.")
     )
+    display_name = models.CharField(
+        verbose_name=_("display name"),
+        max_length=255,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text=_("The full name of the User, or their email if they have "
+                    "no name. Kept in sync automatically."),
+    )
     date_joined = models.DateTimeField(
         verbose_name=_("date joined"),
         default=timezone.now,
@@ -67,14 +81,20 @@ class User(AbstractBaseUser, PermissionsMixin):
                     "ForcePasswordChangeMiddleware is installed."),
     )
 
+    token_version = models.PositiveIntegerField(
+        verbose_name=_("token version"),
+        default=0,
+        editable=False,
+        help_text=_("Incremented whenever the User's password is changed "
+                    "or they're deactivated, revoking their signed tokens."),
+    )
+
     USERNAME_FIELD = "email"
     objects = UserManager()
 
     def __str__(self):
         """Return a representation of the user as a string."""
-        name_parts = [_n for _n in (self.first_name, self.last_name) if _n]
-        name = " ".join(name_parts)
-        return name or self.email
+        return self.get_display_name()
 
     @property
     def username(self):
@@ -93,6 +113,33 @@ class User(AbstractBaseUser, PermissionsMixin):
         """Return the user's full name."""
         return self.name
 
+    def get_display_name(self):
+        """Return the user's full name, or their email if they have none.
+
+        This is the value stored in display_name when the user is saved, and
+        computed in SQL by UserQuerySet.with_display_name().
+        """
+        return get_display_name(self.first_name, self.last_name, self.email)
+
+    def get_group_names(self):
+        """Return the names of the user's groups, from the cache if possible.
+
+        See simple_authentication.groups. The names are kept on the instance
+        too, as its permissions are, so repeated checks cost nothing.
+        """
+        if not hasattr(self, "_group_names_cache"):
+            if self.pk is None:
+                names = frozenset()
+            else:
+                names = frozenset(
+                    groups.get_memberships([self.pk])[self.pk].values())
+            self._group_names_cache = names
+        return self._group_names_cache
+
+    def in_group(self, *names):
+        """Return True if the user belongs to any of the named groups."""
+        return not self.get_group_names().isdisjoint(names)
+
     def get_short_name(self):
         """Return a displayable short name for the user."""
         if self.first_name:
@@ -112,12 +159,57 @@ class User(AbstractBaseUser, PermissionsMixin):
             return self.email
 
     def save(self, *args, **kwargs):
-        """Ensure the user's email is lower-case before writing to the DB."""
+        """Canonicalize the email, and sync the display name, then save.
+
+        Saving a new password (or an inactive user) also increments the
+        token version, revoking the user's signed tokens (see tokens.py).
+        """
         if self.email:  # pragma: no branch
-            self.email = self.email.lower()
+            self.email = canonicalize_email(self.email)
+        self.display_name = self.get_display_name()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and \
+                DISPLAY_NAME_FIELDS.intersection(update_fields):
+            update_fields = kwargs["update_fields"] = \
+                set(update_fields) | {"display_name"}
+
+        if (self._password is not None or not self.is_active) and (
+                update_fields is None or
+                TOKEN_REVOKING_FIELDS.intersection(update_fields)):
+            self.token_version += 1
+            if update_fields is not None:
+                kwargs["update_fields"] = \
+                    set(update_fields) | {"token_version"}
         return super(User, self).save(*args, **kwargs)
 
     def set_password(self, *args, **kwargs):
         """Unset the force password flag."""
         self.force_password_change = False
-        return super(User, self).set_password(*args, **kwargs)
+        with metrics.Timer("user.set_password"):
+            return super(User, self).set_password(*args, **kwargs)
+
+    async def aset_password(self, raw_password):
+        """Async version of set_password(), hashing on a thread pool.
+
+        See simple_authentication.hashing.get_async_executor.
+        """
+        self.force_password_change = False
+        with metrics.Timer("user.set_password"):
+            self.password = await hashing.amake_password(raw_password)
+        self._password = raw_password
+
+    async def acheck_password(self, raw_password):
+        """Async version of check_password(), hashing on a thread pool.
+
+        As check_password() does, saves the password's new hash if the
+        hasher's settings changed since it was set.
+        """
+        async def setter(raw_password):
+            await self.aset_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            await asave(self, update_fields=["password"])
+
+        return await hashing.acheck_password(
+            raw_password, self.password, setter)
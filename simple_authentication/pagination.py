@@ -0,0 +1,182 @@
+"""Keyset pagination, for changelists of large tables.
+
+OFFSET pagination reads (and discards) every row before the requested page,
+so deep pages get slower the further they are into the table. Instead, the
+KeysetPaginator seeks to a page with an indexed range lookup on the
+queryset's ordering, e.g. ``(email, pk) > (last email, last pk)``, starting
+from an *anchor*: the position and sort key of the first row of the page
+the link was followed from.
+"""
+
+import hashlib
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+ANCHOR_VAR = "anchor"
+
+
+def get_keyset(queryset):
+    """Return the queryset's ordering as a keyset, or None if unsuitable.
+
+    The keyset is a list of (field name, descending) pairs. Only orderings
+    of non-null, concrete fields of the model itself, the last of which is
+    unique (so that the ordering is total), are suitable.
+    """
+    opts = queryset.model._meta
+    keyset = []
+    for item in queryset.query.order_by:
+        if not isinstance(item, str) or "__" in item or item == "?":
+            return None
+        name = item.lstrip("-")
+        try:
+            field = opts.pk if name == "pk" else opts.get_field(name)
+        except FieldDoesNotExist:
+            # e.g. an annotation.
+            return None
+        if not field.concrete or field.null or field.is_relation:
+            return None
+        keyset.append((field.attname, item.startswith("-")))
+
+    if not keyset or not opts.get_field(keyset[-1][0]).unique:
+        return None
+    return keyset
+
+
+def seek(keyset, values, backwards=False, inclusive=False):
+    """Return a Q object matching the rows after the given key values.
+
+    That is, the rows after the key in the keyset's order (or before it, if
+    backwards is set), expanded to ``a > x OR (a = x AND b > y) ...`` so
+    that mixed directions are supported.
+    """
+    query = None
+    for index, (name, descending) in enumerate(keyset):
+        lookup = "lt" if descending != backwards else "gt"
+        if inclusive and index == len(keyset) - 1:
+            lookup += "e"
+        equal = {
+            field: value
+            for (field, _), value in zip(keyset[:index], values[:index])
+        }
+        term = Q(**equal) & Q(**{name + "__" + lookup: values[index]})
+        query = term if query is None else query | term
+    return query
+
+
+class KeysetPaginator(Paginator):
+    """Paginator seeking to pages from an anchor, rather than an offset.
+
+    Each page is read with the smallest of these offsets: from the start
+    of the results, from the anchor (forwards or, reversing the ordering,
+    backwards) or, when the count is exact, from the end. As the admin only
+    links to nearby, first and last pages, loading any of them takes the
+    same time whatever the depth; only page numbers entered by hand (i.e.
+    without an anchor) fall back to plain OFFSET pagination.
+
+    Querysets whose ordering isn't a suitable keyset (see get_keyset()) are
+    paginated as usual.
+
+    :param anchor: the anchor of the page the request came from (i.e. the
+        last_anchor of its paginator); invalid anchors are ignored
+    :type anchor: str
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, anchor=None):
+        """Decode the anchor, if it's valid for the queryset."""
+        super(KeysetPaginator, self).__init__(
+            object_list, per_page, orphans, allow_empty_first_page)
+        self.keyset = get_keyset(object_list)
+        self.anchor = None
+        if self.keyset is not None and anchor:
+            self.anchor = self.decode_anchor(anchor)
+        #: The anchor of the last page returned by page(), if any.
+        self.last_anchor = None
+
+    @cached_property
+    def digest(self):
+        """Return a short digest of the queryset's SQL, to validate anchors."""
+        sql, params = self.object_list.query.sql_with_params()
+        return hashlib.md5("{}:{!r}".format(sql, params).encode(
+            "utf-8")).hexdigest()[:8]
+
+    def decode_anchor(self, anchor):
+        """Return the (page number, key values) of the anchor, or None."""
+        try:
+            number, digest, values = anchor.split(":", 2)
+            number = int(number)
+            values = json.loads(values)
+            if len(values) != len(self.keyset):
+                return None
+            opts = self.object_list.model._meta
+            values = [
+                opts.get_field(name).to_python(value)
+                for (name, _), value in zip(self.keyset, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            return None
+        if digest != self.digest:
+            return None
+        return number, values
+
+    def page(self, number):
+        """Return a Page object for the given 1-based page number."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+
+        if self.keyset is None:
+            return self._get_page(
+                self.object_list[bottom:top], number, self)
+
+        objects = self._seek(number, bottom, top)
+        if objects:
+            values = [
+                getattr(objects[0], name) for name, _ in self.keyset
+            ]
+            self.last_anchor = "{}:{}:{}".format(
+                number,
+                self.digest,
+                json.dumps([
+                    value.isoformat() if hasattr(value, "isoformat")
+                    else value
+                    for value in values
+                ]),
+            )
+        return self._get_page(objects, number, self)
+
+    def _seek(self, number, bottom, top):
+        """Return the list of rows between bottom and top, read cheaply."""
+        queryset = self.object_list
+        # (offset, function reading the rows) per way of reading the page.
+        candidates = [
+            (bottom, lambda: list(queryset[bottom:top])),
+        ]
+
+        if not getattr(queryset, "count_estimated", False):
+            count = self.count
+            candidates.append((count - top, lambda: list(reversed(
+                queryset.reverse()[count - top:count - bottom]))))
+
+        if self.anchor is not None:
+            anchor_number, values = self.anchor
+            start = (anchor_number - 1) * self.per_page
+            if number >= anchor_number:
+                following = queryset.filter(
+                    seek(self.keyset, values, inclusive=True))
+                candidates.append((bottom - start, lambda: list(
+                    following[bottom - start:top - start])))
+            else:
+                preceding = queryset.filter(
+                    seek(self.keyset, values, backwards=True)).reverse()
+                candidates.append((start - top, lambda: list(reversed(
+                    preceding[start - top:start - bottom]))))
+
+        _, read = min(candidates, key=lambda candidate: candidate[0])
+        return read()
@@ -0,0 +1,201 @@
+"""Standalone benchmark runner, re-using the settings of run_tests.py.
+
+Runs every module listed in BENCHMARKS, against a test database, and prints
+the mean time taken per operation (and the resulting throughput) for each
+benchmark, or its measurement in other units.
+
+The results may also be written to a JSON file (with --json), and compared
+with those of an earlier run (with --compare): benchmarks which got slower
+(or, for other measurements, larger) by more than the tolerance are reported
+as regressions, and the runner then exits with a non-zero status.
+"""
+
+import argparse
+import datetime
+import importlib
+import inspect
+import json
+import os
+import platform
+import shutil
+import sys
+
+from simple_authentication.run_tests import APP_DIR, SETTINGS
+
+BENCHMARKS = (
+    "simple_authentication.benchmarks.middleware",
+    "simple_authentication.benchmarks.metrics",
+    "simple_authentication.benchmarks.asgi",
+    "simple_authentication.benchmarks.hashing",
+    "simple_authentication.benchmarks.users",
+    "simple_authentication.benchmarks.last_login",
+    "simple_authentication.benchmarks.forms",
+    "simple_authentication.benchmarks.throttling",
+    "simple_authentication.benchmarks.logins",
+    "simple_authentication.benchmarks.backends",
+    "simple_authentication.benchmarks.groups",
+    "simple_authentication.benchmarks.tokens",
+    "simple_authentication.benchmarks.admin",
+    "simple_authentication.benchmarks.search",
+    "simple_authentication.benchmarks.pagination",
+    "simple_authentication.benchmarks.sessions",
+)
+
+# The unit of the results given as a time per operation.
+TIME_UNIT = "s/op"
+
+
+def report(name, result):
+    """Print the result of a single benchmark."""
+    from simple_authentication.benchmarks import Measurement
+
+    if isinstance(result, Measurement):
+        print("{:<40} {:>12.2f} {}".format(name, result.value, result.unit))
+    else:
+        print("{:<40} {:>12.2f} us/op {:>12.0f} ops/s".format(
+            name, result * 1e6, 1 / result))
+
+
+def to_json(results):
+    """Return the results, with information on the environment, as JSON."""
+    import django
+    from simple_authentication.benchmarks import Measurement
+
+    return json.dumps({
+        "created": datetime.datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "platform": platform.platform(),
+        "results": {
+            name: (
+                {"value": result.value, "unit": result.unit}
+                if isinstance(result, Measurement)
+                else {"value": result, "unit": TIME_UNIT}
+            )
+            for name, result in sorted(results.items())
+        },
+    }, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of each result from the baseline's.
+
+    Returns the names of the benchmarks which regressed, i.e. whose value
+    grew by more than the tolerance (a fraction of the baseline's value).
+    """
+    from simple_authentication.benchmarks import Measurement
+
+    regressions = []
+    for name, result in sorted(results.items()):
+        previous = baseline["results"].get(name)
+        if previous is None or not previous["value"]:
+            continue
+        value = result.value if isinstance(result, Measurement) else result
+        change = value / previous["value"] - 1
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        print("{:<40} {:>+11.1f}%{}".format(
+            name, change * 100, "  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def parse_args(argv):
+    """Return the parsed command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Run the simple_authentication benchmarks.")
+    parser.add_argument(
+        "benchmarks", nargs="*", metavar="module",
+        help="Only run these benchmark modules (e.g. admin, search); by "
+             "default, all of them are.")
+    parser.add_argument(
+        "--users", default="10000,100000,1000000",
+        help="Comma-separated user table sizes, for the benchmarks which "
+             "take them (default: %(default)s).")
+    parser.add_argument(
+        "--json", metavar="PATH",
+        help="Write the results to this file, as JSON.")
+    parser.add_argument(
+        "--compare", metavar="PATH",
+        help="Compare the results with those of this JSON file.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="Fraction by which a result may exceed its baseline before it "
+             "is reported as a regression (default: %(default)s).")
+    args = parser.parse_args(argv)
+
+    try:
+        args.users = tuple(int(count) for count in args.users.split(","))
+    except ValueError:
+        parser.error("--users must be a comma-separated list of numbers.")
+    modules = []
+    for name in args.benchmarks:
+        module_name = "simple_authentication.benchmarks." + name
+        if module_name not in BENCHMARKS:
+            parser.error("Unknown benchmark module: {}.".format(name))
+        modules.append(module_name)
+    args.benchmarks = modules or BENCHMARKS
+    return args
+
+
+def run_module(module_name, options):
+    """Run the benchmark module, passing it the options its run() takes."""
+    module = importlib.import_module(module_name)
+    parameters = inspect.signature(module.run).parameters
+    return module.run(**{
+        name: value for name, value in options.items() if name in parameters
+    })
+
+
+def run(argv=None):
+    """Configure Django, create the test database and run the benchmarks."""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    from django.conf import settings
+    settings.configure(**SETTINGS)
+
+    import django
+    if hasattr(django, "setup"):
+        django.setup()
+
+    # As with the tests, the migrations aren't shipped as part of the
+    # package, so generate them (and remove them afterwards).
+    from django.core.management import call_command
+    from django.test.utils import (
+        setup_databases, setup_test_environment, teardown_databases,
+    )
+    call_command("makemigrations", "simple_authentication", verbosity=0)
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+
+    results = {}
+    try:
+        for module_name in args.benchmarks:
+            module_results = run_module(module_name, {
+                "user_counts": args.users,
+            })
+            for name, result in sorted(module_results.items()):
+                report(name, result)
+            results.update(module_results)
+    finally:
+        teardown_databases(databases, verbosity=0)
+        os.remove(os.path.join(APP_DIR, "db.sqlite3"))
+        shutil.rmtree(os.path.join(APP_DIR, "migrations"), ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json_file.write(to_json(results) + "\n")
+
+    if baseline is not None:
+        print()
+        print("Compared with {}:".format(args.compare))
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
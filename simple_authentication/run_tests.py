@@ -15,6 +15,7 @@ sys.path.insert(0, APP_DIR)
 
 # Minimum settings required for the app's tests.
 SETTINGS = {
+    "SECRET_KEY": "simple_authentication-tests",
     "INSTALLED_APPS": (
         "django.contrib.admin",
         "django.contrib.auth",
@@ -26,6 +27,7 @@ SETTINGS = {
     ),
     "AUTH_USER_MODEL": "simple_authentication.User",
     "ROOT_URLCONF": "simple_authentication.tests.urls",
+    "STATIC_URL": "/static/",
     "DATABASES": {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
@@ -39,6 +41,8 @@ SETTINGS = {
         "django.middleware.common.CommonMiddleware",
         "django.middleware.csrf.CsrfViewMiddleware",
         "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "simple_authentication.middleware.SessionIndexMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
         "simple_authentication.middleware.ForcePasswordChangeMiddleware",
     ),
     "TEMPLATES": [{
@@ -47,6 +51,7 @@ SETTINGS = {
         "OPTIONS": {
             "context_processors": [
                 "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
                 "django.template.context_processors.debug",
                 "django.template.context_processors.i18n",
                 "django.template.context_processors.media",
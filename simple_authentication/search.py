@@ -0,0 +1,232 @@
+"""Pluggable search for the user admin changelist.
+
+Django's default admin search runs ``icontains`` over every search field,
+i.e. a leading-wildcard LIKE which can't use an index, so it scans the whole
+user table. The engines below trade some flexibility for indexed lookups;
+the ``SIMPLE_AUTHENTICATION_USER_SEARCH`` setting selects one of them (by
+name, or by the dotted path of a UserSearch subclass).
+"""
+
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .emails import canonicalize_email
+from .models.search import UserSearchToken
+
+# The fields of a user which are searched (and tokenized).
+SEARCH_FIELDS = frozenset((
+    "email",
+    "first_name",
+    "last_name",
+))
+
+WORD_RE = re.compile(r"\w+")
+
+# Sorts after any character found in the fields, so that a prefix can be
+# matched with a range (which, unlike LIKE, uses an index on every database
+# and collation).
+MAX_CHAR = "\uffff"
+
+
+class UserSearch:
+    """Base class of the user search engines.
+
+    An engine filters a queryset of users by a search term, and may keep an
+    index up-to-date as users are saved (see update_index()).
+    """
+
+    def filter(self, queryset, search_term):
+        """Return the users of the queryset matching the search term."""
+        raise NotImplementedError(
+            "Subclasses of UserSearch must implement filter().")
+
+    def update_index(self, users, using=DEFAULT_DB_ALIAS):
+        """Update the index (if any) for the given, saved, users."""
+
+    def filter_terms(self, queryset, search_term, term_filter):
+        """Filter the queryset by each whitespace-separated term in turn.
+
+        As with the admin's default search, users must match every term;
+        term_filter() returns the Q object matching a single term.
+        """
+        for term in search_term.split():
+            queryset = queryset.filter(term_filter(term))
+        return queryset
+
+
+class ContainsSearch(UserSearch):
+    """Django's default search: icontains over each of the fields.
+
+    Finds any substring, but scans the whole table.
+    """
+
+    def filter(self, queryset, search_term):
+        """Return the users whose ID, email or names contain each term."""
+        def term_filter(term):
+            query = Q()
+            for field in SEARCH_FIELDS:
+                query |= Q(**{field + "__icontains": term})
+            if term.isdigit():
+                query |= Q(pk=int(term))
+            return query
+
+        return self.filter_terms(queryset, search_term, term_filter)
+
+
+class PrefixSearch(UserSearch):
+    """Search by exact ID, or by the start of the email or names.
+
+    Each lookup is an indexed range scan: emails are canonical (see
+    simple_authentication.emails), so are matched case-sensitively against
+    the canonical term, while names are matched as typed and capitalized.
+    Terms containing an "@" only match emails.
+    """
+
+    def filter(self, queryset, search_term):
+        """Return the users whose email or names start with each term."""
+        def term_filter(term):
+            query = prefix_filter("email", canonicalize_email(term))
+            if "@" in term:
+                return query
+            for prefix in {term, term.capitalize()}:
+                query |= prefix_filter("first_name", prefix)
+                query |= prefix_filter("last_name", prefix)
+            if term.isdigit():
+                query |= Q(pk=int(term))
+            return query
+
+        return self.filter_terms(queryset, search_term, term_filter)
+
+
+class TokenSearch(UserSearch):
+    """Substring search, by way of an index of the users' words.
+
+    Every suffix of every word of a user's email and names is stored in the
+    UserSearchToken table, so that finding the words containing a term is
+    an indexed prefix search on that table. Users match a term if one of
+    their words contains it or, for terms of several words (e.g.
+    "smith@exam"), if one of the fields of the users found by the term's
+    longest word contains it; terms are also matched exactly against the
+    email and ID.
+
+    The index is maintained as users are saved, and by the bulk operations
+    of UserManager; existing users are indexed with rebuild_index().
+    """
+
+    def filter(self, queryset, search_term):
+        """Return the users with words containing each term's words."""
+        def term_filter(term):
+            query = Q()
+            words = tokenize(term)
+            if words:
+                # Look up the longest (and likely rarest) word in the index,
+                # ignoring the words of email domains, which many users
+                # share.
+                word = max(
+                    tokenize(term.split("@")[0]) or words, key=len,
+                )[:UserSearchToken.MAX_LENGTH]
+                query = Q(pk__in=UserSearchToken.objects.filter(
+                    prefix_filter("token", word),
+                ).values("user_id"))
+            if len(words) > 1:
+                # Check the whole term (e.g. "smith@exam") against the few
+                # candidates found through the index.
+                contains = Q()
+                for field in SEARCH_FIELDS:
+                    contains |= Q(**{field + "__icontains": term})
+                query &= contains
+            query |= Q(email=canonicalize_email(term))
+            if term.isdigit():
+                query |= Q(pk=int(term))
+            return query
+
+        return self.filter_terms(queryset, search_term, term_filter)
+
+    def update_index(self, users, using=DEFAULT_DB_ALIAS):
+        """Replace the indexed tokens of the given users."""
+        users = list(users)
+        if not users:
+            return
+
+        # Users created with bulk_create() may not have their IDs set (e.g.
+        # on SQLite), so find them by their (unique) email.
+        unsaved = {user.email: user for user in users if user.pk is None}
+        if unsaved:
+            model = type(users[0])
+            ids = dict(model._default_manager.using(using).filter(
+                email__in=unsaved,
+            ).values_list("email", "pk"))
+            for email, user in unsaved.items():
+                user.pk = ids.get(email)
+
+        tokens = UserSearchToken.objects.using(using)
+        tokens.filter(user__in=[user.pk for user in users]).delete()
+        tokens.bulk_create([
+            UserSearchToken(user_id=user.pk, token=token)
+            for user in users
+            if user.pk is not None
+            for token in user_tokens(user)
+        ])
+
+    def rebuild_index(self, queryset, chunk_size=1000):
+        """Index every user of the queryset, a chunk at a time."""
+        users = queryset.only(*SEARCH_FIELDS).order_by("pk")
+        last_pk = None
+        while True:
+            chunk = users if last_pk is None else users.filter(pk__gt=last_pk)
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                return
+            self.update_index(chunk, using=queryset.db)
+            last_pk = chunk[-1].pk
+
+
+ENGINES = {
+    "contains": ContainsSearch,
+    "prefix": PrefixSearch,
+    "tokens": TokenSearch,
+}
+
+
+def get_user_search():
+    """Return the search engine selected by the settings.
+
+    Returns None if none is, so that the admin's default search is used.
+    """
+    engine = getattr(settings, "SIMPLE_AUTHENTICATION_USER_SEARCH", None)
+    if engine is None:
+        return None
+    if engine in ENGINES:
+        return ENGINES[engine]()
+    return import_string(engine)()
+
+
+def prefix_filter(field, prefix):
+    """Return a Q object matching values of the field with the prefix."""
+    return Q(**{
+        field + "__gte": prefix,
+        field + "__lt": prefix + MAX_CHAR,
+    })
+
+
+def tokenize(text):
+    """Return the (lower-case) words of the text."""
+    return WORD_RE.findall(text.lower())
+
+
+def user_tokens(user):
+    """Return the set of tokens indexed for the user.
+
+    That is, each suffix of each word of their email and names, truncated
+    to the maximum length of a token.
+    """
+    return {
+        word[start:start + UserSearchToken.MAX_LENGTH]
+        for field in sorted(SEARCH_FIELDS)
+        for word in tokenize(getattr(user, field) or "")
+        for start in range(len(word))
+    }
@@ -0,0 +1,118 @@
+"""Logging users out of all their sessions, through an index of sessions.
+
+Django's session stores can't be searched by user: with the database
+backend, finding a user's sessions means decoding every session. Instead,
+the key of each session a user logs in to is recorded in the UserSession
+table (see simple_authentication.signals), so that the sessions of any set
+of users are found, and deleted, with indexed queries. Keys cycled while
+the user stays logged in (e.g. by update_session_auth_hash() after a
+password change) are followed by the SessionIndexMiddleware.
+"""
+
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.db.models import Exists, OuterRef
+
+from .models.session import UserSession
+
+
+def get_session_store_class():
+    """Return the SessionStore class of the SESSION_ENGINE."""
+    return import_module(settings.SESSION_ENGINE).SessionStore
+
+
+def index_session(user, session):
+    """Record that the user is logged in to the (saved) session."""
+    if session is None or not session.session_key:
+        return
+    UserSession.objects.update_or_create(
+        session_key=session.session_key,
+        defaults={"user_id": user.pk},
+    )
+
+
+def reindex_session(previous_key, session):
+    """Move the session's index entry over to its new (cycled) key.
+
+    e.g. after update_session_auth_hash(), which keeps the user logged in
+    under a new session key. Nothing is indexed unless the previous key
+    was.
+    """
+    if not previous_key or session.session_key in (None, previous_key):
+        return
+    user_id = session.get(SESSION_KEY)
+    indexed = UserSession.objects.filter(session_key=previous_key).delete()[0]
+    if indexed and user_id is not None:
+        UserSession.objects.update_or_create(
+            session_key=session.session_key,
+            defaults={"user_id": user_id},
+        )
+
+
+def unindex_session(session):
+    """Remove the session from the index, e.g. as its user logs out."""
+    if session is not None and session.session_key:
+        UserSession.objects.filter(session_key=session.session_key).delete()
+
+
+def delete_user_sessions(users):
+    """Delete every session the given users are logged in to.
+
+    With the database (or cached database) session backend, the sessions
+    are deleted with a single query, whatever their number; with the cache
+    backend, with a single delete_many(). Other backends delete them one at
+    a time, and cookie-based sessions can't be deleted at all.
+
+    :param users: queryset (or list of IDs) of the users to log out
+    :return: int -- the number of sessions indexed for the users
+    """
+    index = UserSession.objects.filter(user__in=users)
+    store_class = get_session_store_class()
+
+    if issubclass(store_class, DBStore):
+        session_keys = index.values("session_key")
+        if hasattr(store_class, "cache_key_prefix"):
+            # cached_db: the sessions are also cached, by key.
+            session_keys = list(session_keys.values_list(
+                "session_key", flat=True))
+            caches[settings.SESSION_CACHE_ALIAS].delete_many([
+                store_class.cache_key_prefix + key for key in session_keys
+            ])
+        store_class.get_model_class().objects.filter(
+            session_key__in=session_keys,
+        ).delete()
+    else:
+        session_keys = list(index.values_list("session_key", flat=True))
+        if hasattr(store_class, "cache_key_prefix"):
+            caches[settings.SESSION_CACHE_ALIAS].delete_many([
+                store_class.cache_key_prefix + key for key in session_keys
+            ])
+        else:
+            store = store_class()
+            for session_key in session_keys:
+                store.delete(session_key)
+
+    return index.delete()[0]
+
+
+def prune_session_index():
+    """Remove the index entries of sessions which no longer exist.
+
+    e.g. those of expired sessions removed by the clearsessions command,
+    or of sessions whose key was cycled. Only supported with the database
+    (or cached database) session backend; returns the number of entries
+    removed.
+    """
+    store_class = get_session_store_class()
+    if not issubclass(store_class, DBStore):
+        raise NotImplementedError(
+            "Pruning the session index requires a database session backend.")
+
+    sessions = store_class.get_model_class().objects.filter(
+        session_key=OuterRef("session_key"),
+    )
+    return UserSession.objects.filter(~Exists(sessions)).delete()[0]
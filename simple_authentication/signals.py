@@ -0,0 +1,168 @@
+"""Signals, and signal receivers, of the simple_authentication app.
+
+The receivers are connected when the app is ready (see
+apps.SimpleAuthenticationConfig).
+"""
+
+from functools import partial
+
+from django.contrib.auth.models import (
+    Group, Permission, update_last_login as _update_last_login,
+)
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import cache, last_login, sessions
+from .models import Group as ProxyGroup, User
+from .search import SEARCH_FIELDS, get_user_search
+
+# Sent by UserQuerySet.update_in_chunks() after each chunk of users is
+# updated (within its transaction), with the arguments ``pks`` (the IDs of
+# the users updated), ``values`` (the dict of fields set) and ``using``.
+# Unlike post_save, it is sent once per chunk, rather than once per user.
+users_updated = Signal()
+
+
+@receiver(user_logged_in)
+def cache_force_password_change_on_login(sender, user, **kwargs):
+    """Prime the cached force_password_change flag for the user."""
+    if isinstance(user, User):
+        cache.set_force_password_change(user.pk, user.force_password_change)
+
+
+def update_last_login(sender, user, **kwargs):
+    """Update the user's last_login, buffered if enabled (see last_login.py).
+
+    Replaces django.contrib.auth's receiver of the same name (see
+    apps.SimpleAuthenticationConfig), which saves the user at every login.
+    """
+    buffer = last_login.get_buffer()
+    if buffer is None:
+        _update_last_login(sender, user, **kwargs)
+    else:
+        user.last_login = timezone.now()
+        buffer.add(user.pk, user.last_login)
+
+
+@receiver(user_logged_in)
+def index_session_on_login(sender, request, user, **kwargs):
+    """Record the session the user logged in to (see sessions.py)."""
+    sessions.index_session(user, getattr(request, "session", None))
+
+
+@receiver(user_logged_out)
+def unindex_session_on_logout(sender, request, **kwargs):
+    """Remove the session the user logged out of from the index."""
+    sessions.unindex_session(getattr(request, "session", None))
+
+
+@receiver(post_save, sender=User)
+def cache_force_password_change_on_save(sender, instance, update_fields,
+                                        **kwargs):
+    """Update the cached force_password_change flag once committed."""
+    if update_fields is None or "force_password_change" in update_fields:
+        transaction.on_commit(partial(
+            cache.set_force_password_change,
+            instance.pk,
+            instance.force_password_change,
+        ), using=kwargs["using"])
+
+
+@receiver(post_save, sender=User)
+def cache_token_version_on_save(sender, instance, update_fields, **kwargs):
+    """Update the cached token version (see tokens.py) once committed."""
+    if update_fields is None or "token_version" in update_fields:
+        transaction.on_commit(partial(
+            cache.set_many_token_versions,
+            {instance.pk: instance.token_version},
+        ), using=kwargs["using"])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_on_save(sender, instance, **kwargs):
+    """Invalidate the cached copy of the user once committed."""
+    transaction.on_commit(partial(
+        cache.invalidate_users,
+        [instance.pk],
+    ), using=kwargs["using"])
+
+
+@receiver(post_save, sender=User)
+def update_search_index_on_save(sender, instance, update_fields, using,
+                                **kwargs):
+    """Update the user's search index entries, if searched fields changed."""
+    if update_fields is not None and \
+            not SEARCH_FIELDS.intersection(update_fields):
+        return
+    search = get_user_search()
+    if search is not None:
+        search.update_index([instance], using=using)
+
+
+@receiver(post_delete, sender=User)
+def uncache_user_on_delete(sender, instance, **kwargs):
+    """Remove the cached state of a deleted user once committed."""
+    def uncache(user_id):
+        cache.delete_force_password_change(user_id)
+        cache.delete_token_version(user_id)
+        cache.invalidate_users([user_id])
+
+    transaction.on_commit(partial(
+        uncache,
+        instance.pk,
+    ), using=kwargs["using"])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_permissions_on_user_m2m_changed(sender, instance, action,
+                                               reverse, pk_set, using,
+                                               **kwargs):
+    """Invalidate the permissions of the affected users once committed."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        # e.g. user.groups.add(group)
+        invalidate = partial(cache.invalidate_users, [instance.pk])
+    elif pk_set is not None:
+        # e.g. group.user_set.add(user)
+        invalidate = partial(cache.invalidate_users, list(pk_set))
+    else:
+        # e.g. group.user_set.clear(), affecting unknown users.
+        invalidate = cache.invalidate_permissions
+
+    transaction.on_commit(invalidate, using=using)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_permissions_on_group_m2m_changed(sender, action, using,
+                                                **kwargs):
+    """Invalidate all permissions when a group's permissions change."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(cache.invalidate_permissions, using=using)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=ProxyGroup)
+def invalidate_groups_on_group_save(sender, created, using, **kwargs):
+    """Invalidate all cached group memberships when a group is renamed."""
+    if not created:
+        transaction.on_commit(cache.invalidate_permissions, using=using)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=ProxyGroup)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions_on_change(sender, **kwargs):
+    """Invalidate all permissions when a group or permission changes.
+
+    Deleting a group (or permission) removes it from every user, without
+    sending m2m_changed; and superusers have every permission, new ones
+    included.
+    """
+    transaction.on_commit(cache.invalidate_permissions, using=kwargs["using"])
@@ -0,0 +1,161 @@
+"""Tests for simple_authentication.admin.user."""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ...models import UserSession
+
+User = get_user_model()
+
+
+class UserAdminAddTestCase(TestCase):
+    """Tests for adding users with the UserAdmin."""
+
+    url = "/admin/simple_authentication/user/add/"
+    data = {
+        "email": "new@example.com",
+        "first_name": "New",
+        "last_name": "User",
+        "password1": "password",
+        "password2": "password",
+    }
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            password="password",
+        )
+        self.client.force_login(self.admin)
+
+    def test_add_user(self):
+        # Adding a user redirects to their change page.
+        response = self.client.post(self.url, self.data)
+
+        user = User.objects.get(email="new@example.com")
+        self.assertRedirects(
+            response,
+            "/admin/simple_authentication/user/{}/change/".format(user.pk))
+        self.assertTrue(user.check_password("password"))
+
+    def test_add_duplicate_user(self):
+        # If the email was taken by a concurrent request (here, before the
+        # request, which is equivalent as the form no longer checks before
+        # saving), the form is redisplayed with the duplicate_email error.
+        User.objects.create_user(email="new@example.com")
+
+        response = self.client.post(
+            self.url, dict(self.data, email="New@Example.com"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "A user with that email already exists.")
+        self.assertContains(response, 'value="New@Example.com"')
+        form = response.context["adminform"].form
+        self.assertTrue(form.is_bound)
+        self.assertEqual(list(form.errors), ["email"])
+        self.assertEqual(
+            User.objects.filter(email="new@example.com").count(), 1)
+
+
+class UserAdminChangeTestCase(TestCase):
+    """Tests for changing users with the UserAdmin."""
+
+    def test_change_to_duplicate_email(self):
+        # Taking another user's email redisplays the form with an error.
+        admin = User.objects.create_superuser(
+            email="admin@example.com",
+            password="password",
+        )
+        user = User.objects.create_user(email="user@example.com")
+        self.client.force_login(admin)
+
+        response = self.client.post(
+            "/admin/simple_authentication/user/{}/change/".format(user.pk),
+            {
+                "email": "admin@example.com",
+                "date_joined_0": "2018-01-01",
+                "date_joined_1": "00:00:00",
+                "is_active": "on",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "A user with that email already exists.")
+        user.refresh_from_db()
+        self.assertEqual(user.email, "user@example.com")
+
+
+class UserAdminActionsTestCase(TestCase):
+    """Tests for the bulk actions of the UserAdmin."""
+
+    url = "/admin/simple_authentication/user/"
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            password="password",
+        )
+        self.users = [
+            User.objects.create_user(email="{}@example.com".format(i))
+            for i in range(3)
+        ]
+        self.client.force_login(self.admin)
+
+    def run_action(self, action, users):
+        return self.client.post(self.url, {
+            "action": action,
+            "_selected_action": [user.pk for user in users],
+        }, follow=True)
+
+    def test_force_password_change(self):
+        # The selected users are flagged, and counted in the message.
+        response = self.run_action("force_password_change", self.users[:2])
+
+        self.assertContains(
+            response, "2 users were flagged to change their password.")
+        self.assertEqual(
+            list(User.objects.filter(force_password_change=True)),
+            self.users[:2])
+
+    def test_deactivate_and_reactivate(self):
+        # The selected users are deactivated (and reactivated), except the
+        # current user.
+        self.run_action("deactivate", self.users + [self.admin])
+        self.assertEqual(
+            list(User.objects.filter(is_active=False).order_by("pk")),
+            self.users)
+
+        response = self.run_action("reactivate", self.users[:1])
+        self.assertContains(response, "1 user was reactivated.")
+        self.assertEqual(User.objects.filter(is_active=False).count(), 2)
+
+    def test_grant_and_revoke_staff(self):
+        # The selected users' staff status is granted (and revoked), except
+        # that of the current user.
+        self.run_action("grant_staff", self.users)
+        self.assertEqual(User.objects.filter(is_staff=True).count(), 4)
+
+        self.run_action("revoke_staff", self.users + [self.admin])
+        self.assertEqual(
+            list(User.objects.filter(is_staff=True)), [self.admin])
+
+    def test_logout(self):
+        # The selected users are logged out of their sessions, except the
+        # current user.
+        other_client = self.client_class()
+        other_client.force_login(self.users[0])
+
+        response = self.run_action("logout", [self.users[0], self.admin])
+        self.assertContains(response, "1 session was logged out.")
+        self.assertEqual(
+            list(UserSession.objects.values_list("user", flat=True)),
+            [self.admin.pk])
+
+    def test_select_across(self):
+        # Selecting every user runs a single action over the whole table.
+        self.client.post(self.url, {
+            "action": "force_password_change",
+            "select_across": "1",
+            "_selected_action": [self.users[0].pk],
+        })
+        self.assertEqual(
+            User.objects.filter(force_password_change=True).count(), 4)
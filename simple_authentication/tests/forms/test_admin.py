@@ -0,0 +1,117 @@
+"""Tests for simple_authentication.forms.admin."""
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ...forms.admin import UserChangeForm, UserCreationForm
+
+User = get_user_model()
+
+
+class UserCreationFormTestCase(TestCase):
+    """Tests for UserCreationForm."""
+
+    data = {
+        "email": "Test@Example.com",
+        "first_name": "Test",
+        "last_name": "User",
+        "password1": "password",
+        "password2": "password",
+    }
+
+    def test_save_single_write(self):
+        # The form is validated without querying, and saved with a single
+        # INSERT (in a savepoint).
+        form = UserCreationForm(data=self.data)
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid())
+        with self.assertNumQueries(3):
+            user = form.save()
+
+        user.refresh_from_db()
+        self.assertEqual(user.email, "test@example.com")
+        self.assertTrue(user.check_password("password"))
+
+    def test_concurrent_duplicates(self):
+        # Of two forms submitted concurrently with the same email (i.e. both
+        # validated before either is saved), the second one to be saved
+        # raises the IntegrityError, which is turned into the duplicate_email
+        # error without any query; the transaction remains usable.
+        first = UserCreationForm(data=self.data)
+        second = UserCreationForm(data=dict(
+            self.data, email="test@example.COM"))
+        self.assertTrue(first.is_valid())
+        self.assertTrue(second.is_valid())
+
+        first.save()
+        with self.assertRaises(IntegrityError) as context:
+            second.save()
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                second.add_duplicate_email_error(context.exception))
+
+        self.assertEqual(
+            second.errors["email"],
+            [str(UserCreationForm.error_messages["duplicate_email"])])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_other_integrity_errors(self):
+        # Other integrity errors aren't reported as duplicate emails.
+        form = UserCreationForm(data=self.data)
+        self.assertFalse(form.add_duplicate_email_error(IntegrityError(
+            "NOT NULL constraint failed: simple_authentication_user.id")))
+        self.assertTrue(form.is_valid())
+
+
+class UserChangeFormTestCase(TestCase):
+    """Tests for UserChangeForm."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="password",
+        )
+        User.objects.create_user(email="other@example.com")
+
+    def get_form(self, email):
+        """Return a change form for the user, changing their email."""
+        data = {
+            "email": email,
+            "password": self.user.password,
+            "date_joined": self.user.date_joined,
+            "is_active": True,
+        }
+        return UserChangeForm(data=data, instance=self.user)
+
+    def test_save_single_write(self):
+        # The form is validated without querying for duplicate emails, and
+        # the user saved with a single UPDATE (the other queries are those
+        # of the groups and permissions).
+        form = self.get_form("New@Example.com")
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid(), form.errors)
+        with CaptureQueriesContext(connection) as queries:
+            form.save()
+
+        writes = [
+            query["sql"] for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(len(writes), 1)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@example.com")
+
+    def test_duplicate_email(self):
+        # Taking another user's email gives the duplicate_email error.
+        form = self.get_form("Other@Example.com")
+        self.assertTrue(form.is_valid())
+        with self.assertRaises(IntegrityError) as context:
+            form.save()
+
+        self.assertTrue(form.add_duplicate_email_error(context.exception))
+        self.assertIn("email", form.errors)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "test@example.com")
@@ -0,0 +1,77 @@
+"""Tests for simple_authentication.forms.auth."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from ... import metrics
+from ...forms import AdminAuthenticationForm, AuthenticationForm
+
+User = get_user_model()
+
+
+@override_settings(
+    SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_RATES={"email": (2, 60)},
+    SIMPLE_AUTHENTICATION_METRICS="memory",
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class LoginThrottleTestCase(TestCase):
+    """Tests for the throttling of AuthenticationForm."""
+
+    form_class = AuthenticationForm
+
+    def setUp(self):
+        cache.clear()
+        metrics.get_sink().reset()
+        self.user = User.objects.create_superuser(
+            email="test@example.com", password="password")
+        self.factory = RequestFactory()
+
+    def login(self, password):
+        form = self.form_class(self.factory.post("/"), data={
+            "username": "test@example.com",
+            "password": password,
+        })
+        form.is_valid()
+        return form
+
+    def test_throttles_failed_logins(self):
+        # Once the limit of failed logins is reached, even the right
+        # password is rejected, without authenticating.
+        for _ in range(2):
+            form = self.login("wrong")
+            self.assertEqual(
+                form.non_field_errors().as_data()[0].code, "invalid_login")
+
+        with mock.patch("django.contrib.auth.forms.authenticate") as auth:
+            form = self.login("password")
+
+        self.assertFalse(auth.called)
+        self.assertEqual(
+            form.non_field_errors().as_data()[0].code, "throttled")
+        self.assertEqual(
+            metrics.get_sink().get_count("login.throttled", scope="email"), 1)
+
+    def test_success_resets_failures(self):
+        # A successful login forgets the email's failed logins.
+        self.login("wrong")
+        self.assertTrue(self.login("password").is_valid())
+        self.login("wrong")
+
+        self.assertTrue(self.login("password").is_valid())
+
+    @override_settings(SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_RATES=None)
+    def test_disabled(self):
+        # Without rates, failed logins aren't throttled.
+        for _ in range(3):
+            self.login("wrong")
+
+        self.assertTrue(self.login("password").is_valid())
+
+
+class AdminLoginThrottleTestCase(LoginThrottleTestCase):
+    """Tests for the throttling of AdminAuthenticationForm."""
+
+    form_class = AdminAuthenticationForm
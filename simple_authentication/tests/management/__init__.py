@@ -0,0 +1 @@
+"""Tests for the simple_authentication.management module."""
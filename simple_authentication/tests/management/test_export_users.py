@@ -0,0 +1,85 @@
+"""Tests for the export_users management command."""
+
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class ExportUsersTestCase(TestCase):
+    """Tests for the export_users command."""
+
+    def setUp(self):
+        self.staff = User.objects.create_superuser(
+            email="staff@example.com",
+            password="password",
+        )
+        self.user = User.objects.create_user(
+            email="user@example.com",
+            password="password",
+        )
+        self.inactive = User.objects.create_user(
+            email="inactive@example.com",
+            password="password",
+        )
+        User.objects.filter(pk=self.user.pk).update(force_password_change=True)
+        User.objects.filter(pk=self.inactive.pk).update(is_active=False)
+
+        editors = Group.objects.create(name="Editors")
+        admins = Group.objects.create(name="Admins")
+        self.staff.groups.add(editors, admins)
+        self.user.groups.add(editors)
+
+    def call(self, *args, **kwargs):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            "export_users", *args, stdout=stdout, stderr=stderr, **kwargs)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_exports_csv(self):
+        # Users are exported as CSV, with their groups' names.
+        stdout, stderr = self.call()
+
+        rows = list(csv.DictReader(io.StringIO(stdout)))
+        self.assertEqual(
+            [row["email"] for row in rows],
+            ["staff@example.com", "user@example.com", "inactive@example.com"])
+        self.assertEqual(rows[0]["groups"], "Admins|Editors")
+        self.assertEqual(rows[1]["force_password_change"], "True")
+        self.assertEqual(rows[2]["is_active"], "False")
+        self.assertIn("Exported 3 users", stderr)
+
+    def test_exports_jsonl(self):
+        # Users are exported as JSON Lines, with their groups' names.
+        stdout, _ = self.call(format="jsonl")
+
+        rows = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual(rows[0]["groups"], ["Admins", "Editors"])
+        self.assertEqual(rows[2]["groups"], [])
+        self.assertIs(rows[1]["force_password_change"], True)
+
+    def test_filters(self):
+        # Filters mirror those of the user admin.
+        def emails(**options):
+            stdout, _ = self.call(format="jsonl", **options)
+            return [json.loads(line)["email"] for line in stdout.splitlines()]
+
+        self.assertEqual(
+            emails(is_active=False), ["inactive@example.com"])
+        self.assertEqual(
+            emails(is_staff=True, is_superuser=True), ["staff@example.com"])
+        self.assertEqual(
+            emails(joined_before=timezone.now() - timezone.timedelta(1)), [])
+
+    def test_fetches_groups_per_chunk(self):
+        # Users are streamed by a single query, and group membership is
+        # fetched with one query per chunk of users, rather than per user.
+        with self.assertNumQueries(3):
+            self.call(chunk_size=2)
@@ -0,0 +1,163 @@
+"""Tests for the import_users management command."""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+User = get_user_model()
+
+CSV = """email,password,first_name,force_password_change
+one@example.com,password,One,1
+TWO@example.com,,Two,
+not-an-email,password,,
+three@example.com,password,Three,maybe
+"""
+
+
+@override_settings(PASSWORD_HASHERS=[
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+])
+class ImportUsersTestCase(TestCase):
+    """Tests for the import_users command."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def call(self, *args, **kwargs):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            "import_users", *args, stdout=stdout, stderr=stderr, **kwargs)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imports_csv(self):
+        # Valid rows are imported, with values converted as per the model's
+        # fields; invalid rows are reported with their line number.
+        stdout, stderr = self.call(self.write("users.csv", CSV), workers=1)
+
+        one = User.objects.get(email="one@example.com")
+        self.assertTrue(one.check_password("password"))
+        self.assertTrue(one.force_password_change)
+        two = User.objects.get(email="two@example.com")
+        self.assertFalse(two.has_usable_password())
+        self.assertEqual(User.objects.count(), 2)
+
+        self.assertIn("2 created, 0 updated, 0 skipped, 2 rejected", stdout)
+        self.assertIn("Line 4:", stderr)
+        self.assertIn("Line 5: force_password_change:", stderr)
+
+    def test_imports_jsonl_from_stdin(self):
+        # JSON Lines can be streamed from stdin.
+        lines = "\n".join([
+            json.dumps({"email": "one@example.com", "first_name": "One"}),
+            "",
+            "not json",
+            json.dumps({"email": "two@example.com"}),
+        ])
+
+        with mock.patch("sys.stdin", io.StringIO(lines)):
+            stdout, stderr = self.call("-", format="jsonl", workers=1)
+
+        self.assertEqual(User.objects.count(), 2)
+        self.assertIn("Line 3:", stderr)
+
+    def test_rejects_values_failing_validation(self):
+        # Values the fields' validators refuse (e.g. names longer than
+        # their max_length) reject their row alone.
+        lines = "\n".join([
+            json.dumps({"email": "one@example.com", "first_name": "x" * 500}),
+            json.dumps({"email": "two@example.com", "password": "p" * 200}),
+        ])
+
+        with mock.patch("sys.stdin", io.StringIO(lines)):
+            stdout, stderr = self.call("-", format="jsonl", workers=1)
+
+        self.assertIn("1 created, 0 updated, 0 skipped, 1 rejected", stdout)
+        self.assertIn("Line 1: first_name:", stderr)
+        user = User.objects.get()
+        self.assertEqual(user.email, "two@example.com")
+        self.assertTrue(user.check_password("p" * 200))
+
+    def test_updates_existing_users(self):
+        # Existing users are updated (matched by email), keeping their
+        # password unless a new one is given.
+        user = User.objects.create_user(
+            email="one@example.com",
+            password="password",
+        )
+        path = self.write("users.jsonl", json.dumps({
+            "email": "One@Example.com",
+            "first_name": "Updated",
+        }))
+
+        stdout, _ = self.call(path, workers=1)
+
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, "Updated")
+        self.assertTrue(user.check_password("password"))
+        self.assertIn("0 created, 1 updated", stdout)
+
+    def test_resumes_from_checkpoint(self):
+        # Rows already committed, as recorded by the checkpoint, are not
+        # imported again.
+        path = self.write("users.jsonl", "\n".join(
+            json.dumps({"email": "{}@example.com".format(i)})
+            for i in range(5)
+        ))
+        checkpoint = self.write("checkpoint.json", json.dumps({"rows": 3}))
+
+        stdout, _ = self.call(
+            path, checkpoint=checkpoint, batch_size=1, workers=1)
+
+        self.assertEqual(
+            sorted(User.objects.values_list("email", flat=True)),
+            ["3@example.com", "4@example.com"])
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f), {"rows": 5})
+
+    def test_checkpoint_only_records_committed_batches(self):
+        # A batch that fails to commit isn't recorded, so it is retried when
+        # the import is resumed.
+        path = self.write("users.jsonl", "\n".join(
+            json.dumps({"email": "{}@example.com".format(i)})
+            for i in range(4)
+        ))
+        checkpoint = os.path.join(self.directory, "checkpoint.json")
+        original = User.objects.bulk_create_users.__func__
+        calls = []
+
+        def bulk_create_users(manager, *args, **kwargs):
+            calls.append(None)
+            if len(calls) == 2:
+                raise RuntimeError("Database went away.")
+            return original(manager, *args, **kwargs)
+
+        with mock.patch.object(
+                type(User.objects), "bulk_create_users", bulk_create_users):
+            with self.assertRaises(RuntimeError):
+                self.call(path, checkpoint=checkpoint, batch_size=2,
+                          workers=1)
+
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f), {"rows": 2})
+
+        self.call(path, checkpoint=checkpoint, batch_size=2, workers=1)
+        self.assertEqual(User.objects.count(), 4)
+
+    def test_unknown_format_raises_command_error(self):
+        # The format must be given when it can't be guessed.
+        with self.assertRaises(CommandError):
+            self.call(self.write("users.txt", CSV))
@@ -0,0 +1,100 @@
+"""Tests for the tune_password_hashers management command."""
+
+import io
+from unittest import mock
+
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, BCryptSHA256PasswordHasher, MD5PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+
+from ...management.commands.tune_password_hashers import (
+    cost_parameters, per_core, percentile,
+)
+
+
+class FastPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 hasher cheap enough to benchmark in the tests."""
+
+    iterations = 100
+
+
+@override_settings(PASSWORD_HASHERS=[
+    "simple_authentication.tests.management.test_tune_password_hashers."
+    "FastPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+])
+class TunePasswordHashersTestCase(SimpleTestCase):
+    """Tests for the tune_password_hashers command."""
+
+    def call(self, *args, **kwargs):
+        stdout = io.StringIO()
+        call_command(
+            "tune_password_hashers", "--samples", "3", *args, stdout=stdout,
+            **kwargs)
+        return stdout.getvalue()
+
+    def test_reports_timings_and_recommendation(self):
+        # Each setting's timings are reported, and the costliest setting
+        # within the budget is recommended, with its throughput.
+        stdout = self.call("--target-ms", "10000")
+
+        for iterations in (25, 50, 100, 200, 400):
+            self.assertIn("iterations={} ".format(iterations), stdout)
+        self.assertIn("MD5PasswordHasher (md5):", stdout)
+        self.assertIn("No tunable cost; not recommended.", stdout)
+
+        recommendations = stdout.split("Recommendations")[1]
+        self.assertIn(
+            "FastPBKDF2PasswordHasher: iterations=400 (p50", recommendations)
+        self.assertIn("hashes/s per core", recommendations)
+        self.assertNotIn("MD5", recommendations)
+
+    def test_no_setting_within_budget(self):
+        # Nothing is recommended if no setting fits the budget.
+        stdout = self.call("--target-ms", "0")
+
+        self.assertIn("(over budget)", stdout)
+        self.assertIn("None of the settings fits the budget.", stdout)
+        self.assertIn("None.", stdout.split("Recommendations")[1])
+
+    def test_algorithm_filter(self):
+        # Hashers may be selected by algorithm.
+        stdout = self.call("--algorithm", "md5")
+        self.assertNotIn("pbkdf2", stdout)
+
+        with self.assertRaises(CommandError):
+            self.call("--algorithm", "unknown")
+
+
+class HelpersTestCase(SimpleTestCase):
+    """Tests for the command's helper functions."""
+
+    def test_cost_parameters(self):
+        # Costs range around the hasher's defaults.
+        self.assertEqual(
+            cost_parameters(FastPBKDF2PasswordHasher()),
+            [{"iterations": n} for n in (25, 50, 100, 200, 400)])
+        self.assertEqual(
+            cost_parameters(BCryptSHA256PasswordHasher()),
+            [{"rounds": n} for n in (10, 11, 12, 13, 14)])
+        self.assertEqual(cost_parameters(MD5PasswordHasher()), [])
+
+    def test_percentile(self):
+        # Percentiles are computed with the nearest-rank method.
+        values = list(range(100, 0, -1))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+
+    def test_per_core(self):
+        # Hashers using several cores per hash (up to the host's number of
+        # cores) do fewer hashes per second on each core.
+        with mock.patch("os.cpu_count", return_value=16):
+            self.assertEqual(per_core(0.1, MD5PasswordHasher()), 10)
+            self.assertEqual(per_core(0.1, Argon2PasswordHasher()), 1.25)
+        with mock.patch("os.cpu_count", return_value=2):
+            self.assertEqual(per_core(0.1, Argon2PasswordHasher()), 5)
+        self.assertEqual(per_core(0, MD5PasswordHasher()), float("inf"))
@@ -1,9 +1,14 @@
 """Tests for simple_authentication.managers.user."""
 
+from asgiref.sync import sync_to_async
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.utils.timezone import now, timedelta
 
+from ...managers.user import CREATED, REJECTED, SKIPPED
+from ...signals import users_updated
+
 User = get_user_model()
 
 
@@ -21,6 +26,18 @@ class CreateUserTestCase(TestCase):
         self.assertEqual(user.email, "test@example.com")
         self.assertTrue(user.check_password("password"))
 
+    def test_create_user_canonicalizes_email(self):
+        # create_user() stores the canonical (lower-case) form of the email,
+        # which get_by_natural_key() finds whatever the input's case.
+        user = User.objects.create_user(
+            email="Test@EXAMPLE.com",
+            password="password",
+        )
+
+        self.assertEqual(user.email, "test@example.com")
+        self.assertEqual(
+            User.objects.get_by_natural_key("TEST@example.com"), user)
+
     def test_create_user_saves_to_database(self):
         # create_user() will create a new User object to the database.
         user = User.objects.create_user(
@@ -255,3 +272,271 @@ class CreateSuperUserTestCase(TestCase):
         )
 
         self.assertTrue(user.is_active)
+
+
+class ACreateUserTestCase(TestCase):
+    """Tests for UserManager.acreate_user and acreate_superuser."""
+
+    async def test_acreate_user_creates_regular_user(self):
+        # acreate_user() creates a user, exactly as create_user() does.
+        user = await User.objects.acreate_user(
+            email="Test@EXAMPLE.com",
+            password="password",
+            first_name="Thomas",
+        )
+
+        self.assertEqual(user.email, "test@example.com")
+        self.assertEqual(user.display_name, "Thomas")
+        self.assertFalse(user.is_staff)
+        self.assertTrue(user.check_password("password"))
+        self.assertTrue(await sync_to_async(
+            User.objects.filter(pk=user.pk).exists)())
+
+    async def test_acreate_superuser_creates_superuser(self):
+        # acreate_superuser() creates a staff user with all permissions.
+        user = await User.objects.acreate_superuser(
+            email="test@example.com",
+            password="password",
+        )
+
+        self.assertTrue(user.is_staff)
+        self.assertTrue(user.is_superuser)
+
+    async def test_acreate_user_raises_value_error_with_invalid_email(self):
+        # acreate_user() raises a ValueError if the email is falsy.
+        with self.assertRaises(ValueError):
+            await User.objects.acreate_user(email="", password="password")
+
+
+class BulkCreateUsersTestCase(TestCase):
+    """Tests for UserManager.bulk_create_users."""
+
+    def test_bulk_create_users_creates_users(self):
+        # bulk_create_users() creates a user for each row, with a usable
+        # password.
+        results = User.objects.bulk_create_users([
+            {"email": "one@example.com", "password": "password"},
+            {"email": "two@example.com", "password": "password"},
+        ])
+
+        self.assertEqual([r.status for r in results], [CREATED, CREATED])
+        self.assertEqual(User.objects.count(), 2)
+        user = User.objects.get(email="two@example.com")
+        self.assertTrue(user.check_password("password"))
+        self.assertTrue(user.is_active)
+        self.assertFalse(user.is_staff)
+        self.assertFalse(user.is_superuser)
+
+    def test_bulk_create_users_lowercases_email(self):
+        # bulk_create_users() normalizes emails like User.save().
+        results = User.objects.bulk_create_users([
+            {"email": "Test@EXAMPLE.com", "password": "password"},
+        ])
+
+        self.assertEqual(results[0].email, "test@example.com")
+        self.assertTrue(User.objects.filter(email="test@example.com").exists())
+
+    def test_bulk_create_users_skips_duplicates(self):
+        # bulk_create_users() skips rows whose email is already taken, by an
+        # existing user or an earlier row (in any batch).
+        User.objects.create_user(email="one@example.com", password="password")
+
+        results = User.objects.bulk_create_users([
+            {"email": "ONE@example.com"},
+            {"email": "two@example.com"},
+            {"email": "three@example.com"},
+            {"email": "Two@example.com"},
+        ], batch_size=2)
+
+        self.assertEqual(
+            [r.status for r in results], [SKIPPED, CREATED, CREATED, SKIPPED])
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_bulk_create_users_rejects_invalid_rows(self):
+        # bulk_create_users() rejects rows with a missing or invalid email,
+        # unknown fields or protected fields.
+        results = User.objects.bulk_create_users([
+            {"password": "password"},
+            {"email": "not-an-email"},
+            {"email": "one@example.com", "test": "value"},
+            {"email": "two@example.com", "is_staff": True},
+            {"email": "three@example.com"},
+        ])
+
+        self.assertEqual(
+            [r.status for r in results],
+            [REJECTED, REJECTED, REJECTED, REJECTED, CREATED])
+        self.assertTrue(all(r.error for r in results[:4]))
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_bulk_create_users_accepts_extra_fields(self):
+        # bulk_create_users() allows extra model values to be set.
+        User.objects.bulk_create_users([{
+            "email": "test@example.com",
+            "first_name": "Thomas",
+            "force_password_change": True,
+        }])
+
+        user = User.objects.get()
+        self.assertEqual(user.first_name, "Thomas")
+        self.assertTrue(user.force_password_change)
+        self.assertFalse(user.has_usable_password())
+
+    def test_bulk_create_users_stores_hashed_passwords(self):
+        # bulk_create_users() stores already-hashed passwords as-is, and
+        # rejects hashes it doesn't recognise.
+        password_hash = make_password("password")
+
+        results = User.objects.bulk_create_users([
+            {"email": "one@example.com", "password_hash": password_hash},
+            {"email": "two@example.com", "password_hash": "unknown$hash"},
+        ])
+
+        self.assertEqual([r.status for r in results], [CREATED, REJECTED])
+        self.assertEqual(User.objects.get().password, password_hash)
+
+    def test_bulk_create_users_uses_one_query_per_batch(self):
+        # bulk_create_users() checks for existing users with one query, and
+        # inserts with another (plus the transaction's savepoint).
+        rows = [{"email": "{}@example.com".format(i)} for i in range(10)]
+
+        with self.assertNumQueries(4):
+            User.objects.bulk_create_users(rows)
+
+
+class UserQuerySetTestCase(TestCase):
+    """Tests for the display names kept by UserQuerySet."""
+
+    def setUp(self):
+        self.rows = [
+            ("both@example.com", "Thomas", "Power", "Thomas Power"),
+            ("first@example.com", "Thomas", "", "Thomas"),
+            ("last@example.com", "", "Power", "Power"),
+            ("none@example.com", "", "", "none@example.com"),
+        ]
+
+    def test_with_display_name(self):
+        # with_display_name() computes the same display names in SQL as in
+        # Python, and they can be ordered by.
+        User.objects.bulk_create([
+            User(email=email, first_name=first_name, last_name=last_name)
+            for email, first_name, last_name, _ in self.rows
+        ])
+
+        users = User.objects.with_display_name().order_by(
+            "computed_display_name")
+        self.assertEqual(
+            [user.computed_display_name for user in users],
+            sorted(name for _, _, _, name in self.rows))
+        for user in users:
+            self.assertEqual(user.computed_display_name, str(user))
+
+    def test_bulk_create_stores_display_names(self):
+        # bulk_create() (as used by bulk_create_users()) stores the display
+        # names, which it can't compute in save().
+        User.objects.bulk_create_users([
+            {"email": email, "first_name": first_name, "last_name": last_name}
+            for email, first_name, last_name, _ in self.rows
+        ])
+
+        self.assertEqual(
+            sorted(User.objects.values_list("display_name", flat=True)),
+            sorted(name for _, _, _, name in self.rows))
+
+    def test_bulk_update_stores_display_names(self):
+        # bulk_update() updates the display names of users whose names or
+        # email are updated.
+        user = User.objects.create_user(email="test@example.com")
+        user.first_name = "Thomas"
+        User.objects.bulk_update([user], ["first_name"])
+
+        self.assertEqual(User.objects.get().display_name, "Thomas")
+
+    def test_update_stores_display_names(self):
+        # update() updates the display names from the new values of the
+        # names or email, in the same query.
+        for email, first_name, last_name, _ in self.rows:
+            User.objects.create_user(
+                email=email, first_name=first_name, last_name=last_name)
+
+        with self.assertNumQueries(1):
+            User.objects.filter(last_name="Power").update(last_name="Smith")
+        self.assertEqual(
+            dict(User.objects.values_list("email", "display_name")), {
+                "both@example.com": "Thomas Smith",
+                "first@example.com": "Thomas",
+                "last@example.com": "Smith",
+                "none@example.com": "none@example.com",
+            })
+
+    def test_update_display_names(self):
+        # update_display_names() recomputes the stored display names, e.g.
+        # of users written without the app's code.
+        user = User.objects.create_user(
+            email="test@example.com", first_name="Thomas")
+        User.objects.filter(pk=user.pk).update(display_name="")
+
+        self.assertEqual(User.objects.update_display_names(), 1)
+        self.assertEqual(User.objects.get().display_name, "Thomas")
+
+
+class UpdateInChunksTestCase(TestCase):
+    """Tests for the bulk updates of UserQuerySet."""
+
+    def setUp(self):
+        User.objects.bulk_create([
+            User(email="{}@example.com".format(i)) for i in range(5)
+        ])
+        self.signals = []
+
+        def receiver(sender, pks, values, using, **kwargs):
+            self.signals.append((pks, values))
+
+        users_updated.connect(receiver, sender=User)
+        self.addCleanup(users_updated.disconnect, receiver, sender=User)
+
+    def test_update_in_chunks(self):
+        # Users are updated a chunk at a time, with a signal per chunk.
+        pks = list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+        count = User.objects.force_password_change(chunk_size=2)
+
+        self.assertEqual(count, 5)
+        self.assertEqual(User.objects.filter(
+            force_password_change=True).count(), 5)
+        self.assertEqual(self.signals, [
+            (pks[0:2], {"force_password_change": True}),
+            (pks[2:4], {"force_password_change": True}),
+            (pks[4:5], {"force_password_change": True}),
+        ])
+
+    def test_update_in_chunks_queries(self):
+        # Each chunk costs a SELECT of its IDs and an UPDATE (plus the
+        # chunk's transaction), however many users it holds.
+        with self.assertNumQueries(5):
+            User.objects.deactivate(chunk_size=1000)
+
+    def test_unchanged_users_are_skipped(self):
+        # Users already set to the values are neither updated nor signalled.
+        User.objects.filter(email__in=[
+            "0@example.com", "1@example.com",
+        ]).update(is_staff=True)
+
+        self.assertEqual(User.objects.grant_staff(), 3)
+        self.assertEqual(len(self.signals[0][0]), 3)
+        self.assertEqual(User.objects.grant_staff(), 0)
+        self.assertEqual(User.objects.filter(is_staff=True).count(), 5)
+
+    def test_bulk_updates(self):
+        # Each bulk update sets its field on the users of the queryset.
+        users = User.objects.filter(email="0@example.com")
+
+        users.deactivate()
+        self.assertFalse(users.get().is_active)
+        users.reactivate()
+        self.assertTrue(users.get().is_active)
+        users.grant_staff()
+        self.assertTrue(users.get().is_staff)
+        users.revoke_staff()
+        self.assertFalse(users.get().is_staff)
+        self.assertEqual(User.objects.filter(is_staff=True).count(), 0)
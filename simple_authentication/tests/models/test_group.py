@@ -0,0 +1,20 @@
+"""Tests for simple_authentication.models.group."""
+
+from django.contrib.auth.models import Group as AuthGroup
+from django.test import TestCase
+
+from ...models import Group
+
+
+class GroupTestCase(TestCase):
+    """Tests for the Group proxy model."""
+
+    def test_group_is_stored_in_auth_group_only(self):
+        # Creating a group writes a single row, to auth's table, and
+        # querying groups doesn't join another table.
+        with self.assertNumQueries(1):
+            group = Group.objects.create(name="Editors")
+
+        self.assertEqual(AuthGroup.objects.get().pk, group.pk)
+        self.assertNotIn(
+            "JOIN", str(Group.objects.filter(name="Editors").query))
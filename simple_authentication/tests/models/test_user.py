@@ -1,7 +1,11 @@
 """Tests for simple_authentication.models.user."""
 
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from ...models import Group
 
 User = get_user_model()
 
@@ -143,6 +147,26 @@ class GetLongNameTestCase(UserTestCase):
         self.assertEqual(self.user.get_long_name(), "test@example.com")
 
 
+class InGroupTestCase(UserTestCase):
+    """Tests for User.in_group() and get_group_names()."""
+
+    def test_in_group(self):
+        # in_group() checks whether the user belongs to any of the named
+        # groups, querying them only once per instance.
+        self.user.groups.add(Group.objects.create(name="Editors"))
+        user = User.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(user.in_group("Admins", "Editors"))
+            self.assertFalse(user.in_group("Admins"))
+        self.assertEqual(user.get_group_names(), {"Editors"})
+
+    def test_unsaved_user_has_no_groups(self):
+        # Unsaved users belong to no groups.
+        with self.assertNumQueries(0):
+            self.assertFalse(User(email="new@example.com").in_group("Admins"))
+
+
 class SaveTestCase(UserTestCase):
     """Tests for User.save()."""
 
@@ -153,6 +177,21 @@ class SaveTestCase(UserTestCase):
 
         self.assertEqual(self.user.email, "test@example.com")
 
+    def test_save_stores_display_name(self):
+        # save() stores the user's display name, also when only some fields
+        # are saved.
+        self.assertEqual(
+            User.objects.get().display_name, "Thomas Power")
+
+        self.user.first_name = ""
+        self.user.save(update_fields=["first_name"])
+        self.assertEqual(User.objects.get().display_name, "Power")
+
+        self.user.last_name = ""
+        self.user.save()
+        self.assertEqual(
+            User.objects.get().display_name, "test@example.com")
+
 
 class SetPasswordTestCase(UserTestCase):
     """Tests for User.set_password()."""
@@ -163,3 +202,35 @@ class SetPasswordTestCase(UserTestCase):
         self.user.set_password("password")
 
         self.assertFalse(self.user.force_password_change)
+
+    async def test_aset_password_sets_password(self):
+        # aset_password() hashes the password (off the event loop), and
+        # sets the force_password_change flag to False.
+        self.user.force_password_change = True
+        await self.user.aset_password("new password")
+
+        self.assertTrue(self.user.check_password("new password"))
+        self.assertFalse(self.user.force_password_change)
+
+
+class ACheckPasswordTestCase(UserTestCase):
+    """Tests for User.acheck_password()."""
+
+    async def test_acheck_password(self):
+        # acheck_password() checks the password, as check_password() does.
+        self.assertTrue(await self.user.acheck_password("password"))
+        self.assertFalse(await self.user.acheck_password("wrong"))
+
+    @override_settings(PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ])
+    async def test_acheck_password_upgrades_hash(self):
+        # A correct password hashed by an outdated hasher is saved with the
+        # preferred hasher.
+        self.user.password = make_password("password", hasher="md5")
+        await sync_to_async(self.user.save)()
+
+        self.assertTrue(await self.user.acheck_password("password"))
+        user = await sync_to_async(User.objects.get)(pk=self.user.pk)
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
@@ -0,0 +1,339 @@
+"""Tests for simple_authentication.backends."""
+
+import time
+
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+
+from .. import cache
+from ..backends import (
+    CachedPermissionBackend, CachedUserBackend, aauthenticate,
+)
+
+User = get_user_model()
+
+
+@override_settings(AUTHENTICATION_BACKENDS=[
+    "simple_authentication.backends.EmailBackend",
+])
+class EmailBackendTestCase(TestCase):
+    """Tests for EmailBackend."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="password",
+        )
+
+    def test_authenticate_canonicalizes_email(self):
+        # authenticate() finds the user whatever the case (or surrounding
+        # whitespace) of the given email, with a single query.
+        with self.assertNumQueries(1):
+            user = authenticate(
+                username=" Test@EXAMPLE.com ", password="password")
+
+        self.assertEqual(user, self.user)
+
+    def test_authenticate_accepts_email_kwarg(self):
+        # authenticate() accepts the email under the USERNAME_FIELD name.
+        user = authenticate(email="test@example.com", password="password")
+        self.assertEqual(user, self.user)
+
+    def test_authenticate_rejects_wrong_password(self):
+        # authenticate() returns None for a wrong password.
+        user = authenticate(username="test@example.com", password="wrong")
+        self.assertIsNone(user)
+
+    def test_authenticate_rejects_unknown_email(self):
+        # authenticate() returns None for an unknown email.
+        user = authenticate(username="other@example.com", password="password")
+        self.assertIsNone(user)
+
+    def test_authenticate_rejects_inactive_user(self):
+        # authenticate() returns None for an inactive user.
+        self.user.is_active = False
+        self.user.save()
+
+        user = authenticate(username="test@example.com", password="password")
+        self.assertIsNone(user)
+
+    async def test_aauthenticate(self):
+        # aauthenticate() finds the user by their canonical email, and
+        # checks their password, without blocking the event loop.
+        user = await aauthenticate(
+            username=" Test@EXAMPLE.com ", password="password")
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(
+            user.backend, "simple_authentication.backends.EmailBackend")
+
+    async def test_aauthenticate_rejects_invalid_credentials(self):
+        # aauthenticate() returns None for a wrong password or unknown
+        # email, and signals the failed login as authenticate() does.
+        receiver = mock.Mock()
+        user_login_failed.connect(receiver)
+        self.addCleanup(user_login_failed.disconnect, receiver)
+
+        self.assertIsNone(await aauthenticate(
+            username="test@example.com", password="wrong"))
+        self.assertIsNone(await aauthenticate(
+            username="other@example.com", password="password"))
+        self.assertEqual(receiver.call_count, 2)
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        "django.contrib.auth.backends.ModelBackend",
+    ])
+    async def test_aauthenticate_runs_sync_backends(self):
+        # Backends without aauthenticate() are run on a thread.
+        user = await aauthenticate(
+            username="test@example.com", password="password")
+        self.assertEqual(user, self.user)
+
+
+@override_settings(
+    SIMPLE_AUTHENTICATION_CACHE="default",
+    AUTHENTICATION_BACKENDS=[
+        "simple_authentication.backends.CachedUserBackend",
+    ],
+)
+class CachedUserBackendTestCase(TestCase):
+    """Tests for CachedUserBackend."""
+
+    def setUp(self):
+        default_cache.clear()
+        self.backend = CachedUserBackend()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="password",
+        )
+
+    def test_get_user_caches_user(self):
+        # get_user() only queries the database on a miss.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    @override_settings(SIMPLE_AUTHENTICATION_CACHE=None)
+    def test_get_user_without_cache(self):
+        # get_user() always queries the database if caching is disabled.
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.backend.get_user(self.user.pk)
+
+    def test_get_user_handles_unknown_and_inactive_users(self):
+        # get_user() returns None for unknown or inactive users.
+        self.assertIsNone(self.backend.get_user(self.user.pk + 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_save_invalidates_user(self):
+        # Saving the user (e.g. after set_password()) invalidates the copy.
+        self.backend.get_user(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("new password")
+            self.user.save()
+
+        user = self.backend.get_user(self.user.pk)
+        self.assertTrue(user.check_password("new password"))
+
+    def test_delete_invalidates_user(self):
+        # Deleting the user invalidates the copy.
+        user_id = self.user.pk
+        self.backend.get_user(user_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertIsNone(self.backend.get_user(user_id))
+
+    def test_ignores_copies_of_earlier_versions(self):
+        # A copy written for an earlier version of the user (e.g. by a
+        # request racing with an update) is ignored.
+        cache.invalidate_users([self.user.pk])
+        default_cache.set(
+            cache.USER_KEY.format(self.user.pk), (0, None, self.user))
+
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+    def test_refreshes_copy_early_once(self):
+        # Copies due for a refresh are reloaded by a single request; others
+        # keep using the copy in the meantime.
+        self.backend.get_user(self.user.pk)
+        user_key = cache.USER_KEY.format(self.user.pk)
+        version, _, user = default_cache.get(user_key)
+        default_cache.set(user_key, (version, time.time() - 1, user))
+
+        default_cache.add(cache.USER_LOCK_KEY.format(self.user.pk), True)
+        with self.assertNumQueries(0):
+            self.backend.get_user(self.user.pk)
+
+        default_cache.delete(cache.USER_LOCK_KEY.format(self.user.pk))
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+        self.assertGreater(default_cache.get(user_key)[1], time.time())
+
+    def test_waits_for_request_loading_user(self):
+        # On a miss, requests don't cache the user while another request
+        # holds the lock to load them.
+        default_cache.add(cache.USER_LOCK_KEY.format(self.user.pk), True)
+
+        self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        self.assertIsNone(
+            default_cache.get(cache.USER_KEY.format(self.user.pk)))
+
+    def test_saves_queries_per_request(self):
+        # Once cached, requests don't load the user from the database: only
+        # the session is read.
+        self.client.force_login(self.user)
+        self.client.get("/admin/")
+
+        with self.assertNumQueries(1):
+            self.client.get("/admin/")
+
+
+@override_settings(
+    SIMPLE_AUTHENTICATION_CACHE="default",
+    AUTHENTICATION_BACKENDS=[
+        "simple_authentication.backends.CachedPermissionBackend",
+    ],
+)
+class CachedPermissionBackendTestCase(TestCase):
+    """Tests for CachedPermissionBackend (and PermissionCacheMixin)."""
+
+    def setUp(self):
+        default_cache.clear()
+        self.backend = CachedPermissionBackend()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="password",
+        )
+        self.group = Group.objects.create(name="Editors")
+        self.add_user = Permission.objects.get(codename="add_user")
+        self.change_user = Permission.objects.get(codename="change_user")
+
+    def has_perm(self, perm):
+        """Check a permission of a fresh copy of the user, as per request."""
+        user = User.objects.get(pk=self.user.pk)
+        return self.backend.has_perm(user, perm)
+
+    def test_caches_permissions(self):
+        # Once cached, checking permissions doesn't query the database.
+        user = User.objects.get(pk=self.user.pk)
+        self.backend.has_perm(user, "simple_authentication.add_user")
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                self.backend.has_perm(user, "simple_authentication.add_user"))
+            self.assertEqual(self.backend.get_all_permissions(user), set())
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        "simple_authentication.backends.CachedPermissionBackend",
+    ])
+    def test_caches_group_permissions(self):
+        # The permissions of the user's groups (as checked by the admin) are
+        # cached along with the others.
+        self.group.permissions.add(self.change_user)
+        self.user.groups.add(self.group)
+        User.objects.get(pk=self.user.pk).get_group_permissions()
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                user.get_group_permissions(),
+                {"simple_authentication.change_user"})
+            self.assertTrue(
+                user.has_perm("simple_authentication.change_user"))
+
+    @override_settings(SIMPLE_AUTHENTICATION_CACHE=None)
+    def test_without_cache(self):
+        # Permissions are loaded from the database if caching is disabled.
+        for _ in range(2):
+            user = User.objects.get(pk=self.user.pk)
+            with self.assertNumQueries(2):
+                self.backend.has_perm(user, "simple_authentication.add_user")
+
+    def test_user_permissions_invalidate(self):
+        # Giving the user a permission (or taking it away) invalidates their
+        # permissions.
+        self.assertFalse(self.has_perm("simple_authentication.add_user"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(self.add_user)
+        self.assertTrue(self.has_perm("simple_authentication.add_user"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_user.user_set.remove(self.user)
+        self.assertFalse(self.has_perm("simple_authentication.add_user"))
+
+    def test_group_membership_invalidates(self):
+        # Adding the user to a group (from either side) invalidates their
+        # permissions, as does clearing the group.
+        self.group.permissions.add(self.change_user)
+        self.assertFalse(self.has_perm("simple_authentication.change_user"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.group)
+        self.assertTrue(self.has_perm("simple_authentication.change_user"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.user_set.clear()
+        self.assertFalse(self.has_perm("simple_authentication.change_user"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.user_set.add(self.user)
+        self.assertTrue(self.has_perm("simple_authentication.change_user"))
+
+    def test_group_permissions_invalidate(self):
+        # Changing (or deleting) a group invalidates its members' permissions.
+        self.user.groups.add(self.group)
+        self.assertFalse(self.has_perm("simple_authentication.change_user"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.change_user)
+        self.assertTrue(self.has_perm("simple_authentication.change_user"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.delete()
+        self.assertFalse(self.has_perm("simple_authentication.change_user"))
+
+    def test_user_changes_invalidate(self):
+        # Saving the user (e.g. to make them a superuser) invalidates their
+        # permissions.
+        self.assertFalse(self.has_perm("simple_authentication.add_user"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_superuser = True
+            self.user.save()
+        self.assertTrue(self.has_perm("simple_authentication.add_user"))
+
+    def test_ignores_sets_of_earlier_generations(self):
+        # A set written before the generation was bumped (e.g. by a request
+        # racing with a change to a group) is ignored.
+        self.has_perm("simple_authentication.add_user")
+        cache.invalidate_permissions()
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(2):
+            self.backend.has_perm(user, "simple_authentication.add_user")
+
+    def test_inactive_users_have_no_permissions(self):
+        # Inactive users have no permissions, whatever is cached.
+        self.user.user_permissions.add(self.add_user)
+        self.user.is_active = False
+
+        self.assertFalse(
+            self.backend.has_perm(self.user, "simple_authentication.add_user"))
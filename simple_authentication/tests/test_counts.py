@@ -0,0 +1,103 @@
+"""Tests for simple_authentication.counts."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as default_cache
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..counts import estimate_count, with_estimated_counts
+
+User = get_user_model()
+
+
+class EstimateCountTestCase(TestCase):
+    """Tests for estimate_count()."""
+
+    def test_estimate_count_from_statistics(self):
+        # Estimates are read from the statistics, where there are any.
+        for i in range(3):
+            User.objects.create_user(email="user{}@example.com".format(i))
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("DROP TABLE IF EXISTS sqlite_stat1")
+            self.assertIsNone(estimate_count(User, "default"))
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.assertEqual(estimate_count(User, "default"), 3)
+
+
+@override_settings(
+    SIMPLE_AUTHENTICATION_CACHE="default",
+    SIMPLE_AUTHENTICATION_ADMIN_COUNT_THRESHOLD=1000,
+)
+@mock.patch("simple_authentication.counts.estimate_count", return_value=5000)
+class EstimatedCountQuerySetTestCase(TestCase):
+    """Tests for with_estimated_counts()."""
+
+    def setUp(self):
+        default_cache.clear()
+        User.objects.create_user(email="active@example.com")
+        User.objects.create_user(email="inactive@example.com")
+        User.objects.filter(email="inactive@example.com").update(
+            is_active=False)
+
+    def test_estimates_whole_table(self, estimate_count):
+        # The count of the whole table is estimated past the threshold.
+        queryset = with_estimated_counts(User.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(queryset.count(), 5000)
+        self.assertTrue(queryset.count_estimated)
+
+    @override_settings(SIMPLE_AUTHENTICATION_ADMIN_COUNT_THRESHOLD=10000)
+    def test_counts_small_tables(self, estimate_count):
+        # The count of a table below the threshold is exact.
+        queryset = with_estimated_counts(User.objects.all())
+        self.assertEqual(queryset.count(), 2)
+        self.assertFalse(queryset.count_estimated)
+
+    def test_caches_filtered_counts(self, estimate_count):
+        # Filtered counts are exact, and cached.
+        queryset = with_estimated_counts(User.objects.filter(is_active=True))
+        with self.assertNumQueries(1):
+            self.assertEqual(queryset.count(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                with_estimated_counts(
+                    User.objects.filter(is_active=True)).count(),
+                1)
+        self.assertEqual(
+            with_estimated_counts(
+                User.objects.filter(is_active=False)).count(),
+            1)
+        self.assertFalse(queryset.count_estimated)
+
+    def test_clones_keep_estimating(self, estimate_count):
+        # Querysets derived from an estimating queryset estimate, too.
+        queryset = with_estimated_counts(User.objects.all())
+        self.assertIs(with_estimated_counts(queryset), queryset)
+        self.assertEqual(queryset.order_by("email").count(), 5000)
+
+    def test_changelist(self, estimate_count):
+        # The user admin's changelist shows estimated counts, unless exact
+        # counts are asked for.
+        admin = User.objects.create_superuser(
+            email="admin@example.com",
+            password="password",
+        )
+        self.client.force_login(admin)
+        url = "/admin/simple_authentication/user/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.context["cl"].result_count, 5000)
+        self.assertContains(response, "Counts are estimated.")
+
+        response = self.client.get(url, {"exact_count": "1"})
+        self.assertEqual(response.context["cl"].result_count, 3)
+        self.assertNotContains(response, "Counts are estimated.")
+
+        response = self.client.get(url, {"is_active__exact": "0"})
+        self.assertEqual(response.context["cl"].result_count, 1)
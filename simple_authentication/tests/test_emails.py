@@ -0,0 +1,72 @@
+"""Tests for simple_authentication.emails."""
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from ..emails import backfill_canonical_emails, canonicalize_email
+
+User = get_user_model()
+
+
+class CanonicalizeEmailTestCase(SimpleTestCase):
+    """Tests for canonicalize_email()."""
+
+    def test_canonicalize_email_lowercases_and_strips(self):
+        # canonicalize_email() lower-cases the whole email (not only the
+        # domain) and strips surrounding whitespace.
+        self.assertEqual(
+            canonicalize_email(" Test@EXAMPLE.com\n"), "test@example.com")
+
+    def test_canonicalize_email_handles_none(self):
+        # canonicalize_email() returns an empty string for None.
+        self.assertEqual(canonicalize_email(None), "")
+
+
+class BackfillCanonicalEmailsTestCase(TestCase):
+    """Tests for backfill_canonical_emails()."""
+
+    def setUp(self):
+        for i in range(5):
+            User.objects.create_user(
+                email="user{}@example.com".format(i),
+                password="password",
+            )
+        # Simulate rows written without going through User.save().
+        User.objects.filter(email="user1@example.com").update(
+            email="User1@Example.com")
+        User.objects.filter(email="user3@example.com").update(
+            email="USER3@example.com")
+        User.objects.filter(email="user4@example.com").update(
+            email="User0@example.com")
+
+    def test_backfill_canonical_emails(self):
+        # Non-canonical emails are rewritten, in chunks; emails conflicting
+        # with an existing row are reported and left unchanged.
+        updated, conflicts = backfill_canonical_emails(User, chunk_size=2)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(
+            conflicts, [User.objects.get(email="User0@example.com").pk])
+        self.assertEqual(
+            sorted(User.objects.values_list("email", flat=True)), [
+                "User0@example.com",
+                "user0@example.com",
+                "user1@example.com",
+                "user2@example.com",
+                "user3@example.com",
+            ])
+
+    def test_backfill_updates_display_names(self):
+        # Users without a name are displayed by their canonical email;
+        # users with one keep it.
+        User.objects.filter(email="USER3@example.com").update(
+            first_name="Three")
+
+        backfill_canonical_emails(User)
+
+        self.assertEqual(
+            User.objects.get(email="user1@example.com").display_name,
+            "user1@example.com")
+        self.assertEqual(
+            User.objects.get(email="user3@example.com").display_name,
+            "Three")
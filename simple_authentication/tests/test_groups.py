@@ -0,0 +1,94 @@
+"""Tests for simple_authentication.groups."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+
+from ..groups import get_memberships
+from ..models import Group
+
+User = get_user_model()
+
+
+@override_settings(SIMPLE_AUTHENTICATION_CACHE="default")
+class GetMembershipsTestCase(TestCase):
+    """Tests for get_memberships() (and User.in_group)."""
+
+    def setUp(self):
+        default_cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="password",
+        )
+        self.editors = Group.objects.create(name="Editors")
+
+    def in_group(self, name):
+        """Check a group of a fresh copy of the user, as per request."""
+        return User.objects.get(pk=self.user.pk).in_group(name)
+
+    def test_caches_memberships(self):
+        # Once cached, the memberships of any number of users are read
+        # without querying the database.
+        other = User.objects.create_user(email="other@example.com")
+        self.user.groups.add(self.editors)
+        get_memberships([self.user.pk, other.pk])
+
+        with self.assertNumQueries(0):
+            memberships = get_memberships([self.user.pk, other.pk])
+        self.assertEqual(memberships, {
+            self.user.pk: {self.editors.pk: "Editors"},
+            other.pk: {},
+        })
+
+    def test_loads_misses_with_one_query(self):
+        # Users missing from the cache are loaded together.
+        other = User.objects.create_user(email="other@example.com")
+
+        with self.assertNumQueries(1):
+            get_memberships([self.user.pk, other.pk])
+
+    @override_settings(SIMPLE_AUTHENTICATION_CACHE=None)
+    def test_without_cache(self):
+        # Memberships are loaded from the database if caching is disabled.
+        self.user.groups.add(self.editors)
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    get_memberships([self.user.pk]),
+                    {self.user.pk: {self.editors.pk: "Editors"}},
+                )
+
+    def test_membership_changes_invalidate(self):
+        # Adding the user to a group (from either side) or removing them
+        # invalidates their memberships, as does clearing the group.
+        self.assertFalse(self.in_group("Editors"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.editors)
+        self.assertTrue(self.in_group("Editors"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editors.user_set.clear()
+        self.assertFalse(self.in_group("Editors"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editors.user_set.add(self.user)
+        self.assertTrue(self.in_group("Editors"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.editors)
+        self.assertFalse(self.in_group("Editors"))
+
+    def test_group_changes_invalidate(self):
+        # Renaming (or deleting) a group invalidates its members' groups.
+        self.user.groups.add(self.editors)
+        self.assertTrue(self.in_group("Editors"))
+
+        self.editors.name = "Writers"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editors.save()
+        self.assertTrue(self.in_group("Writers"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editors.delete()
+        self.assertFalse(self.in_group("Writers"))
@@ -0,0 +1,111 @@
+"""Tests for simple_authentication.hashing."""
+
+import threading
+from unittest import mock
+
+from django.contrib.auth.hashers import (
+    check_password, is_password_usable, make_password,
+)
+from django.test import SimpleTestCase, override_settings
+
+from ..hashing import (
+    HashedPassword, PasswordHashingEngine, acheck_password,
+    amake_password, get_async_executor, hash_passwords,
+)
+
+
+@override_settings(PASSWORD_HASHERS=[
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+])
+class PasswordHashingEngineTestCase(SimpleTestCase):
+    """Tests for PasswordHashingEngine."""
+
+    def test_hash_passwords_hashes_raw_passwords(self):
+        # hash_passwords() hashes raw passwords in-process, in order.
+        hashes = hash_passwords(["one", "two"], workers=1)
+
+        self.assertTrue(check_password("one", hashes[0]))
+        self.assertTrue(check_password("two", hashes[1]))
+
+    def test_hash_passwords_uses_worker_processes(self):
+        # hash_passwords() spreads batches larger than the chunk size over
+        # the worker processes, preserving the order.
+        passwords = [str(i) for i in range(5)]
+        with PasswordHashingEngine(workers=2, chunk_size=2) as engine:
+            hashes = engine.hash_passwords(passwords)
+            self.assertIsNotNone(engine._executor)
+
+        for password, password_hash in zip(passwords, hashes):
+            self.assertTrue(check_password(password, password_hash))
+
+    def test_hash_passwords_keeps_hashed_passwords(self):
+        # hash_passwords() returns already-hashed passwords unchanged.
+        password_hash = hash_passwords(["password"], workers=1)[0]
+
+        hashes = hash_passwords([HashedPassword(password_hash), "password"])
+        self.assertEqual(hashes[0], password_hash)
+        self.assertNotEqual(hashes[1], password_hash)
+
+    def test_hash_passwords_rejects_unknown_hashed_passwords(self):
+        # hash_passwords() raises a ValueError for hashes no configured
+        # hasher recognises.
+        with self.assertRaises(ValueError):
+            hash_passwords([HashedPassword("unknown$hash")])
+
+    def test_hash_passwords_handles_none(self):
+        # hash_passwords() gives an unusable password for None.
+        password_hash = hash_passwords([None])[0]
+
+        self.assertFalse(is_password_usable(password_hash))
+
+    def test_does_not_start_workers_for_small_batches(self):
+        # Batches no larger than the chunk size are hashed in-process.
+        with PasswordHashingEngine(workers=2, chunk_size=2) as engine:
+            engine.hash_passwords(["one", "two"])
+            self.assertIsNone(engine._executor)
+
+
+@override_settings(PASSWORD_HASHERS=[
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+])
+class AsyncHashingTestCase(SimpleTestCase):
+    """Tests for the async hashing functions."""
+
+    async def test_amake_password(self):
+        # amake_password() hashes on the executor's threads.
+        threads = []
+
+        def make(*args):
+            threads.append(threading.current_thread().name)
+            return make_password(*args)
+
+        with mock.patch("simple_authentication.hashing.make_password", make):
+            password_hash = await amake_password("password")
+
+        self.assertTrue(check_password("password", password_hash))
+        self.assertTrue(threads[0].startswith("simple_authentication"))
+
+    @override_settings(PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+        "django.contrib.auth.hashers.UnsaltedMD5PasswordHasher",
+    ])
+    async def test_acheck_password_upgrades_with_setter(self):
+        # acheck_password() awaits the setter only for correct passwords
+        # whose hash needs upgrading.
+        setter = mock.AsyncMock()
+        outdated = make_password("password", hasher="unsalted_md5")
+
+        self.assertFalse(await acheck_password("wrong", outdated, setter))
+        self.assertFalse(setter.called)
+        self.assertTrue(await acheck_password("password", outdated, setter))
+        setter.assert_awaited_once_with("password")
+
+    def test_executor_is_bounded_by_setting(self):
+        # The executor has as many threads as the setting says, and is
+        # replaced when it changes.
+        with self.settings(SIMPLE_AUTHENTICATION_ASYNC_HASHING_WORKERS=3):
+            executor = get_async_executor()
+            self.assertEqual(executor._max_workers, 3)
+            self.assertIs(get_async_executor(), executor)
+
+        self.assertIsNot(get_async_executor(), executor)
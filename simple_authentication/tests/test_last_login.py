@@ -0,0 +1,207 @@
+"""Tests for simple_authentication.last_login."""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.db import OperationalError
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from .. import last_login
+from ..last_login import LastLoginBuffer
+from ..run_tests import APP_DIR
+
+User = get_user_model()
+
+
+class LastLoginBufferTestCase(TestCase):
+    """Tests for LastLoginBuffer."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create(email="{}@example.com".format(i))
+            for i in range(3)
+        ]
+        self.buffer = LastLoginBuffer(interval=3600, size=10)
+        self.addCleanup(self.buffer.close)
+
+    def test_flush_updates_users_in_one_query(self):
+        # The buffered times are written with a single UPDATE, and
+        # forgotten.
+        now = timezone.now()
+        for user in self.users:
+            self.buffer.add(user.pk, now)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(len(self.buffer), 0)
+        for user in self.users:
+            user.refresh_from_db()
+            self.assertEqual(user.last_login, now)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buffer.flush(), 0)
+
+    def test_keeps_latest_time(self):
+        # Repeated logins of a user are coalesced, keeping the latest.
+        now = timezone.now()
+        user = self.users[0]
+        self.buffer.add(user.pk, now)
+        self.buffer.add(user.pk, now - timedelta(minutes=1))
+        self.buffer.flush()
+
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, now)
+
+    def test_flushes_when_full(self):
+        # Once the size is reached, the buffer is flushed at once.
+        self.buffer.size = 3
+        now = timezone.now()
+        for user in self.users:
+            self.buffer.add(user.pk, now)
+
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(
+            User.objects.filter(last_login=now).count(), 3)
+
+    def test_full_buffer_flush_errors(self):
+        # A database error while flushing a full buffer is logged, without
+        # failing the login; the times are kept for the next flush.
+        self.buffer.size = 3
+        now = timezone.now()
+        with mock.patch.object(
+                User._default_manager, "bulk_update",
+                side_effect=OperationalError("database is locked")), \
+                self.assertLogs(last_login.logger, "ERROR"):
+            for user in self.users:
+                self.buffer.add(user.pk, now)
+
+        self.assertEqual(len(self.buffer), 3)
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(
+            User.objects.filter(last_login=now).count(), 3)
+
+    def test_flushes_every_interval(self):
+        # The background thread flushes the buffer every interval.
+        self.buffer.interval = 0.01
+        flushed = threading.Event()
+        self.buffer.flush = flushed.set
+        self.buffer.add(self.users[0].pk, timezone.now())
+
+        self.assertTrue(flushed.wait(timeout=5))
+
+
+class UpdateLastLoginTestCase(TestCase):
+    """Tests for the buffered update of last_login as users log in."""
+
+    def setUp(self):
+        self.user = User.objects.create(email="test@example.com")
+        self.request = RequestFactory().get("/")
+
+    def login(self):
+        user_logged_in.send(
+            sender=User, request=self.request, user=self.user)
+
+    def test_updates_immediately_by_default(self):
+        # Without a flush interval, last_login is saved as Django does.
+        self.login()
+
+        self.assertIsNotNone(User.objects.get().last_login)
+
+    @override_settings(SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_INTERVAL=3600)
+    def test_buffers_updates(self):
+        # With a flush interval, last_login is set on the user, but only
+        # written as the buffer is flushed.
+        with self.assertNumQueries(0):
+            self.login()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertIsNone(User.objects.get().last_login)
+
+        last_login.get_buffer().flush()
+        self.assertEqual(User.objects.get().last_login, self.user.last_login)
+
+    def test_flushes_on_settings_change(self):
+        # Buffered times are written when the buffer is replaced.
+        with self.settings(
+                SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_INTERVAL=3600):
+            self.login()
+            self.assertIsNone(User.objects.get().last_login)
+
+        self.assertIsNotNone(User.objects.get().last_login)
+
+
+# Script logging users in with buffered updates, then exiting without any
+# explicit flush.
+SHUTDOWN_SCRIPT = """
+import sys
+sys.path.insert(0, {app_dir!r})
+
+from django.conf import settings
+from simple_authentication.run_tests import SETTINGS
+
+settings.configure(**dict(
+    SETTINGS,
+    DATABASES={{"default": {{
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": {database!r},
+    }}}},
+    SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_INTERVAL=3600,
+))
+
+import django
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.core.management import call_command
+
+call_command("migrate", verbosity=0)
+User = get_user_model()
+for i in range(50):
+    user = User.objects.create(email="{{}}@example.com".format(i))
+    user_logged_in.send(sender=User, request=None, user=user)
+
+# Nothing is written until the process exits.
+assert not User.objects.filter(last_login__isnull=False).exists()
+"""
+
+
+class ShutdownTestCase(TestCase):
+    """Tests that buffered times are written as the process exits."""
+
+    def test_no_logins_lost_on_clean_shutdown(self):
+        # A process exiting cleanly writes every buffered time.
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "db.sqlite3")
+            subprocess.run([
+                sys.executable, "-c", textwrap.dedent(SHUTDOWN_SCRIPT).format(
+                    app_dir=os.path.dirname(APP_DIR), database=database),
+            ], check=True)
+
+            with sqlite3.connect(database) as connection:
+                counts = connection.execute(
+                    "SELECT COUNT(*), COUNT(last_login) "
+                    "FROM simple_authentication_user").fetchone()
+        self.assertEqual(counts, (50, 50))
+
+    def test_flush_at_exit(self):
+        # The atexit handler flushes (and closes) the current buffer.
+        user = User.objects.create(email="test@example.com")
+        with self.settings(
+                SIMPLE_AUTHENTICATION_LAST_LOGIN_FLUSH_INTERVAL=3600):
+            buffer = last_login.get_buffer()
+            buffer.add(user.pk, timezone.now())
+
+            last_login.flush_at_exit()
+            self.assertEqual(len(buffer), 0)
+            self.assertTrue(buffer._stopped)
+        self.assertIsNotNone(User.objects.get().last_login)
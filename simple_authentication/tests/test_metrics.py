@@ -0,0 +1,187 @@
+"""Tests for simple_authentication.metrics."""
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from .. import metrics
+from ..middleware import QueryMetricsMiddleware
+
+User = get_user_model()
+
+
+class RecordingSink(metrics.MetricsSink):
+    """Sink referenced by its dotted path in the tests below."""
+
+    def increment(self, name, value=1, tags=None):
+        pass
+
+    def observe(self, name, value, tags=None):
+        pass
+
+
+class GetSinkTestCase(TestCase):
+    """Tests for get_sink()."""
+
+    def test_disabled_by_default(self):
+        # Without the setting, no sink is used and metrics are dropped.
+        self.assertIsNone(metrics.get_sink())
+        metrics.increment("test.counter")
+        with metrics.Timer("test.timer"):
+            pass
+
+    @override_settings(SIMPLE_AUTHENTICATION_METRICS="memory")
+    def test_sink_by_name(self):
+        # Sinks shipped with the app are selected by name, and the same
+        # instance is returned until the setting changes.
+        sink = metrics.get_sink()
+        self.assertIsInstance(sink, metrics.InMemorySink)
+        self.assertIs(metrics.get_sink(), sink)
+
+        with self.settings(SIMPLE_AUTHENTICATION_METRICS="logging"):
+            self.assertIsInstance(metrics.get_sink(), metrics.LoggingSink)
+
+    @override_settings(
+        SIMPLE_AUTHENTICATION_METRICS=(
+            "simple_authentication.tests.test_metrics.RecordingSink"),
+    )
+    def test_sink_by_path(self):
+        # Other sinks are selected by their dotted path.
+        self.assertIsInstance(metrics.get_sink(), RecordingSink)
+
+
+class InMemorySinkTestCase(TestCase):
+    """Tests for InMemorySink."""
+
+    def test_counters_and_samples(self):
+        # Counters and samples are kept apart per name and tags.
+        sink = metrics.InMemorySink()
+        sink.increment("test.counter")
+        sink.increment("test.counter", 2)
+        sink.increment("test.counter", tags={"kind": "other"})
+        sink.observe("test.value", 0.5)
+        sink.observe("test.value", 1.5)
+
+        self.assertEqual(sink.get_count("test.counter"), 3)
+        self.assertEqual(sink.get_count("test.counter", kind="other"), 1)
+        self.assertEqual(sink.get_count("test.missing"), 0)
+        self.assertEqual(sink.get_samples("test.value"), [0.5, 1.5])
+
+        sink.reset()
+        self.assertEqual(sink.get_count("test.counter"), 0)
+        self.assertEqual(sink.get_samples("test.value"), [])
+
+
+class LoggingSinkTestCase(TestCase):
+    """Tests for LoggingSink."""
+
+    def test_logs_metrics(self):
+        # Each metric is logged, with its details set on the record.
+        sink = metrics.LoggingSink()
+        with self.assertLogs("simple_authentication.metrics") as logs:
+            sink.increment("test.counter", tags={"kind": "test"})
+            sink.observe("test.value", 0.5)
+
+        self.assertEqual(logs.output, [
+            "INFO:simple_authentication.metrics:count test.counter=1 "
+            "kind=test",
+            "INFO:simple_authentication.metrics:value test.value=0.5",
+        ])
+        self.assertEqual(logs.records[0].metric, "test.counter")
+        self.assertEqual(logs.records[0].tags, {"kind": "test"})
+
+
+@override_settings(SIMPLE_AUTHENTICATION_METRICS="memory")
+class InstrumentationTestCase(TestCase):
+    """Tests for the metrics recorded by the app's operations."""
+
+    def setUp(self):
+        self.sink = metrics.get_sink()
+        self.sink.reset()
+
+    def test_set_password(self):
+        # The time taken to hash passwords is recorded.
+        user = User(email="test@example.com")
+        user.set_password("password")
+
+        samples = self.sink.get_samples("user.set_password")
+        self.assertEqual(len(samples), 1)
+        self.assertGreater(samples[0], 0)
+
+    def test_user_created(self):
+        # Users created by the manager are counted, per method.
+        User.objects.create_user(email="test@example.com")
+        User.objects.bulk_create_users([
+            {"email": "test@example.com"},
+            {"email": "other@example.com"},
+            {"email": "another@example.com"},
+        ])
+
+        self.assertEqual(self.sink.get_count(
+            "user.created", method="create_user"), 1)
+        self.assertEqual(self.sink.get_count(
+            "user.created", method="bulk_create_users"), 2)
+
+    def test_password_change_redirect(self):
+        # Requests redirected to the password change view are counted.
+        user = User.objects.create_superuser(
+            email="test@example.com", password="password")
+        user.force_password_change = True
+        user.save()
+        self.client.force_login(user)
+
+        self.client.get("/admin/")
+        self.client.get("/admin/password_change/")
+        self.assertEqual(
+            self.sink.get_count("middleware.password_change_redirect"), 1)
+
+    def test_hijack(self):
+        # Logins as another user through the admin are counted.
+        admin = User.objects.create_superuser(
+            email="admin@example.com", password="password")
+        user = User.objects.create_user(email="test@example.com")
+        self.client.force_login(admin)
+
+        self.client.post("/admin/simple_authentication/user/", {
+            "action": "hijack",
+            "_selected_action": [user.pk],
+        })
+        self.assertEqual(self.sink.get_count("admin.hijack"), 1)
+
+
+class QueryMetricsMiddlewareTestCase(TestCase):
+    """Tests for QueryMetricsMiddleware."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="test@example.com")
+        self.factory = RequestFactory()
+
+        def view(request):
+            list(User.objects.all())
+            list(User.objects.all())
+            return HttpResponse()
+
+        self.middleware = QueryMetricsMiddleware(view)
+
+    def get_request(self, user_id):
+        request = self.factory.get("/")
+        request.session = {}
+        if user_id is not None:
+            request.session["_auth_user_id"] = str(user_id)
+        return request
+
+    @override_settings(SIMPLE_AUTHENTICATION_METRICS="memory")
+    def test_records_queries_of_authenticated_requests(self):
+        # The queries of authenticated requests are counted; those of
+        # anonymous requests aren't.
+        self.middleware(self.get_request(self.user.pk))
+        self.middleware(self.get_request(None))
+
+        self.assertEqual(
+            metrics.get_sink().get_samples("request.queries"), [2])
+
+    def test_disabled(self):
+        # Without a sink, queries aren't counted at all.
+        with self.assertNumQueries(2):
+            response = self.middleware(self.get_request(self.user.pk))
+        self.assertEqual(response.status_code, 200)
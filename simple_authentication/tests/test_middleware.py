@@ -0,0 +1,282 @@
+"""Tests for simple_authentication.middleware."""
+
+import asyncio
+
+from django.conf.urls import include, url
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import clear_url_caches
+
+from ..middleware import (
+    ForcePasswordChangeMiddleware, RouteMatcher, TokenAuthenticationMiddleware,
+)
+from ..tokens import create_token
+
+User = get_user_model()
+
+# URLconf used to check that compiled routes follow ROOT_URLCONF changes.
+urlpatterns = [
+    url(
+        regex=r"^backend/",
+        view=include([url(regex=r"^site/", view=admin.site.urls)]),
+    ),
+]
+
+
+class ForcePasswordChangeMiddlewareTestCase(TestCase):
+    """Tests for ForcePasswordChangeMiddleware."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            email="test@example.com",
+            password="password",
+        )
+        self.user.force_password_change = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+    def test_redirects_admin_url_to_password_change(self):
+        # Admin URLs redirect to the password change view when the user is
+        # flagged to change their password.
+        response = self.client.get("/admin/")
+        self.assertRedirects(
+            response, "/admin/password_change/", fetch_redirect_response=False)
+
+    def test_does_not_redirect_password_change_url(self):
+        # The password change view (and the views below it) remain
+        # reachable to flagged users.
+        for path in ("/admin/password_change/",
+                     "/admin/password_change/done/"):
+            response = self.client.get(path)
+            self.assertNotEqual(response.status_code, 302)
+
+    def test_does_not_redirect_non_admin_url(self):
+        # Only admin URLs are subject to redirection.
+        response = self.client.get("/not-admin/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_does_not_redirect_when_flag_not_set(self):
+        # Users without the flag set are never redirected.
+        self.user.force_password_change = False
+        self.user.save()
+
+        response = self.client.get("/admin/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_does_not_redirect_anonymous_user(self):
+        # Anonymous users are left to the admin's own login handling.
+        self.client.logout()
+
+        response = self.client.get("/admin/")
+        self.assertRedirects(
+            response, "/admin/login/?next=/admin/",
+            fetch_redirect_response=False)
+
+    @override_settings(
+        SIMPLE_AUTHENTICATION_PASSWORD_CHANGE_EXEMPT_PATHS=[
+            r"^/admin/logout/$",
+            r"^/admin/jsi18n/",
+        ],
+    )
+    def test_does_not_redirect_exempt_paths(self):
+        # Paths matching any of the configured exempt patterns are not
+        # redirected.
+        response = self.client.get("/admin/jsi18n/")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get("/admin/simple_authentication/")
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_follows_root_urlconf_changes(self):
+        # Compiled routes are rebuilt when the URLconf changes, including
+        # admin sites nested inside other includes.
+        response = self.client.get("/backend/site/")
+        self.assertRedirects(
+            response, "/backend/site/password_change/",
+            fetch_redirect_response=False)
+
+        response = self.client.get("/admin/")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SIMPLE_AUTHENTICATION_CACHE="default")
+class CachedForcePasswordChangeMiddlewareTestCase(TestCase):
+    """Tests for ForcePasswordChangeMiddleware with caching enabled."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="password",
+        )
+        self.client.force_login(self.user)
+
+    def test_does_not_load_user_when_flag_is_cached(self):
+        # Once cached, the flag is read without loading the user: only the
+        # session is read from the database.
+        self.client.get("/not-admin/")
+
+        with self.assertNumQueries(1):
+            self.client.get("/not-admin/")
+
+    @override_settings(SIMPLE_AUTHENTICATION_CACHE=None)
+    def test_loads_user_when_caching_is_disabled(self):
+        # Without caching the user is loaded on every request.
+        self.client.get("/not-admin/")
+
+        with self.assertNumQueries(2):
+            self.client.get("/not-admin/")
+
+    def test_saving_flag_updates_cached_copy(self):
+        # Setting the flag is picked up by the next request, without the
+        # user having to log in again.
+        self.client.get("/admin/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.force_password_change = True
+            self.user.save()
+
+        response = self.client.get("/admin/")
+        self.assertRedirects(
+            response, "/admin/password_change/", fetch_redirect_response=False)
+
+
+class AsyncForcePasswordChangeMiddlewareTestCase(TestCase):
+    """Tests for ForcePasswordChangeMiddleware under ASGI."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            email="test@example.com",
+            password="password",
+        )
+        self.user.force_password_change = True
+        self.user.save()
+        self.async_client.force_login(self.user)
+
+    async def test_redirects_admin_url_to_password_change(self):
+        # Admin URLs redirect to the password change view when the user is
+        # flagged to change their password.
+        response = await self.async_client.get("/admin/")
+        self.assertRedirects(
+            response, "/admin/password_change/", fetch_redirect_response=False)
+
+    async def test_does_not_redirect_password_change_url(self):
+        # The password change view remains reachable to flagged users.
+        response = await self.async_client.get("/admin/password_change/")
+        self.assertEqual(response.status_code, 200)
+
+    async def test_does_not_redirect_non_admin_url(self):
+        # Only admin URLs are subject to redirection.
+        response = await self.async_client.get("/not-admin/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_middleware_is_async_with_async_get_response(self):
+        # The middleware only presents itself as a coroutine function when
+        # the rest of the chain is async.
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = ForcePasswordChangeMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        middleware = ForcePasswordChangeMiddleware(lambda r: HttpResponse())
+        self.assertFalse(asyncio.iscoroutinefunction(middleware))
+
+    async def test_acall_uses_loaded_user(self):
+        # The async path checks the already-resolved user without another
+        # trip to the database (which would raise SynchronousOnlyOperation
+        # when made from the event loop).
+        async def get_response(request):
+            return HttpResponse()
+
+        request = RequestFactory().get("/admin/")
+        request.user = self.user
+        middleware = ForcePasswordChangeMiddleware(get_response)
+
+        response = await middleware(request)
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(SIMPLE_AUTHENTICATION_CACHE="default")
+class TokenAuthenticationMiddlewareTestCase(TestCase):
+    """Tests for TokenAuthenticationMiddleware."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="password",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.factory = RequestFactory()
+
+    def get_user(self, authorization):
+        """Return the user of a request with the Authorization header."""
+        def get_response(request):
+            return HttpResponse()
+
+        request = self.factory.get("/", HTTP_AUTHORIZATION=authorization)
+        request.user = "session user"
+        TokenAuthenticationMiddleware(get_response)(request)
+        return request.user
+
+    def test_authenticates_token(self):
+        # Requests bearing a valid token are authenticated as its user,
+        # without any query.
+        token = create_token(self.user)
+
+        with self.assertNumQueries(0):
+            user = self.get_user("Bearer {}".format(token))
+        self.assertEqual(user, self.user)
+        self.assertEqual(
+            user.backend, "simple_authentication.backends.TokenBackend")
+
+    def test_rejects_invalid_token(self):
+        # Requests bearing an invalid token are anonymous.
+        user = self.get_user("Bearer invalid")
+        self.assertTrue(user.is_anonymous)
+
+    def test_ignores_requests_without_token(self):
+        # Other requests keep the user of their session.
+        self.assertEqual(self.get_user(""), "session user")
+        self.assertEqual(self.get_user("Basic abc"), "session user")
+
+    async def test_authenticates_token_under_asgi(self):
+        # The async path authenticates the token, too.
+        async def get_response(request):
+            return HttpResponse()
+
+        token = create_token(self.user)
+        request = self.factory.get(
+            "/", HTTP_AUTHORIZATION="Bearer {}".format(token))
+        await TokenAuthenticationMiddleware(get_response)(request)
+
+        self.assertEqual((await request.auser()).pk, self.user.pk)
+
+
+class RouteMatcherTestCase(TestCase):
+    """Tests for RouteMatcher."""
+
+    def test_for_urlconf_is_cached(self):
+        # The same matcher is returned until the URL caches are cleared.
+        matcher = RouteMatcher.for_urlconf()
+        self.assertIs(matcher, RouteMatcher.for_urlconf())
+
+        clear_url_caches()
+        self.assertIsNot(matcher, RouteMatcher.for_urlconf())
+
+    def test_should_redirect(self):
+        # should_redirect() is True only for admin paths other than the
+        # password change view.
+        matcher = RouteMatcher.for_urlconf()
+
+        self.assertTrue(matcher.should_redirect("/admin/"))
+        self.assertTrue(matcher.should_redirect("/admin/auth/"))
+        self.assertFalse(matcher.should_redirect("/admin/password_change/"))
+        self.assertFalse(matcher.should_redirect("/administrator/"))
+        self.assertFalse(matcher.should_redirect("/"))
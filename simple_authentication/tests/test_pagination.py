@@ -0,0 +1,150 @@
+"""Tests for simple_authentication.pagination."""
+
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..pagination import KeysetPaginator, get_keyset
+
+User = get_user_model()
+
+
+class GetKeysetTestCase(TestCase):
+    """Tests for get_keyset()."""
+
+    def test_total_orderings(self):
+        # Orderings ending with a unique field are keysets.
+        self.assertEqual(
+            get_keyset(User.objects.order_by("email")),
+            [("email", False)])
+        self.assertEqual(
+            get_keyset(User.objects.order_by("-date_joined", "-pk")),
+            [("date_joined", True), ("id", True)])
+
+    def test_unsuitable_orderings(self):
+        # Orderings which aren't total, on nullable or related fields, or
+        # on expressions aren't keysets.
+        for queryset in (
+            User.objects.order_by("first_name"),
+            User.objects.order_by("last_login", "pk"),
+            User.objects.order_by("groups__name", "pk"),
+            User.objects.order_by("?"),
+            User.objects.order_by(),
+        ):
+            self.assertIsNone(get_keyset(queryset))
+
+
+class KeysetPaginatorTestCase(TestCase):
+    """Tests for KeysetPaginator."""
+
+    def setUp(self):
+        now = timezone.now()
+        for i in range(23):
+            user = User.objects.create_user(
+                email="user{:02}@example.com".format((i * 7) % 23))
+            # Users joined in batches, so that the pk breaks ties.
+            User.objects.filter(pk=user.pk).update(
+                date_joined=now - timedelta(days=i // 3))
+
+    def assertPagesEqual(self, queryset, per_page=5, orphans=2):
+        """Check that every page matches the Paginator's, from any anchor."""
+        expected = Paginator(queryset, per_page, orphans)
+        anchors = [None]
+        for number in expected.page_range:
+            paginator = KeysetPaginator(queryset, per_page, orphans)
+            paginator.page(number)
+            anchors.append(paginator.last_anchor)
+
+        for anchor in anchors:
+            paginator = KeysetPaginator(
+                queryset, per_page, orphans, anchor=anchor)
+            for number in expected.page_range:
+                self.assertEqual(
+                    list(paginator.page(number)),
+                    list(expected.page(number)),
+                    "Page {} from anchor {}".format(number, anchor))
+
+    def test_pages(self):
+        # Pages are the same as those of a Paginator, whatever the ordering
+        # and anchor.
+        self.assertPagesEqual(User.objects.order_by("email"))
+        self.assertPagesEqual(User.objects.order_by("-email"))
+        self.assertPagesEqual(User.objects.order_by("date_joined", "-pk"))
+        self.assertPagesEqual(User.objects.order_by("-date_joined", "pk"))
+        self.assertPagesEqual(User.objects.order_by("first_name"))
+
+    def test_seeks_from_anchor(self):
+        # Pages next to the anchor's are read with a small offset from it.
+        queryset = User.objects.order_by("-date_joined", "pk")
+        paginator = KeysetPaginator(queryset, 2)
+        paginator.page(6)
+
+        paginator = KeysetPaginator(queryset, 2, anchor=paginator.last_anchor)
+        for number, offset in ((7, 2), (5, 0), (4, 2)):
+            with CaptureQueriesContext(connection) as queries:
+                paginator.page(number)
+            sql = queries[-1]["sql"]
+            self.assertIn("date_joined", sql.split("WHERE")[-1])
+            match = re.search(r"OFFSET (\d+)", sql)
+            self.assertEqual(int(match.group(1)) if match else 0, offset)
+
+    def test_reads_last_pages_from_end(self):
+        # The last pages are read backwards, from the end.
+        paginator = KeysetPaginator(User.objects.order_by("email"), 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                [user.email for user in paginator.page(12)],
+                ["user22@example.com"])
+        self.assertIn("DESC", queries[-1]["sql"])
+        self.assertNotIn("OFFSET", queries[-1]["sql"])
+
+    def test_ignores_invalid_anchors(self):
+        # Anchors which can't be decoded, or which were made for another
+        # queryset, are ignored.
+        paginator = KeysetPaginator(User.objects.order_by("email"), 5)
+        paginator.page(3)
+        anchor = paginator.last_anchor
+
+        for queryset, anchor in (
+            (User.objects.order_by("email"), "garbage"),
+            (User.objects.order_by("email"), "3:nope:[1]"),
+            (User.objects.order_by("email"), anchor.replace("[", "[1, ")),
+            (User.objects.order_by("-email"), anchor),
+            (User.objects.filter(is_staff=False).order_by("email"), anchor),
+        ):
+            paginator = KeysetPaginator(queryset, 5, anchor=anchor)
+            self.assertIsNone(paginator.anchor)
+            self.assertEqual(
+                list(paginator.page(2)),
+                list(Paginator(queryset, 5).page(2)))
+
+
+class KeysetChangeListTestCase(TestCase):
+    """Tests for the user admin's keyset pagination."""
+
+    def test_page_links_carry_anchor(self):
+        # Links to other pages carry the anchor of the current one, which
+        # other links don't.
+        admin = User.objects.create_superuser(
+            email="admin@example.com",
+            password="password",
+        )
+        for i in range(250):
+            User.objects.create_user(email="user{:03}@example.com".format(i))
+        self.client.force_login(admin)
+        url = "/admin/simple_authentication/user/"
+
+        response = self.client.get(url, {"p": "2"})
+        cl = response.context["cl"]
+        self.assertIn("anchor=", cl.get_query_string({"p": 3}))
+        self.assertNotIn("anchor=", cl.get_query_string({"o": "1"}))
+
+        response = self.client.get(url + cl.get_query_string({"p": 3}))
+        self.assertEqual(
+            response.context["cl"].result_list[0].email, "user199@example.com")
@@ -0,0 +1,171 @@
+"""Tests for simple_authentication.search."""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..models import UserSearchToken
+from ..search import (
+    ContainsSearch, PrefixSearch, TokenSearch, get_user_search, user_tokens,
+)
+
+User = get_user_model()
+
+
+class SearchTestCase(TestCase):
+    """Base class creating a few users to search for."""
+
+    def setUp(self):
+        self.john = User.objects.create_user(
+            email="john.smith@example.com",
+            first_name="John",
+            last_name="Smith",
+        )
+        self.jane = User.objects.create_user(
+            email="jane@example.org",
+            first_name="Jane",
+            last_name="Goldsmith",
+        )
+
+    def search(self, engine, search_term):
+        """Return the set of users found by the engine."""
+        return set(engine.filter(User.objects.all(), search_term))
+
+
+class ContainsSearchTestCase(SearchTestCase):
+    """Tests for ContainsSearch."""
+
+    def test_filter(self):
+        # Any substring of the fields is found.
+        search = ContainsSearch()
+        self.assertEqual(self.search(search, "smith"), {self.john, self.jane})
+        self.assertEqual(self.search(search, "AMPLE.ORG"), {self.jane})
+        self.assertEqual(
+            self.search(search, str(self.jane.pk)) & {self.jane}, {self.jane})
+
+
+class PrefixSearchTestCase(SearchTestCase):
+    """Tests for PrefixSearch."""
+
+    def test_filter_by_prefix(self):
+        # The start of the email or names is found, as typed or capitalized.
+        search = PrefixSearch()
+        self.assertEqual(self.search(search, "jo"), {self.john})
+        self.assertEqual(self.search(search, "Smi"), {self.john})
+        self.assertEqual(self.search(search, "gold"), {self.jane})
+        self.assertEqual(self.search(search, "j"), {self.john, self.jane})
+        self.assertEqual(self.search(search, "mith"), set())
+
+    def test_filter_by_email_or_id(self):
+        # Emails are matched case-insensitively, and IDs exactly.
+        search = PrefixSearch()
+        self.assertEqual(self.search(search, "JANE@example"), {self.jane})
+        self.assertEqual(self.search(search, str(self.john.pk)), {self.john})
+
+    def test_filter_requires_every_term(self):
+        # Users must match every term.
+        search = PrefixSearch()
+        self.assertEqual(self.search(search, "john smith"), {self.john})
+        self.assertEqual(self.search(search, "john gold"), set())
+
+
+@override_settings(SIMPLE_AUTHENTICATION_USER_SEARCH="tokens")
+class TokenSearchTestCase(SearchTestCase):
+    """Tests for TokenSearch."""
+
+    def test_user_tokens(self):
+        # Every suffix of every word is a token.
+        user = User(email="ab@cd.e", first_name="", last_name="Ab")
+        self.assertEqual(user_tokens(user), {"ab", "b", "cd", "d", "e"})
+
+    def test_filter(self):
+        # Substrings of words are found.
+        search = TokenSearch()
+        self.assertEqual(self.search(search, "MITH"), {self.john, self.jane})
+        self.assertEqual(self.search(search, "oldsm"), {self.jane})
+        self.assertEqual(self.search(search, "ith@exam"), {self.john})
+        self.assertEqual(self.search(search, "ith@ex"), {self.john})
+        self.assertEqual(self.search(search, "smith john"), {self.john})
+        self.assertEqual(self.search(search, "smithy"), set())
+
+    def test_filter_by_email_or_id(self):
+        # Emails and IDs are matched exactly.
+        search = TokenSearch()
+        self.assertEqual(self.search(search, "Jane@Example.org"), {self.jane})
+        self.assertEqual(self.search(search, str(self.jane.pk)), {self.jane})
+
+    def test_index_maintained_on_save(self):
+        # Saving the user replaces their tokens, unless the searched fields
+        # are known not to have changed.
+        self.john.last_name = "Jones"
+        self.john.save()
+
+        search = TokenSearch()
+        self.assertEqual(self.search(search, "jones"), {self.john})
+        self.assertEqual(self.search(search, "smith"), {self.john, self.jane})
+
+        with self.assertNumQueries(1):
+            self.john.save(update_fields=["is_staff"])
+
+    def test_index_maintained_by_bulk_create_users(self):
+        # Users created (or updated) in bulk are indexed, too.
+        User.objects.bulk_create_users([
+            {"email": "alice@example.com", "last_name": "Liddell"},
+            {"email": "jane@example.org", "last_name": "Doe"},
+        ], update_existing=True)
+
+        search = TokenSearch()
+        self.assertEqual(
+            {user.email for user in self.search(search, "lidd")},
+            {"alice@example.com"})
+        self.assertEqual(self.search(search, "doe"), {self.jane})
+        self.assertEqual(self.search(search, "goldsmith"), set())
+
+    def test_rebuild_index(self):
+        # rebuild_index() indexes existing users, a chunk at a time.
+        with self.settings(SIMPLE_AUTHENTICATION_USER_SEARCH=None):
+            User.objects.create_user(email="alice@example.com")
+        UserSearchToken.objects.all().delete()
+
+        search = TokenSearch()
+        with self.assertNumQueries(7):
+            search.rebuild_index(User.objects.all(), chunk_size=2)
+
+        self.assertEqual(self.search(search, "smith"), {self.john, self.jane})
+        self.assertEqual(
+            {user.email for user in self.search(search, "alic")},
+            {"alice@example.com"})
+
+
+class GetUserSearchTestCase(TestCase):
+    """Tests for get_user_search() and the user admin."""
+
+    def test_default(self):
+        # By default, the admin's own search is used.
+        self.assertIsNone(get_user_search())
+
+    @override_settings(SIMPLE_AUTHENTICATION_USER_SEARCH="prefix")
+    def test_by_name(self):
+        # Engines may be selected by name.
+        self.assertIsInstance(get_user_search(), PrefixSearch)
+
+    @override_settings(SIMPLE_AUTHENTICATION_USER_SEARCH=(
+        "simple_authentication.search.TokenSearch"))
+    def test_by_path(self):
+        # Engines may be selected by dotted path.
+        self.assertIsInstance(get_user_search(), TokenSearch)
+
+    @override_settings(SIMPLE_AUTHENTICATION_USER_SEARCH="prefix")
+    def test_admin_changelist(self):
+        # The user admin's changelist searches with the selected engine.
+        admin = User.objects.create_superuser(
+            email="admin@example.com",
+            password="password",
+        )
+        User.objects.create_user(email="someone@example.com")
+        self.client.force_login(admin)
+
+        response = self.client.get(
+            "/admin/simple_authentication/user/", {"q": "some"})
+        self.assertEqual(
+            [user.email for user in response.context["cl"].result_list],
+            ["someone@example.com"])
@@ -0,0 +1,154 @@
+"""Tests for simple_authentication.sessions."""
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.test import TestCase, override_settings
+
+from ..models import UserSession
+from ..sessions import (
+    delete_user_sessions, prune_session_index, reindex_session,
+)
+
+User = get_user_model()
+
+
+class SessionIndexTestCase(TestCase):
+    """Tests for maintaining the index as users log in and out."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@example.com", password="password")
+
+    def test_login_indexes_session(self):
+        # Logging in records the session's key against the user.
+        self.client.login(username="test@example.com", password="password")
+
+        self.assertEqual(
+            list(UserSession.objects.values_list("user", "session_key")),
+            [(self.user.pk, self.client.session.session_key)])
+
+    def test_logout_unindexes_session(self):
+        # Logging out removes the session from the index.
+        self.client.force_login(self.user)
+        self.client.logout()
+
+        self.assertFalse(UserSession.objects.exists())
+
+    def test_password_change_reindexes_session(self):
+        # Changing the password cycles the session's key, which is indexed
+        # in place of the previous one, so the user can still be logged out
+        # of the session.
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        previous_key = self.client.session.session_key
+
+        response = self.client.post("/admin/password_change/", {
+            "old_password": "password",
+            "new_password1": "Gt7!mQz9#rLw",
+            "new_password2": "Gt7!mQz9#rLw",
+        })
+        self.assertEqual(response.status_code, 302)
+        session_key = self.client.session.session_key
+        self.assertNotEqual(session_key, previous_key)
+        self.assertEqual(
+            list(UserSession.objects.values_list("user", "session_key")),
+            [(self.user.pk, session_key)])
+
+        self.assertEqual(User.objects.filter(pk=self.user.pk).logout(), 1)
+        self.assertFalse(Session.objects.filter(
+            session_key=session_key).exists())
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cache")
+    def test_cycled_anonymous_session_not_indexed(self):
+        # Cycling the key of a session no user is logged in to indexes
+        # nothing.
+        session = self.client.session
+        session["key"] = "value"
+        session.save()
+        previous_key = session.session_key
+        session.cycle_key()
+
+        reindex_session(previous_key, session)
+        self.assertFalse(UserSession.objects.exists())
+
+
+class DeleteUserSessionsTestCase(TestCase):
+    """Tests for delete_user_sessions() and UserQuerySet.logout()."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email="{}@example.com".format(i))
+            for i in range(3)
+        ]
+        self.clients = []
+        for user in self.users + self.users[:1]:
+            client = self.client_class()
+            client.force_login(user)
+            self.clients.append(client)
+
+    def test_deletes_sessions_of_users(self):
+        # Every session of the given users is deleted, with a query for the
+        # sessions and another for the index.
+        with self.assertNumQueries(2):
+            count = User.objects.filter(pk=self.users[0].pk).logout()
+
+        self.assertEqual(count, 2)
+        self.assertEqual(Session.objects.count(), 2)
+        self.assertEqual(
+            set(UserSession.objects.values_list("user", flat=True)),
+            {self.users[1].pk, self.users[2].pk})
+
+    @override_settings(
+        SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_cached_db_sessions(self):
+        # Cached copies of the sessions are deleted, too.
+        client = self.client_class()
+        client.force_login(self.users[1])
+        session = client.session
+        self.assertTrue(session.exists(session.session_key))
+
+        delete_user_sessions([self.users[1].pk])
+
+        self.assertFalse(session.exists(session.session_key))
+        self.assertIsNone(session._cache.get(session.cache_key))
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cache")
+    def test_cache_sessions(self):
+        # Sessions of the cache backend are deleted from the cache.
+        client = self.client_class()
+        client.force_login(self.users[1])
+        session = client.session
+
+        delete_user_sessions([self.users[1].pk])
+        self.assertFalse(session.exists(session.session_key))
+
+    def test_logged_out_client(self):
+        # Logged out clients are no longer authenticated.
+        User.objects.filter(pk=self.users[0].pk).logout()
+
+        response = self.clients[0].get("/admin/")
+        self.assertRedirects(
+            response, "/admin/login/?next=/admin/",
+            fetch_redirect_response=False)
+
+
+class PruneSessionIndexTestCase(TestCase):
+    """Tests for prune_session_index()."""
+
+    def test_prunes_missing_sessions(self):
+        # Entries of sessions which no longer exist are removed.
+        user = User.objects.create_user(email="test@example.com")
+        self.client.force_login(user)
+        UserSession.objects.create(user=user, session_key="expired")
+
+        self.assertEqual(prune_session_index(), 1)
+        self.assertEqual(
+            list(UserSession.objects.values_list("session_key", flat=True)),
+            [self.client.session.session_key])
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cache")
+    def test_requires_database_sessions(self):
+        # Other session backends can't be checked for sessions.
+        with self.assertRaises(NotImplementedError):
+            prune_session_index()
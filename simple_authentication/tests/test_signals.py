@@ -0,0 +1,151 @@
+"""Tests for simple_authentication.signals."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import cache
+from ..backends import CachedPermissionBackend
+
+User = get_user_model()
+
+
+@override_settings(SIMPLE_AUTHENTICATION_CACHE="default")
+class ForcePasswordChangeCacheTestCase(TestCase):
+    """Tests for the receivers maintaining the cached flag."""
+
+    def setUp(self):
+        default_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(
+                email="test@example.com",
+                password="password",
+            )
+
+    def test_create_caches_flag(self):
+        # Creating a user caches their flag.
+        self.assertIs(cache.get_force_password_change(self.user.pk), False)
+
+    def test_login_caches_flag(self):
+        # Logging in primes the cache.
+        default_cache.clear()
+        self.client.force_login(self.user)
+
+        self.assertIs(cache.get_force_password_change(self.user.pk), False)
+
+    def test_save_updates_flag(self):
+        # Saving a change to the flag updates the cached copy.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.force_password_change = True
+            self.user.save()
+
+        self.assertIs(cache.get_force_password_change(self.user.pk), True)
+
+    def test_set_password_updates_flag(self):
+        # set_password() clears the flag, which is cached once saved.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.force_password_change = True
+            self.user.save()
+            self.user.set_password("new password")
+            self.user.save()
+
+        self.assertIs(cache.get_force_password_change(self.user.pk), False)
+
+    def test_save_of_other_fields_leaves_flag(self):
+        # Saves restricted to other fields don't touch the cached copy.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.force_password_change = True
+            self.user.save(update_fields=["first_name"])
+
+        self.assertIs(cache.get_force_password_change(self.user.pk), False)
+
+    def test_delete_removes_flag(self):
+        # Deleting the user removes the cached copy.
+        user_id = self.user.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertIsNone(cache.get_force_password_change(user_id))
+
+    def test_rolled_back_save_leaves_flag(self):
+        # Changes are only cached once they have been committed.
+        with self.captureOnCommitCallbacks(execute=False):
+            self.user.force_password_change = True
+            self.user.save()
+
+        self.assertIs(cache.get_force_password_change(self.user.pk), False)
+
+
+@override_settings(SIMPLE_AUTHENTICATION_CACHE="default")
+class BulkUpdateCachingTestCase(TestCase):
+    """Tests for the cached state of users updated in bulk."""
+
+    def setUp(self):
+        default_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users = [
+                User.objects.create_user(email="{}@example.com".format(i))
+                for i in range(3)
+            ]
+
+    def test_bulk_update_updates_flags(self):
+        # Flags set in bulk are cached once committed.
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(
+                pk__in=[user.pk for user in self.users[:2]],
+            ).force_password_change(chunk_size=1)
+
+        self.assertEqual(
+            [cache.get_force_password_change(user.pk) for user in self.users],
+            [True, True, False])
+
+    def test_bulk_update_invalidates_users(self):
+        # Users updated in bulk are invalidated (i.e. their versions are
+        # bumped) once committed.
+        versions = default_cache.get_many([
+            cache.USER_VERSION_KEY.format(user.pk) for user in self.users
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.users[0].pk).deactivate()
+
+        self.assertNotEqual(
+            default_cache.get(cache.USER_VERSION_KEY.format(
+                self.users[0].pk)),
+            versions.get(cache.USER_VERSION_KEY.format(self.users[0].pk)))
+
+    def test_update_invalidates_permissions(self):
+        # A superuser demoted with a plain update() loses their cached
+        # permissions once committed.
+        user = self.users[0]
+        User.objects.filter(pk=user.pk).update(is_superuser=True)
+        backend = CachedPermissionBackend()
+        self.assertTrue(backend.has_perm(
+            User.objects.get(pk=user.pk), "auth.add_group"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=user.pk).update(is_superuser=False)
+        self.assertFalse(backend.has_perm(
+            User.objects.get(pk=user.pk), "auth.add_group"))
+
+    def test_update_updates_flags(self):
+        # Flags set with update() (or bulk_update()) are cached once
+        # committed, replacing those cached before.
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.users[0].pk).update(
+                force_password_change=True)
+        self.assertIs(cache.get_force_password_change(self.users[0].pk), True)
+
+        self.users[1].force_password_change = True
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.bulk_update(self.users[1:], ["force_password_change"])
+        self.assertEqual(
+            [cache.get_force_password_change(user.pk) for user in self.users],
+            [True, True, False])
+
+    def test_last_login_updates_keep_cache(self):
+        # Updating only last_login (see last_login.py) costs no query to
+        # update the cache.
+        with self.assertNumQueries(1):
+            User.objects.filter(pk=self.users[0].pk).update(
+                last_login=timezone.now())
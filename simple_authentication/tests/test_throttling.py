@@ -0,0 +1,96 @@
+"""Tests for simple_authentication.throttling."""
+
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..throttling import LoginThrottle, get_login_throttle
+
+RATES = {
+    "email": (3, 60),
+    "ip": (5, 60),
+}
+
+
+class LoginThrottleTestCase(TestCase):
+    """Tests for LoginThrottle."""
+
+    def setUp(self):
+        cache.clear()
+        self.throttle = LoginThrottle(RATES, cache)
+        self.request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+
+    def fail(self, username, times=1):
+        for _ in range(times):
+            self.throttle.record_failure(self.request, username)
+
+    def test_throttles_email(self):
+        # An email is throttled once its failures reach the limit, whatever
+        # the case it's entered in.
+        self.fail("test@example.com", 2)
+        self.assertEqual(self.throttle.get_throttled_scopes(
+            self.request, "test@example.com"), [])
+
+        self.fail("TEST@example.com")
+        self.assertEqual(self.throttle.get_throttled_scopes(
+            self.request, "test@example.com"), ["email"])
+
+    def test_throttles_ip(self):
+        # An IP address is throttled once its failures (across any emails)
+        # reach the limit; other IP addresses aren't.
+        for i in range(5):
+            self.fail("{}@example.com".format(i))
+
+        self.assertEqual(self.throttle.get_throttled_scopes(
+            self.request, "new@example.com"), ["ip"])
+        other = RequestFactory().post("/", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(self.throttle.get_throttled_scopes(
+            other, "new@example.com"), [])
+
+    def test_sliding_window(self):
+        # Failures of the previous window count in proportion to how much
+        # of it the sliding window still overlaps.
+        with mock.patch("time.time", return_value=60 * 1000 + 59):
+            self.fail("test@example.com", 3)
+
+        # A quarter of the way into the next window, 3 * 0.75 remain.
+        with mock.patch("time.time", return_value=60 * 1001 + 15):
+            self.assertEqual(self.throttle.get_throttled_scopes(
+                self.request, "test@example.com"), [])
+            self.fail("test@example.com")
+            self.assertEqual(self.throttle.get_throttled_scopes(
+                self.request, "test@example.com"), ["email"])
+
+        # Two windows later, the failures are forgotten.
+        with mock.patch("time.time", return_value=60 * 1003):
+            self.assertEqual(self.throttle.get_throttled_scopes(
+                self.request, "test@example.com"), [])
+
+    def test_reset(self):
+        # reset() forgets the email's failures, but not the IP address's.
+        self.fail("test@example.com", 5)
+        self.throttle.reset(self.request, "test@example.com")
+
+        self.assertEqual(self.throttle.get_throttled_scopes(
+            self.request, "test@example.com"), ["ip"])
+
+    def test_unknown_scope(self):
+        # Misconfigured scopes are reported.
+        with self.assertRaises(ValueError):
+            LoginThrottle({"username": (1, 1)}, cache)
+
+
+class GetLoginThrottleTestCase(TestCase):
+    """Tests for get_login_throttle()."""
+
+    def test_disabled_by_default(self):
+        # Throttling is opt-in.
+        self.assertIsNone(get_login_throttle())
+
+    @override_settings(SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_RATES=RATES)
+    def test_enabled(self):
+        # The throttle counts in the default cache, unless told otherwise.
+        throttle = get_login_throttle()
+        self.assertEqual(throttle.rates, RATES)
+        self.assertIs(throttle.cache, caches["default"])
@@ -0,0 +1,166 @@
+"""Tests for simple_authentication.tokens."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+
+from ..tokens import TokenUser, create_token, load_token
+
+User = get_user_model()
+
+
+@override_settings(SIMPLE_AUTHENTICATION_CACHE="default")
+class TokenTestCase(TestCase):
+    """Tests for create_token() and load_token()."""
+
+    def setUp(self):
+        default_cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="password",
+        )
+
+    def load(self):
+        """Load a token issued to the user before any change."""
+        return load_token(self.token)
+
+    def issue(self):
+        """Issue a token to the user, once their version is cached."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.token = create_token(self.user)
+
+    def test_loads_token_without_queries(self):
+        # A valid token gives its user's fields without any query.
+        self.issue()
+
+        with self.assertNumQueries(0):
+            user = self.load()
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_active)
+            self.assertFalse(user.is_staff)
+            self.assertFalse(user.force_password_change)
+            self.assertTrue(user.is_authenticated)
+
+    def test_loads_other_attributes_from_user(self):
+        # Attributes the token doesn't carry are read from the User, loaded
+        # once.
+        self.issue()
+        user = self.load()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "test@example.com")
+            self.assertEqual(str(user), "test@example.com")
+        self.assertEqual(user, self.user)
+
+    @override_settings(SIMPLE_AUTHENTICATION_CACHE=None)
+    def test_without_cache(self):
+        # The token version is read from the database if caching is
+        # disabled.
+        self.token = create_token(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertIsInstance(self.load(), TokenUser)
+
+    def test_caches_version_on_miss(self):
+        # A version read from the database is cached for later requests.
+        self.token = create_token(self.user)
+        default_cache.clear()
+        self.load()
+
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(self.load())
+
+    def test_rejects_tampered_and_expired_tokens(self):
+        # Tokens must be signed, and no older than the maximum age.
+        self.issue()
+        self.assertIsNone(load_token(self.token + "x"))
+        self.assertIsNone(load_token("not a token"))
+
+        with mock.patch("time.time", return_value=10 ** 10):
+            self.assertIsNone(self.load())
+
+    def test_password_change_revokes(self):
+        # Setting a new password revokes the tokens issued before.
+        self.issue()
+
+        self.user.set_password("new password")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertIsNone(self.load())
+        self.assertIsNotNone(load_token(create_token(self.user)))
+
+    def test_other_changes_dont_revoke(self):
+        # Saving the user without a new password keeps their tokens valid.
+        self.issue()
+
+        self.user.first_name = "Thomas"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+            self.user.save(update_fields=["last_login"])
+        self.assertIsNotNone(self.load())
+
+    def test_deactivation_revokes(self):
+        # Deactivating the user (by saving, or in bulk) revokes their
+        # tokens; tokens of inactive users are rejected.
+        self.issue()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=["is_active"])
+        self.assertIsNone(self.load())
+        self.assertIsNone(load_token(create_token(self.user)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.reactivate()
+        self.user.refresh_from_db()
+        self.issue()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.deactivate()
+        self.assertIsNone(self.load())
+
+    def test_bulk_password_update_revokes(self):
+        # Updating passwords with bulk_create_users() revokes tokens, too.
+        self.issue()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.bulk_create_users([{
+                "email": "test@example.com",
+                "password": "new password",
+            }], update_existing=True)
+        self.assertIsNone(self.load())
+
+    def test_update_revokes(self):
+        # Deactivating users with update() revokes their (cached) tokens.
+        self.issue()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(self.load())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.user.refresh_from_db()
+        self.issue()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(password="!")
+        self.assertIsNone(self.load())
+
+    def test_bulk_update_revokes(self):
+        # Updating passwords with bulk_update() revokes cached tokens, too.
+        self.issue()
+
+        self.user.set_password("new password")
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.bulk_update([self.user], ["password"])
+        self.assertIsNone(self.load())
+        self.assertIsNotNone(load_token(create_token(self.user)))
+
+    def test_deleted_user(self):
+        # Tokens of deleted users are rejected.
+        self.issue()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertIsNone(self.load())
@@ -0,0 +1,138 @@
+"""Throttling of failed logins, to protect the CPU from credential stuffing.
+
+Each failed login costs a full password hash, so a burst of them can keep
+every worker busy hashing. With ``SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_RATES``
+set, failed logins are counted per email and per client IP address, and
+once either count reaches its limit, further attempts are rejected before
+any password is hashed.
+
+Counts are kept in Django's cache framework as sliding windows: the count
+of the current fixed window, plus that of the previous window weighted by
+how much of it still overlaps the sliding window. Only atomic add() and
+incr() are used to record failures, so the counts are shared safely between
+processes (given a shared cache, such as Memcached or Redis).
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+
+from .emails import canonicalize_email
+
+THROTTLE_KEY = "simple_authentication:login_throttle:{}:{}:{}"
+
+# The scopes failed logins are counted in, and the function returning the
+# identity an attempt is counted against in each (or None to not count it).
+SCOPES = {
+    "email": lambda request, username: (
+        canonicalize_email(username) if username else None),
+    "ip": lambda request, username: (
+        request.META.get("REMOTE_ADDR") if request is not None else None),
+}
+
+
+class LoginThrottle:
+    """Counter of failed logins, per scope, in sliding windows.
+
+    :param rates: mapping of scopes (see SCOPES) to the (number of failed
+        logins, period in seconds) allowed within any sliding period
+    :type rates: dict
+    :param cache: the cache the counts are kept in
+    """
+
+    def __init__(self, rates, cache):
+        """Keep the rates, and the cache to count in."""
+        unknown = set(rates).difference(SCOPES)
+        if unknown:
+            raise ValueError("Unknown login throttle scopes: {}.".format(
+                ", ".join(sorted(unknown))))
+        self.rates = rates
+        self.cache = cache
+
+    def get_identities(self, request, username):
+        """Return the identity of the attempt in each scope (if any)."""
+        identities = {}
+        for scope in self.rates:
+            identity = SCOPES[scope](request, username)
+            if identity:
+                identities[scope] = hashlib.md5(
+                    identity.encode("utf-8")).hexdigest()
+        return identities
+
+    def get_keys(self, scope, identity, now):
+        """Return the keys of the current and previous windows."""
+        window = int(now // self.rates[scope][1])
+        return (
+            THROTTLE_KEY.format(scope, identity, window),
+            THROTTLE_KEY.format(scope, identity, window - 1),
+        )
+
+    def get_throttled_scopes(self, request, username):
+        """Return the scopes whose limit the attempt has reached.
+
+        All the counts are read with a single get_many().
+        """
+        now = time.time()
+        keys = {
+            scope: self.get_keys(scope, identity, now)
+            for scope, identity in self.get_identities(
+                request, username).items()
+        }
+        counts = self.cache.get_many([
+            key for scope_keys in keys.values() for key in scope_keys
+        ])
+
+        throttled = []
+        for scope, (current, previous) in keys.items():
+            limit, period = self.rates[scope]
+            overlap = 1 - (now % period) / period
+            count = counts.get(current, 0) + counts.get(previous, 0) * overlap
+            if count >= limit:
+                throttled.append(scope)
+        return throttled
+
+    def record_failure(self, request, username):
+        """Count a failed login against each of the attempt's identities."""
+        now = time.time()
+        for scope, identity in self.get_identities(request, username).items():
+            key, _ = self.get_keys(scope, identity, now)
+            # Kept for the current window, and the next (during which it is
+            # the previous window).
+            timeout = self.rates[scope][1] * 2
+            self.cache.add(key, 0, timeout=timeout)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                # The key expired (or was evicted) in the meantime.
+                self.cache.set(key, 1, timeout=timeout)
+
+    def reset(self, request, username):
+        """Forget the failed logins of the attempt's email, e.g. on success.
+
+        Counts against the IP address are kept, as an attacker may well
+        know some valid credentials.
+        """
+        if "email" not in self.rates:
+            return
+        identity = self.get_identities(request, username).get("email")
+        if identity is not None:
+            self.cache.delete_many(
+                self.get_keys("email", identity, time.time()))
+
+
+def get_login_throttle():
+    """Return the throttle configured by the settings, or None if disabled.
+
+    ``SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_RATES`` maps scopes to their
+    rates, and ``SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_CACHE`` names the
+    cache to count in (defaulting to the default cache).
+    """
+    rates = getattr(settings, "SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_RATES",
+                    None)
+    if not rates:
+        return None
+    alias = getattr(settings, "SIMPLE_AUTHENTICATION_LOGIN_THROTTLE_CACHE",
+                    DEFAULT_CACHE_ALIAS)
+    return LoginThrottle(rates, caches[alias])
@@ -0,0 +1,126 @@
+"""Short-lived signed tokens, authenticating API requests without sessions.
+
+A token (see create_token) carries the ID, is_active, is_staff and
+force_password_change flags, and token_version of its user, signed with
+the SECRET_KEY and timestamped; it expires after
+``SIMPLE_AUTHENTICATION_TOKEN_MAX_AGE`` seconds (by default, 5 minutes).
+
+Changing a user's password (or deactivating them) increments their
+token_version, revoking the tokens issued before. Checking a token's
+version is the only lookup it needs: with ``SIMPLE_AUTHENTICATION_CACHE``
+set, the versions are read from the cache, so requests authenticated by
+tokens (see TokenAuthenticationMiddleware) read nothing from the database.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+
+from . import cache
+
+TOKEN_SALT = "simple_authentication.tokens"
+
+MAX_AGE_SETTING = "SIMPLE_AUTHENTICATION_TOKEN_MAX_AGE"
+
+
+def get_max_age():
+    """Return the number of seconds for which tokens are valid."""
+    return getattr(settings, MAX_AGE_SETTING, 300)
+
+
+def create_token(user):
+    """Return a signed token authenticating the (active) user."""
+    return signing.dumps({
+        "id": user.pk,
+        "a": user.is_active,
+        "s": user.is_staff,
+        "f": user.force_password_change,
+        "v": user.token_version,
+    }, salt=TOKEN_SALT)
+
+
+def get_token_version(user_id):
+    """Return the current token version of the user, or None if deleted.
+
+    Read from the cache if possible; otherwise from the database, and then
+    cached.
+    """
+    version = cache.get_token_version(user_id)
+    if version is not None:
+        return version
+
+    version = get_user_model()._default_manager.filter(
+        pk=user_id).values_list("token_version", flat=True).first()
+    if version is not None:
+        cache.add_token_version(user_id, version)
+    return version
+
+
+class TokenUser:
+    """The user a token was issued to, as read from the token.
+
+    The fields carried by the token are available without loading the user;
+    any other attribute (or method) is looked up on the User itself, which
+    is then loaded from the database once.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, pk, is_active, is_staff, force_password_change,
+                 token_version):
+        """Keep the fields carried by the token."""
+        self.pk = self.id = pk
+        self.is_active = is_active
+        self.is_staff = is_staff
+        self.force_password_change = force_password_change
+        self.token_version = token_version
+        self._user = None
+
+    def __getattr__(self, name):
+        """Look attributes missing from the token up on the User."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+    def __eq__(self, other):
+        """Compare equal to (tokens of) the same user."""
+        if isinstance(other, (TokenUser, get_user_model())):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        """Hash as the User does."""
+        return hash(self.pk)
+
+    def __str__(self):
+        """Return the User's representation as a string."""
+        return str(self.get_user())
+
+    def get_user(self):
+        """Return the User, loading it from the database the first time."""
+        if self._user is None:
+            self._user = get_user_model()._default_manager.get(pk=self.pk)
+        return self._user
+
+
+def load_token(token):
+    """Return the TokenUser of a valid token, or None.
+
+    A token is invalid if its signature doesn't match, it has expired, its
+    user was inactive, or their token version has changed since.
+    """
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=get_max_age())
+    except signing.BadSignature:
+        return None
+
+    if not payload["a"] or get_token_version(payload["id"]) != payload["v"]:
+        return None
+    return TokenUser(
+        pk=payload["id"],
+        is_active=payload["a"],
+        is_staff=payload["s"],
+        force_password_change=payload["f"],
+        token_version=payload["v"],
+    )